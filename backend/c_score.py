@@ -6,9 +6,84 @@ It uses simple exact-match and category-overlap heuristics to produce a 0-100 sc
 and a short human-readable explanation.
 """
 
+import json
+import os
+import re
+from functools import lru_cache
 from typing import List, Union, Tuple
 
 
+# Skill categories in priority order: a skill belongs to the first category
+# whose keyword list has any entry as a substring of it. The table lives in
+# skill_categories.json so it can be extended without code changes.
+CATEGORIES_PATH = os.getenv(
+    "SKILL_CATEGORIES_PATH", os.path.join(os.path.dirname(os.path.abspath(__file__)), "skill_categories.json")
+)
+
+
+def load_category_keywords(path: str = CATEGORIES_PATH) -> List[Tuple[str, List[str]]]:
+    """Read the ordered {category: [keywords]} table."""
+    with open(path, encoding="utf-8") as f:
+        table = json.load(f)
+    return [(name, [str(k).lower() for k in keywords]) for name, keywords in table.items()]
+
+
+def compile_category_matcher(category_keywords: List[Tuple[str, List[str]]]) -> "re.Pattern":
+    """
+    One regex for the whole table. Each category is a lookahead that scans the
+    skill for any of its keywords; the alternation tries categories in table
+    order, so the first category with a match wins, like the original scans.
+    """
+    branches = []
+    for i, (_, keywords) in enumerate(category_keywords):
+        if keywords:
+            alternatives = "|".join(re.escape(k) for k in sorted(keywords, key=len, reverse=True))
+            branches.append(f"(?=.*?(?:{alternatives}))(?P<c{i}>)")
+    return re.compile("^(?:" + "|".join(branches) + ")", re.DOTALL) if branches else re.compile("(?!)")
+
+
+CATEGORY_KEYWORDS = load_category_keywords()
+CATEGORIES = [name for name, _ in CATEGORY_KEYWORDS] + ['other']
+_CATEGORY_MATCHER = compile_category_matcher(CATEGORY_KEYWORDS)
+
+
+@lru_cache(maxsize=int(os.getenv("SKILL_CATEGORY_MEMO_SIZE", "8192")))
+def _categorize_lower(skill: str) -> str:
+    match = _CATEGORY_MATCHER.match(skill)
+    if match is None:
+        return 'other'
+    return CATEGORY_KEYWORDS[int(match.lastgroup[1:])][0]
+
+
+def categorize_skill(skill: str) -> str:
+    """Map a skill to its category name ('other' if nothing matches)."""
+    return _categorize_lower(skill.lower())
+
+
+def normalize_skills(skills: Union[List, dict]) -> List[str]:
+    """Turn a stored skills value (list, dict or None) into lowercase, stripped strings."""
+    # Convert to lists if dict
+    if isinstance(skills, dict):
+        skills = list(skills.keys())
+    else:
+        skills = skills or []
+
+    # Ensure it's a list
+    if not isinstance(skills, list):
+        skills = list(skills) if skills else []
+
+    return [str(s).lower().strip() for s in skills if s]
+
+
+def compatibility_reason(exact_matches: int, cat_matches: int) -> str:
+    """Human-readable explanation for a score with the given match counts."""
+    if exact_matches > 0:
+        return f"{exact_matches} exact skill match{'es' if exact_matches != 1 else ''} • Good collaboration fit"
+    if cat_matches > 0:
+        return f"Strong in {cat_matches} skill categor{'ies' if cat_matches != 1 else ''} • Complementary strengths"
+    return f"Diverse skill sets • Can learn from each other"
+
+
 def get_compatibility_score(member1_skills: Union[List, dict], member2_skills: Union[List, dict]) -> Tuple[float, str]:
     """
     Calculate compatibility score (0-100) between two members based on their skills.
@@ -22,26 +97,8 @@ def get_compatibility_score(member1_skills: Union[List, dict], member2_skills: U
         Tuple of (compatibility_score, explanation)
     """
     try:
-        # Convert to lists if dict
-        if isinstance(member1_skills, dict):
-            skills1 = list(member1_skills.keys())
-        else:
-            skills1 = member1_skills or []
-
-        if isinstance(member2_skills, dict):
-            skills2 = list(member2_skills.keys())
-        else:
-            skills2 = member2_skills or []
-
-        # Ensure they're lists
-        if not isinstance(skills1, list):
-            skills1 = list(skills1) if skills1 else []
-        if not isinstance(skills2, list):
-            skills2 = list(skills2) if skills2 else []
-
-        # Convert all skills to lowercase strings for comparison
-        skills1 = [str(s).lower().strip() for s in skills1 if s]
-        skills2 = [str(s).lower().strip() for s in skills2 if s]
+        skills1 = normalize_skills(member1_skills)
+        skills2 = normalize_skills(member2_skills)
 
         # If both have no skills, return neutral score
         if not skills1 and not skills2:
@@ -51,44 +108,6 @@ def get_compatibility_score(member1_skills: Union[List, dict], member2_skills: U
         if not skills1 or not skills2:
             return 40, f"One user has no skills, limited collaboration potential"
 
-        # Skill categorization (group related skills)
-        def categorize_skill(skill: str) -> str:
-            skill = skill.lower()
-
-            # Programming languages
-            if any(lang in skill for lang in [
-                'python', 'java', 'c++', 'javascript', 'typescript', 'rust', 'go', 'kotlin', 'swift', 'r', 'matlab', 'ruby', 'php'
-            ]):
-                return 'programming'
-
-            # Web technologies
-            if any(web in skill for web in [
-                'react', 'vue', 'angular', 'html', 'css', 'node', 'express', 'django', 'flask', 'fastapi', 'web'
-            ]):
-                return 'web'
-
-            # Data & AI
-            if any(ai in skill for ai in [
-                'ml', 'machine learning', 'deep learning', 'neural', 'ai', 'nlp', 'data', 'analytics', 'pandas', 'numpy', 'tensorflow', 'pytorch'
-            ]):
-                return 'data_ai'
-
-            # Database
-            if any(db in skill for db in ['sql', 'mysql', 'postgres', 'mongodb', 'firebase', 'database', 'redis']):
-                return 'database'
-
-            # DevOps/Cloud
-            if any(devops in skill for devops in [
-                'docker', 'kubernetes', 'aws', 'azure', 'gcp', 'devops', 'ci', 'cd', 'git', 'github'
-            ]):
-                return 'devops'
-
-            # Mobile
-            if any(mobile in skill for mobile in ['android', 'ios', 'flutter', 'react native', 'mobile']):
-                return 'mobile'
-
-            return 'other'
-
         # Categorize all skills
         categories1 = [categorize_skill(s) for s in skills1]
         categories2 = [categorize_skill(s) for s in skills2]
@@ -114,15 +133,7 @@ def get_compatibility_score(member1_skills: Union[List, dict], member2_skills: U
         score = (exact_match_ratio * 50) + (category_overlap_ratio * 40) + (complementarity * 10)
         score = max(0, min(100, score))
 
-        # Generate explanation
-        if exact_matches > 0:
-            reason = f"{exact_matches} exact skill match{'es' if exact_matches != 1 else ''} • Good collaboration fit"
-        elif cat_matches > 0:
-            reason = f"Strong in {cat_matches} skill categor{'ies' if cat_matches != 1 else ''} • Complementary strengths"
-        else:
-            reason = f"Diverse skill sets • Can learn from each other"
-
-        return round(score, 1), reason
+        return round(score, 1), compatibility_reason(exact_matches, cat_matches)
 
     except Exception as e:
         print(f"Error in compatibility scoring: {e}")
@@ -169,3 +180,33 @@ if __name__ == "__main__":
 
     score3, reason3 = get_compatibility_score(bob, charlie)
     print(f"Bob vs Charlie: {score3}% - {reason3}\n")
+
+    # Micro-benchmark: compiled matcher (cold and memoized) vs. the plain substring scans
+    import timeit
+
+    def categorize_by_scan(skill: str) -> str:
+        skill = skill.lower()
+        for category, keywords in CATEGORY_KEYWORDS:
+            if any(keyword in skill for keyword in keywords):
+                return category
+        return 'other'
+
+    sample = [
+        "Python", "Machine Learning", "React Native", "PostgreSQL", "Kubernetes", "Embedded Systems",
+        "UI/UX Design", "Technical Writing", "Flutter", "Data Analysis", "CI/CD", "Figma",
+    ]
+    assert [categorize_skill(s) for s in sample] == [categorize_by_scan(s) for s in sample]
+
+    def cold():
+        for s in sample:
+            _categorize_lower.cache_clear()
+            categorize_skill(s)
+
+    rounds = 20000
+    for label, fn in [
+        ("substring scans", lambda: [categorize_by_scan(s) for s in sample]),
+        ("compiled regex, cold", cold),
+        ("compiled regex, memoized", lambda: [categorize_skill(s) for s in sample]),
+    ]:
+        seconds = timeit.timeit(fn, number=rounds)
+        print(f"{label:>26}: {seconds / (rounds * len(sample)) * 1e9:7.0f} ns/call")
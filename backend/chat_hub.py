@@ -0,0 +1,157 @@
+"""
+Pub/sub hub that pushes new chat messages to connected clients.
+
+`database.add_message` reports every stored message; the hub publishes it on
+the conversation's channel and each open WebSocket / SSE connection for that
+conversation receives it through its own bounded queue. A slow client never
+blocks the sender: when its queue is full the backlog is discarded and the
+client is told to resync (fetch /messages?after=<last msg_id>).
+
+The broker is pluggable. InMemoryBroker fans out within one process; with
+CHAT_BROKER_URL=redis://... a RedisBroker relays events between uvicorn workers.
+"""
+
+import asyncio
+import json
+import os
+import threading
+from collections import defaultdict
+
+from database import database
+
+QUEUE_SIZE = int(os.getenv("CHAT_QUEUE_SIZE", "100"))
+
+
+class InMemoryBroker:
+    """Delivers published events to subscribers in the same process."""
+
+    def __init__(self):
+        self._subscribers = defaultdict(set)
+        self._lock = threading.Lock()
+
+    def publish(self, channel: str, event: dict):
+        with self._lock:
+            callbacks = list(self._subscribers.get(channel, ()))
+        for callback in callbacks:
+            try:
+                callback(event)
+            except Exception as e:
+                print(f"Error delivering chat event: {e}")
+
+    def subscribe(self, channel: str, callback):
+        with self._lock:
+            self._subscribers[channel].add(callback)
+
+    def unsubscribe(self, channel: str, callback):
+        with self._lock:
+            subscribers = self._subscribers.get(channel)
+            if subscribers is not None:
+                subscribers.discard(callback)
+                if not subscribers:
+                    del self._subscribers[channel]
+
+
+class RedisBroker:
+    """Relays events through Redis pub/sub so every worker sees every message."""
+
+    def __init__(self, url: str, prefix: str = "collabquest:"):
+        import redis  # optional dependency, only needed for multi-worker deployments
+        self._redis = redis.Redis.from_url(url)
+        self._prefix = prefix
+        self._local = InMemoryBroker()
+        self._pubsub = self._redis.pubsub(ignore_subscribe_messages=True)
+        self._pubsub.psubscribe(**{f"{prefix}*": self._on_message})
+        self._thread = self._pubsub.run_in_thread(sleep_time=0.5, daemon=True)
+
+    def _on_message(self, message):
+        channel = message["channel"].decode()[len(self._prefix):]
+        self._local.publish(channel, json.loads(message["data"]))
+
+    def publish(self, channel: str, event: dict):
+        self._redis.publish(self._prefix + channel, json.dumps(event))
+
+    def subscribe(self, channel: str, callback):
+        self._local.subscribe(channel, callback)
+
+    def unsubscribe(self, channel: str, callback):
+        self._local.unsubscribe(channel, callback)
+
+
+class Connection:
+    """One client's bounded event queue, fed from any thread."""
+
+    def __init__(self, conv_id: str, loop: asyncio.AbstractEventLoop, size: int = QUEUE_SIZE):
+        self.conv_id = conv_id
+        self.loop = loop
+        # at least 2: a full queue is drained to the resync marker plus the new event
+        self.queue = asyncio.Queue(maxsize=max(2, size))
+        self.dropped = 0
+
+    def offer(self, event: dict):
+        try:
+            self.loop.call_soon_threadsafe(self._put, event)
+        except RuntimeError:
+            pass  # event loop already closed; the connection is going away
+
+    def _put(self, event: dict):
+        if self.queue.full():
+            # The client fell behind: discard the backlog and tell it to refetch
+            while not self.queue.empty():
+                self.queue.get_nowait()
+                self.dropped += 1
+            self.queue.put_nowait({"type": "resync", "conv_id": self.conv_id})
+        self.queue.put_nowait(event)
+
+
+class ChatHub:
+    def __init__(self, broker):
+        self.broker = broker
+        self._connections = set()
+        self.published = 0
+
+    @staticmethod
+    def _channel(conv_id: str) -> str:
+        return f"conversation:{conv_id}"
+
+    def publish(self, conv_id: str, event: dict):
+        self.published += 1
+        self.broker.publish(self._channel(conv_id), event)
+
+    def connect(self, conv_id: str) -> Connection:
+        conn = Connection(conv_id, asyncio.get_running_loop())
+        self.broker.subscribe(self._channel(conv_id), conn.offer)
+        self._connections.add(conn)
+        return conn
+
+    def disconnect(self, conn: Connection):
+        self.broker.unsubscribe(self._channel(conn.conv_id), conn.offer)
+        self._connections.discard(conn)
+
+    def stats(self) -> dict:
+        return {
+            "connections": len(self._connections),
+            "published": self.published,
+            "dropped": sum(c.dropped for c in self._connections),
+        }
+
+
+def _make_broker():
+    url = os.getenv("CHAT_BROKER_URL")
+    if url and url.startswith("redis"):
+        return RedisBroker(url)
+    return InMemoryBroker()
+
+
+hub = ChatHub(_make_broker())
+
+
+def _on_message_added(conv_id: str, message: dict):
+    hub.publish(conv_id, {
+        "type": "message",
+        "conv_id": conv_id,
+        "message": message,
+        "last_message_at": message.get("timestamp"),
+    })
+
+
+database.on_message_added(_on_message_added)
@@ -1,25 +1,318 @@
+"""
+Pull JSON values out of LLM responses.
+
+Model output wraps JSON in Markdown fences and prose, sometimes emits several
+blocks, and often gets the syntax slightly wrong. Slicing from the first `[`
+to the last `]` breaks on all of that, so this module scans the text with a
+small state machine instead: it tracks open brackets and string literals
+(either quote style, with escapes) and yields every balanced top-level value.
+Candidates that don't parse are repaired (trailing commas, single-quoted
+strings, Python literals, smart quotes) and, failing that, searched for a
+valid value nested inside. Results can be checked against a schema so a
+bracket in the surrounding prose is never mistaken for the answer.
+
+The scanner is incremental: feed() it chunks as a response streams in and it
+reports each element of a top-level array as soon as that element is closed,
+so quiz questions can be validated before generation finishes. If the stream
+is cut off mid-array, finish() returns the elements completed so far.
+"""
+
+import json
+
+_OPEN = {"{": "}", "[": "]"}
+_SMART_QUOTES = str.maketrans({"“": '"', "”": '"', "‘": "'", "’": "'"})
+_PY_LITERALS = {"True": "true", "False": "false", "None": "null"}
+
+# Minimal JSON-schema subset: type, required, properties, items, minItems.
+QUIZ_QUESTION_SCHEMA = {
+    "type": "object",
+    "required": ["question", "options", "correct_answer"],
+    "properties": {"question": {"type": "string"}, "options": {"type": "array", "minItems": 2}},
+}
+QUIZ_SCHEMA = {"type": "array", "items": QUIZ_QUESTION_SCHEMA, "minItems": 1}
+PROBLEM_SCHEMA = {
+    "type": "object",
+    "required": ["title", "description"],
+    "properties": {"title": {"type": "string"}, "description": {"type": "string"}, "tests": {"type": "array"}},
+}
+JUDGEMENT_SCHEMA = {"type": "object", "required": ["score"]}
+
+_TYPES = {
+    "object": dict, "array": list, "string": str, "boolean": bool,
+    "number": (int, float), "integer": int, "null": type(None),
+}
+
+
+def validate(value, schema) -> bool:
+    """True if value matches schema (see the subset above)."""
+    if not schema:
+        return True
+    expected = schema.get("type")
+    if expected and not isinstance(value, _TYPES[expected]):
+        return False
+    if expected in ("number", "integer") and isinstance(value, bool):
+        return False
+    if isinstance(value, dict):
+        if any(key not in value for key in schema.get("required", ())):
+            return False
+        for key, sub in schema.get("properties", {}).items():
+            if key in value and not validate(value[key], sub):
+                return False
+    if isinstance(value, list):
+        if len(value) < schema.get("minItems", 0):
+            return False
+        if "items" in schema and not all(validate(item, schema["items"]) for item in value):
+            return False
+    return True
+
+
+def repair(text: str) -> str:
+    """Fix common LLM JSON defects: single quotes, trailing commas, Python literals, smart quotes."""
+    text = text.translate(_SMART_QUOTES)
+    out = []
+    i, n = 0, len(text)
+    while i < n:
+        ch = text[i]
+        if ch in "\"'":
+            # copy a string literal, re-quoting single-quoted ones; \' is not a JSON escape in either
+            j = i + 1
+            body = []
+            while j < n and text[j] != ch:
+                if text[j] == "\\" and j + 1 < n:
+                    body.append(text[j:j + 2] if text[j + 1] != "'" else "'")
+                    j += 2
+                    continue
+                body.append('\\"' if text[j] == '"' else text[j])
+                j += 1
+            out.append('"' + "".join(body) + ('"' if j < n or ch == "'" else ""))
+            i = j + 1
+        elif ch == ",":
+            # drop a comma followed only by whitespace and a closing bracket
+            j = i + 1
+            while j < n and text[j].isspace():
+                j += 1
+            if j < n and text[j] in "]}":
+                i += 1
+                continue
+            out.append(ch)
+            i += 1
+        elif ch.isalpha():
+            j = i
+            while j < n and (text[j].isalnum() or text[j] == "_"):
+                j += 1
+            word = text[i:j]
+            out.append(_PY_LITERALS.get(word, word))
+            i = j
+        else:
+            out.append(ch)
+            i += 1
+    return "".join(out)
+
+
+def _parse(text: str):
+    """(True, value) if text is JSON or repairable into JSON, else (False, None)."""
+    for candidate in (text, None):
+        try:
+            return True, json.loads(candidate if candidate is not None else repair(text))
+        except ValueError:
+            continue
+    return False, None
+
+
+class JSONStreamExtractor:
+    """
+    Incremental scanner. feed(chunk) returns a list of events:
+        ("item", value)   an element of a top-level array just closed
+        ("value", value)  a whole top-level value just closed
+    """
+
+    def __init__(self):
+        self._buf = []        # text of the value being scanned
+        self._stack = []      # expected closing brackets
+        self._quote = None    # quote char while inside a string
+        self._escape = False
+        self._item_start = None
+        self._items = []      # parsed elements of the current top-level array
+        self.values = []
+
+    def _emit_item(self, end: int, events: list):
+        text = "".join(self._buf[self._item_start:end]).strip()
+        self._item_start = None
+        if text:
+            ok, value = _parse(text)
+            if ok:
+                self._items.append(value)
+                events.append(("item", value))
+
+    def feed(self, chunk: str) -> list:
+        events = []
+        for ch in chunk:
+            if not self._stack:
+                if ch in _OPEN:
+                    self._buf = [ch]
+                    self._stack = [_OPEN[ch]]
+                    self._items = []
+                    self._item_start = 1 if ch == "[" else None
+                continue
+            self._buf.append(ch)
+            if self._quote:
+                if self._escape:
+                    self._escape = False
+                elif ch == "\\":
+                    self._escape = True
+                elif ch == self._quote:
+                    self._quote = None
+                continue
+            if ch in "\"'":
+                self._quote = ch
+            elif ch in _OPEN:
+                self._stack.append(_OPEN[ch])
+            elif ch in "]}":
+                if ch != self._stack[-1]:
+                    continue  # stray closer; let the final parse/repair decide
+                self._stack.pop()
+                in_top_array = self._buf[0] == "["
+                if in_top_array and len(self._stack) == 0 and self._item_start is not None:
+                    self._emit_item(len(self._buf) - 1, events)
+                if not self._stack:
+                    self._close(events)
+            elif ch == "," and len(self._stack) == 1 and self._buf[0] == "[":
+                if self._item_start is not None:
+                    self._emit_item(len(self._buf) - 1, events)
+                self._item_start = len(self._buf)
+        return events
+
+    def _close(self, events: list):
+        text = "".join(self._buf)
+        self._buf = []
+        ok, value = _parse(text)
+        if ok:
+            self.values.append(value)
+            events.append(("value", value))
+            return
+        # Not valid even after repair (e.g. prose like "[see {...}]"): look for values inside it
+        inner = JSONStreamExtractor()
+        for kind, inner_value in inner.feed(text[1:]):
+            if kind == "value":
+                self.values.append(inner_value)
+                events.append(("value", inner_value))
+
+    def finish(self) -> list:
+        """End of stream. Salvages a cut-off top-level array from its completed elements."""
+        events = []
+        if self._stack:
+            text = "".join(self._buf)
+            self._buf, self._stack, self._quote = [], [], None
+            if text.startswith("[") and self._items:
+                self.values.append(list(self._items))
+                events.append(("value", list(self._items)))
+            else:
+                # an unbalanced bracket in prose may have swallowed the real value
+                inner = JSONStreamExtractor()
+                inner.feed(text[1:])
+                inner.finish()
+                for value in inner.values:
+                    self.values.append(value)
+                    events.append(("value", value))
+        return events
+
+
+def extract_all(text: str) -> list:
+    """Every top-level JSON value in text, in order."""
+    extractor = JSONStreamExtractor()
+    extractor.feed(text)
+    extractor.finish()
+    return extractor.values
+
+
+def _unwrap(value, schema):
+    # {"questions": [...]} when an array was asked for
+    if schema and schema.get("type") == "array" and isinstance(value, dict):
+        lists = [v for v in value.values() if isinstance(v, list)]
+        if len(lists) == 1:
+            return lists[0]
+    return value
+
+
+def extract_json(text: str, schema: dict = None):
+    """The first JSON value in text that matches schema. Raises ValueError if there is none."""
+    for value in extract_all(text):
+        value = _unwrap(value, schema)
+        if validate(value, schema):
+            return value
+    raise ValueError("No valid JSON found in model output")
 
 
 def clean_ai_json(text):
     """
     Cleans the AI response to ensure it is valid JSON.
-    Removes Markdown formatting and finds the JSON object/array.
+    Returns the first JSON object/array found, re-serialized; the stripped text if none is found.
     """
-    
-    text = text.replace("```json", "").replace("```", "")
-    
-    
-    start_array = text.find('[')
-    start_object = text.find('{')
-    
-    if start_array != -1 and (start_object == -1 or start_array < start_object):
-        start = start_array
-        end = text.rfind(']') + 1
-    else:
-        start = start_object
-        end = text.rfind('}') + 1
-    
-    if start != -1 and end != 0:
-        text = text[start:end]
-        
-    return text
\ No newline at end of file
+    values = extract_all(text)
+    if values:
+        return json.dumps(values[0])
+    return text.replace("```json", "").replace("```", "").strip()
+
+
+if __name__ == "__main__":
+    # Corpus check and benchmark: python cleanjson.py [llm_corpus.jsonl]
+    import os
+    import sys
+    import time
+
+    path = sys.argv[1] if len(sys.argv) > 1 else os.path.join(os.path.dirname(os.path.abspath(__file__)), "llm_corpus.jsonl")
+    schemas = {"quiz": QUIZ_SCHEMA, "problem": PROBLEM_SCHEMA, "judgement": JUDGEMENT_SCHEMA, None: None}
+    with open(path, encoding="utf-8") as f:
+        corpus = [json.loads(line) for line in f if line.strip()]
+
+    def old_slice(text):
+        # the previous find/rfind extraction, for comparison
+        text = text.replace("```json", "").replace("```", "")
+        start_array, start_object = text.find("["), text.find("{")
+        if start_array != -1 and (start_object == -1 or start_array < start_object):
+            start, end = start_array, text.rfind("]") + 1
+        else:
+            start, end = start_object, text.rfind("}") + 1
+        return json.loads(text[start:end] if start != -1 and end != 0 else text)
+
+    old_ok = new_ok = 0
+    for case in corpus:
+        schema = schemas[case.get("schema")]
+        try:
+            got = extract_json(case["text"], schema)
+        except ValueError:
+            got = ValueError
+        if "expect" in case:
+            passed = got == case["expect"]
+        else:
+            passed = got is ValueError  # cases with no recoverable answer
+        new_ok += passed
+        try:
+            old_ok += "expect" in case and old_slice(case["text"]) == case["expect"]
+        except ValueError:
+            old_ok += "expect" not in case
+        if not passed:
+            print(f"FAIL {case['name']}: {got!r}"[:200])
+    print(f"corpus: {new_ok}/{len(corpus)} correct (find/rfind slice: {old_ok}/{len(corpus)})")
+
+    # Streaming: items are reported before the array closes
+    text = next(c["text"] for c in corpus if c.get("schema") == "quiz")
+    extractor = JSONStreamExtractor()
+    first_item_at = None
+    for i in range(0, len(text), 16):
+        if any(kind == "item" for kind, _ in extractor.feed(text[i:i + 16])) and first_item_at is None:
+            first_item_at = i + 16
+    extractor.finish()
+    print(f"streaming: first item after {first_item_at} of {len(text)} chars")
+
+    rounds = 200
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for case in corpus:
+            try:
+                extract_json(case["text"], schemas[case.get("schema")])
+            except ValueError:
+                pass
+    elapsed = time.perf_counter() - start
+    chars = sum(len(c["text"]) for c in corpus) * rounds
+    print(f"benchmark: {elapsed / (rounds * len(corpus)) * 1e6:.1f} us/response, {chars / elapsed / 1e6:.1f} M chars/s")
@@ -0,0 +1,238 @@
+"""
+Async data access for the hot read paths.
+
+`firebase_admin.db` is blocking, so every sync route holds one of Starlette's
+threadpool workers for the whole Firebase round-trip. This module talks to the
+Realtime Database REST API directly with a pooled HTTP/2 client instead:
+concurrency is bounded by a semaphore, every call has a timeout, and transient
+failures (transport errors, 429, 5xx) are retried with jittered exponential
+backoff. Reads share the caches in database.py, so both layers see each
+other's writes.
+
+Point RTDB_URL at database/fake_rtdb.py (with RTDB_AUTH=none) to run or
+load-test everything offline.
+"""
+
+import asyncio
+import json
+import os
+import random
+import time
+from urllib.parse import quote
+
+import httpx
+
+from database import database
+from database.keys import decode_user
+from database.singleflight import AsyncSingleFlight
+
+RTDB_URL = os.getenv("RTDB_URL", "https://collabquest-587d6-default-rtdb.firebaseio.com")
+RTDB_AUTH = os.getenv("RTDB_AUTH", "service_account")  # or "none" for the fake server / emulator
+MAX_CONCURRENCY = int(os.getenv("RTDB_MAX_CONCURRENCY", "64"))
+TIMEOUT_SECONDS = float(os.getenv("RTDB_TIMEOUT_SECONDS", "5"))
+MAX_RETRIES = int(os.getenv("RTDB_MAX_RETRIES", "3"))
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+class RTDBError(Exception):
+    def __init__(self, status_code: int, message: str):
+        super().__init__(f"RTDB request failed ({status_code}): {message}")
+        self.status_code = status_code
+
+
+class AsyncRTDB:
+    def __init__(self, base_url: str = RTDB_URL, credential=None, max_concurrency: int = MAX_CONCURRENCY,
+                 timeout: float = TIMEOUT_SECONDS, retries: int = MAX_RETRIES, transport=None):
+        self.base_url = base_url.rstrip("/")
+        self.transport = transport  # e.g. httpx.ASGITransport(app=fake_rtdb.app) in tests
+        self.credential = credential
+        self.timeout = timeout
+        self.retries = retries
+        self.max_concurrency = max_concurrency
+        self._client = None
+        self._semaphore = None
+        self._token = None
+        self._token_expiry = 0.0
+        self.requests = 0
+        self.retried = 0
+
+    def _ensure_client(self):
+        # Created lazily so they bind to the running event loop
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                http2=True,
+                timeout=self.timeout,
+                transport=self.transport,
+                limits=httpx.Limits(max_connections=self.max_concurrency, max_keepalive_connections=self.max_concurrency),
+            )
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+
+    async def _auth_headers(self) -> dict:
+        if self.credential is None:
+            return {}
+        if self._token is None or time.time() > self._token_expiry - 60:
+            info = await asyncio.to_thread(self.credential.get_access_token)
+            self._token = info.access_token
+            self._token_expiry = info.expiry.timestamp() if info.expiry else time.time() + 3000
+        return {"Authorization": f"Bearer {self._token}"}
+
+    async def request(self, method: str, path: str, params: dict = None, json=None):
+        """One REST call against /{path}.json, with retries. Returns the decoded JSON body."""
+        self._ensure_client()
+        # Keys are literal: the server percent-decodes the path, so an escaped key such as
+        # usernames/john%2Edoe must go out as john%252Edoe
+        url = f"{self.base_url}/{'/'.join(quote(part, safe='') for part in path.strip('/').split('/') if part)}.json"
+        attempt = 0
+        while True:
+            attempt += 1
+            try:
+                async with self._semaphore:
+                    self.requests += 1
+                    response = await self._client.request(
+                        method, url, params=params, json=json, headers=await self._auth_headers()
+                    )
+                if response.status_code not in RETRY_STATUSES:
+                    if response.status_code >= 400:
+                        raise RTDBError(response.status_code, response.text)
+                    return response.json() if response.content else None
+                error = RTDBError(response.status_code, response.text)
+            except httpx.TransportError as e:
+                error = e
+            if attempt > self.retries:
+                raise error
+            self.retried += 1
+            # Full jitter: sleep somewhere in [0, 0.1 * 2^attempt] seconds
+            await asyncio.sleep(random.uniform(0, 0.1 * (2 ** attempt)))
+
+    async def get(self, path: str, params: dict = None):
+        return await self.request("GET", path, params=params)
+
+    async def put(self, path: str, value):
+        return await self.request("PUT", path, params={"print": "silent"}, json=value)
+
+    async def patch(self, path: str, value: dict):
+        return await self.request("PATCH", path, params={"print": "silent"}, json=value)
+
+    async def delete(self, path: str):
+        return await self.request("DELETE", path)
+
+    async def aclose(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    def stats(self) -> dict:
+        return {"requests": self.requests, "retried": self.retried}
+
+
+rtdb = AsyncRTDB(credential=database.cred if RTDB_AUTH == "service_account" else None)
+reads = AsyncSingleFlight()
+
+
+async def _read(path: str, params: dict = None):
+    """GET coalesced with identical in-flight reads on this event loop."""
+    key = path if not params else f"{path}?{sorted(params.items())}"
+    return await reads.do(key, lambda: rtdb.get(path, params))
+
+
+async def get_user(user_id: str):
+    """Async database.get_user."""
+    if database.users_mirror.ready:
+        return database.users_mirror.get(user_id)
+    user = database.user_cache.get(user_id)
+    if user is not None:
+        return user
+    user = decode_user(await _read(f"users/{user_id}"))
+    if user is not None:
+        database.user_cache.set(user_id, user)
+    return user
+
+
+async def get_user_by_username(username: str):
+    """Async database.get_user_by_username."""
+    if database.users_mirror.ready:
+        return database.users_mirror.get_by_username(username)
+    user_id = database.username_cache.get(username)
+    if user_id is None:
+        user_id = await _read(f"usernames/{database._username_key(username)}") or database._MISSING
+        database.username_cache.set(username, user_id)
+    if not user_id:
+        return None
+    user_data = await get_user(user_id)
+    if not user_data or user_data.get("username") != username:
+        return None
+    return {**user_data, "user_id": user_id}
+
+
+async def get_user_by_identifier(identifier: str):
+    """Resolve a username or user_id, as the compatibility endpoints accept either."""
+    return await get_user_by_username(identifier) or await get_user(identifier)
+
+
+def _query(order_by: str, **bounds) -> dict:
+    # REST query parameters are JSON-encoded: orderBy="$key", startAt="-Nx..."
+    params = {"orderBy": json.dumps(order_by)}
+    for name, value in bounds.items():
+        if value is not None:
+            params[name] = value if isinstance(value, int) else json.dumps(value)
+    return params
+
+
+async def get_user_conversations(user_id: str, limit: int = None):
+    """Async database.get_user_conversations."""
+    convs = await _read(f"user_conversations/{user_id}", _query("last_message_at", limitToLast=limit)) or {}
+    user_convs = [{"conv_id": conv_id, **conv_data} for conv_id, conv_data in convs.items()]
+    user_convs.sort(key=lambda c: c.get("last_message_at", ""), reverse=True)
+    return user_convs
+
+
+async def get_messages(conv_id: str, after: str = None, before: str = None, limit: int = None):
+    """Async database.get_messages."""
+    if after:
+        params = _query("$key", startAt=after, limitToFirst=limit + 1 if limit else None)
+    elif before:
+        params = _query("$key", endAt=before, limitToLast=limit + 1 if limit else None)
+    else:
+        params = _query("$key", limitToLast=limit)
+    msgs = await _read(f"messages/{conv_id}", params) or {}
+    # REST results are unordered JSON objects; push keys sort chronologically
+    result = [{"msg_id": msg_id, **msgs[msg_id]} for msg_id in sorted(msgs) if msg_id not in (after, before)]
+    if limit:
+        result = result[:limit] if after else result[-limit:]
+    return result
+
+
+if __name__ == "__main__":
+    # Load test: python -m database.async_database [requests] [concurrency]
+    # e.g. against `python -m database.fake_rtdb` with RTDB_URL=http://127.0.0.1:9000 RTDB_AUTH=none
+    import sys
+
+    total = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    concurrency = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+
+    async def main():
+        database.user_cache.max_entries = 0  # measure the network path, not the cache
+        user_ids = list((await rtdb.get("users", params={"shallow": "true"})) or {})
+        if not user_ids:
+            print("no users to read")
+            return
+        sem = asyncio.Semaphore(concurrency)
+        latencies = []
+
+        async def one():
+            async with sem:
+                start = time.perf_counter()
+                await get_user(random.choice(user_ids))
+                latencies.append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        await asyncio.gather(*(one() for _ in range(total)))
+        elapsed = time.perf_counter() - start
+        latencies.sort()
+        print(f"{total} reads in {elapsed:.2f}s: {total / elapsed:.0f} req/s, "
+              f"p50 {latencies[len(latencies) // 2] * 1000:.1f} ms, p99 {latencies[int(len(latencies) * 0.99)] * 1000:.1f} ms, "
+              f"{rtdb.stats()}")
+        await rtdb.aclose()
+
+    asyncio.run(main())
@@ -0,0 +1,106 @@
+"""
+Small in-process LRU + TTL cache used in front of Firebase reads.
+
+Entries expire after `ttl` seconds and the least recently used ones are evicted
+once either `max_entries` or the approximate `max_bytes` budget is exceeded.
+Values are deep-copied on the way in and out so callers can never mutate what
+is stored.
+"""
+
+import copy
+import json
+import threading
+import time
+from collections import OrderedDict
+
+
+class TTLCache:
+    def __init__(self, ttl: float = 60.0, max_entries: int = 10000, max_bytes: int = 32 * 1024 * 1024):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._data = OrderedDict()  # key -> (expires_at, size, value)
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    @staticmethod
+    def _sizeof(value) -> int:
+        try:
+            return len(json.dumps(value, default=str))
+        except (TypeError, ValueError):
+            return 1024
+
+    def get(self, key, default=None):
+        """Return the cached value for key, or default on a miss or expired entry."""
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self.misses += 1
+                return default
+            expires_at, size, value = entry
+            if expires_at < time.monotonic():
+                del self._data[key]
+                self._bytes -= size
+                self.expirations += 1
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+        return copy.deepcopy(value)
+
+    def _store(self, key, value):
+        # caller holds the lock
+        size = self._sizeof(value)
+        old = self._data.pop(key, None)
+        if old is not None:
+            self._bytes -= old[1]
+        if size > self.max_bytes:
+            return
+        self._data[key] = (time.monotonic() + self.ttl, size, value)
+        self._bytes += size
+        while len(self._data) > self.max_entries or self._bytes > self.max_bytes:
+            _, (_, evicted_size, _) = self._data.popitem(last=False)
+            self._bytes -= evicted_size
+            self.evictions += 1
+
+    def set(self, key, value):
+        value = copy.deepcopy(value)
+        with self._lock:
+            self._store(key, value)
+
+    def update(self, key, fields: dict):
+        """Shallow-merge fields into a cached dict value (write-through). No-op if absent."""
+        fields = copy.deepcopy(fields)
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None or not isinstance(entry[2], dict):
+                return
+            merged = {**entry[2], **fields}
+            # Firebase drops keys written as None or as empty containers
+            self._store(key, {k: v for k, v in merged.items() if v not in (None, {}, [])})
+
+    def delete(self, key):
+        with self._lock:
+            old = self._data.pop(key, None)
+            if old is not None:
+                self._bytes -= old[1]
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self._bytes = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "entries": len(self._data),
+                "bytes": self._bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+            }
@@ -1,6 +1,14 @@
 import firebase_admin
 from firebase_admin import credentials, db
 from datetime import datetime
+import os
+import random
+import threading
+import time
+from database.cache import TTLCache
+from database.keys import decode_user, escape_key
+from database.singleflight import SingleFlight
+from database.users_mirror import UsersMirror
 
 cred = credentials.Certificate("D:\\CollabQuest-main\\backend\\database\\collabquest-587d6-firebase-adminsdk-fbsvc-57fcaf722b.json")
 
@@ -9,9 +17,91 @@ firebase_admin.initialize_app(cred, {
 })
 
 users_ref = db.reference("users")
+# Secondary index: usernames/{username} -> user_id, kept in step with users/
+usernames_ref = db.reference("usernames")
+root_ref = db.reference()
+
+# In-process caches in front of users/ and usernames/. Our own writes go through
+# (or invalidate) these, so only out-of-band edits can be up to `ttl` seconds stale.
+user_cache = TTLCache(
+    ttl=float(os.getenv("USER_CACHE_TTL", "60")),
+    max_entries=int(os.getenv("USER_CACHE_MAX_ENTRIES", "10000")),
+    max_bytes=int(os.getenv("USER_CACHE_MAX_BYTES", str(32 * 1024 * 1024))),
+)
+username_cache = TTLCache(
+    ttl=float(os.getenv("USER_CACHE_TTL", "60")),
+    max_entries=int(os.getenv("USER_CACHE_MAX_ENTRIES", "10000")),
+    max_bytes=int(os.getenv("USER_CACHE_MAX_BYTES", str(32 * 1024 * 1024))) // 8,
+)
+_MISSING = ""  # cached marker for "no such username"
+
+# Concurrent reads of the same path share one Firebase round-trip, so a burst of
+# requests after a deploy or cache flush fetches each record once.
+reads = SingleFlight()
+
+def _read(ref, query=None, key: str = None):
+    """ref.get() (or query.get()), coalesced with identical in-flight reads.
+
+    Queries must pass a `key` that identifies their parameters.
+    """
+    target = query if query is not None else ref
+    return reads.do(key or ref.path, target.get)
+
+# Local copy of users/ fed by the RTDB change stream (see users_mirror.py). Once
+# its first snapshot has arrived, user reads are served from it instead of Firebase.
+users_mirror = UsersMirror(
+    users_ref.listen,
+    lambda: list((users_ref.get(shallow=True) or {}).keys()),
+    verify_seconds=float(os.getenv("USERS_MIRROR_VERIFY_SECONDS", "300")),
+)
+
+def start_users_mirror():
+    """Subscribe the users mirror to the change feed unless USERS_MIRROR=0."""
+    if os.getenv("USERS_MIRROR", "1") != "0":
+        users_mirror.start()
+
+# Callbacks run with the user_id after every write through this module, so
+# in-process derived state (e.g. the skill matrix) can refresh incrementally.
+_user_write_listeners = []
+
+def on_user_write(listener):
+    """Register listener(user_id) to be called after a user record changes."""
+    _user_write_listeners.append(listener)
+
+def _notify_user_write(user_id):
+    for listener in _user_write_listeners:
+        try:
+            listener(user_id)
+        except Exception as e:
+            print(f"Error in user write listener: {e}")
+
+def _username_key(username: str) -> str:
+    """Encode a username so it is a legal Firebase key (no . $ # [ ] /)."""
+    return escape_key(username)
+
+
+class UsernameTaken(Exception):
+    """The username already belongs to another user."""
+
+
+def _claim_username(username: str, user_id: str):
+    """Point usernames/{username} at user_id in a transaction; raises UsernameTaken if someone else holds it."""
+    def claim(current):
+        if current and current != user_id:
+            raise UsernameTaken(username)
+        return user_id
+    usernames_ref.child(_username_key(username)).transaction(claim)
+
+
+def _release_username(username: str, user_id: str):
+    """Remove usernames/{username} if it still points at user_id."""
+    usernames_ref.child(_username_key(username)).transaction(
+        lambda current: None if current == user_id else current)
+
+
 def add_user(user_id: str, college:str, linkdin_url: str, name: str, password: str,department: str, year: int,  username: str, email: str, skills: list = None, verified: bool = False, teams: list = None):
-    """Add a new user to the database."""
-    users_ref.child(user_id).set({
+    """Add a new user to the database. Raises UsernameTaken if another user has the username."""
+    record = {
         "username": username,
         "name": name,
         "college": college,
@@ -24,19 +114,111 @@ def add_user(user_id: str, college:str, linkdin_url: str, name: str, password: s
         "verified_skills": {},
         "teams": teams or [],
         "linkdin_url": linkdin_url
-    }) 
+    }
+    # The index entry is claimed first, in a transaction, so two signups can't share a name
+    _claim_username(username, user_id)
+    try:
+        users_ref.child(user_id).set(record)
+    except Exception:
+        _release_username(username, user_id)
+        raise
+    # Firebase drops empty containers, so cache what a read would return
+    user_cache.set(user_id, {k: v for k, v in record.items() if v not in (None, {}, [])})
+    username_cache.set(username, user_id)
+    users_mirror.put(user_id, record)
+    _notify_user_write(user_id)
 
 def get_user(user_id: int):
     """Retrieve a user from the database."""
-    return users_ref.child(user_id).get()
+    if users_mirror.ready:
+        return users_mirror.get(user_id)
+    user = user_cache.get(user_id)
+    if user is not None:
+        return user
+    user = decode_user(_read(users_ref.child(user_id)))
+    if user is not None:
+        user_cache.set(user_id, user)
+    return user
 
 def update_user(user_id: int, data: dict):
-    """Update user information in the database."""
-    users_ref.child(user_id).update(data)
+    """Update user information in the database. Raises UsernameTaken if a new username belongs to someone else."""
+    if "username" not in data:
+        users_ref.child(user_id).update(data)
+        user_cache.update(user_id, data)
+        users_mirror.patch(user_id, data)
+        _notify_user_write(user_id)
+        return
+    # Username changes claim the new index entry (a transaction that fails if another
+    # user holds it), then write the record, then release the old entry
+    existing = get_user(user_id) or {}
+    old_username = existing.get("username")
+    _claim_username(data["username"], user_id)
+    try:
+        users_ref.child(user_id).update(data)
+    except Exception:
+        if old_username != data["username"]:
+            _release_username(data["username"], user_id)
+        raise
+    if old_username and old_username != data["username"]:
+        _release_username(old_username, user_id)
+    user_cache.update(user_id, data)
+    users_mirror.patch(user_id, data)
+    if old_username:
+        username_cache.delete(old_username)
+    username_cache.set(data["username"], user_id)
+    _notify_user_write(user_id)
 
 def delete_user(user_id: int):
     """Delete a user from the database."""
+    existing = get_user(user_id) or {}
     users_ref.child(user_id).delete()
+    if existing.get("username"):
+        _release_username(existing["username"], user_id)
+    user_cache.delete(user_id)
+    users_mirror.put(user_id, None)
+    if existing.get("username"):
+        username_cache.delete(existing["username"])
+    _notify_user_write(user_id)
+
+def list_users_page(cursor: str = None, limit: int = 50, match=None, max_scanned: int = 1000,
+                    department: str = None, skill: str = None):
+    """
+    One page of users in key order, starting after `cursor`.
+
+    `match(user_id, data)` filters records server-side; pages are read in
+    bounded chunks until `limit` matches are found or `max_scanned` records
+    have been looked at. Returns ([(user_id, data), ...], next_cursor), where
+    next_cursor is None once the end of users/ is reached.
+
+    When the users mirror is ready the page is served from memory, and
+    `department`/`skill` narrow it through the mirror's indexes first
+    (`match` must still check them).
+    """
+    if users_mirror.ready:
+        return users_mirror.page(cursor, limit, match, users_mirror.candidates(department, skill))
+    results = []
+    scanned = 0
+    chunk = limit + 1 if match is None else max(limit * 2, 50)
+    while scanned < max_scanned:
+        query = users_ref.order_by_key()
+        if cursor is not None:
+            query = query.start_at(cursor)
+        # one extra record tells us whether there is more; start_at is inclusive of the cursor
+        fetch = chunk + 1 + (cursor is not None)
+        batch = list((query.limit_to_first(fetch).get() or {}).items())
+        if cursor is not None and batch and batch[0][0] == cursor:
+            batch = batch[1:]
+        for user_id, data in batch[:chunk]:
+            scanned += 1
+            cursor = user_id
+            data = decode_user(data or {})
+            if match is None or match(user_id, data):
+                results.append((user_id, data))
+                if len(results) == limit:
+                    return results, (cursor if user_id != batch[-1][0] else None)
+        if len(batch) <= chunk:
+            return results, None
+    return results, cursor
 
 teams_ref = db.reference("teams")
 def add_team(team_id: int, name: str, members: list = None, projects: list = None):
@@ -62,53 +244,149 @@ def delete_team(team_id: int):
 
 def get_user_by_username(username: str):
     """Retrieve a user from the database by username."""
-    all_users = users_ref.get()
+    if users_mirror.ready:
+        return users_mirror.get_by_username(username)
+    user_id = username_cache.get(username)
+    if user_id is None:
+        user_id = _read(usernames_ref.child(_username_key(username))) or _MISSING
+        username_cache.set(username, user_id)
+    if not user_id:
+        return None
+    user_data = get_user(user_id)
+    # Guard against an index entry left behind by an out-of-band edit
+    if not user_data or user_data.get("username") != username:
+        return None
+    return {**user_data, "user_id": user_id}
+
+
+def get_all_users():
+    """The whole users tree as {user_id: data}; callers must not mutate the records.
+
+    Free once the users mirror is ready, otherwise a full download callers should cache.
+    """
+    if users_mirror.ready:
+        return users_mirror.snapshot()
+    return {user_id: decode_user(data) for user_id, data in (_read(users_ref) or {}).items()}
+
+
+def rebuild_username_index():
+    """Rebuild usernames/ from the users tree. Returns the number of entries written."""
+    all_users = get_all_users()
+    index = {}
     for user_id, user_data in all_users.items():
-        if user_data.get("username") == username:
-            return {**user_data, "user_id": user_id}
-    return None
+        username = (user_data or {}).get("username")
+        if not username:
+            continue
+        key = _username_key(username)
+        if key in index:
+            print(f"rebuild_username_index: duplicate username {username!r} ({index[key]}, {user_id})")
+            continue
+        index[key] = user_id
+    usernames_ref.set(index)
+    username_cache.clear()
+    return len(index)
 
 
-def verify_skill(user_id: str, skill_name: str, verifier_id: str = None):
-    """Mark a user's skill as verified. Optionally record verifier id."""
+def cache_stats():
+    """Hit/miss/eviction counters for the user caches."""
+    return {
+        "users": user_cache.stats(),
+        "usernames": username_cache.stats(),
+        "reads": reads.stats(),
+        "users_mirror": users_mirror.stats(),
+    }
+
+
+def _skill_key(skill_name: str) -> str:
+    """verified_skills/ key for a skill name, escaped like usernames; readers see the name (keys.decode_user)."""
+    return escape_key(str(skill_name).strip())
+
+
+def _verification(verifier_id: str = None, score: float = None) -> dict:
+    record = {"verified_at": datetime.now().isoformat()}
+    if verifier_id:
+        record["verifier_id"] = verifier_id
+    if score is not None:
+        record["score"] = score
+    return record
+
+
+def _write_verifications(changes: dict):
+    """One multi-location update of {(user_id, skill_name): record or None}, then refresh local state."""
+    root_ref.update({
+        f"users/{user_id}/verified_skills/{_skill_key(skill)}": record
+        for (user_id, skill), record in changes.items()
+    })
+    for user_id in dict.fromkeys(user_id for user_id, _ in changes):
+        # the cache merges top-level fields only; the next read refetches the record
+        user_cache.delete(user_id)
+        users_mirror.patch(user_id, {
+            f"verified_skills/{_skill_key(skill)}": record
+            for (uid, skill), record in changes.items() if uid == user_id
+        })
+        _notify_user_write(user_id)
+
+
+def verify_skill(user_id: str, skill_name: str, verifier_id: str = None, score: float = None):
+    """
+    Mark a user's skill as verified, recording who verified it (a user id, or
+    "quiz") and the quiz score if any. A single-path write, so concurrent
+    verifications of other skills are never overwritten. Returns the stored
+    verification record, or None on failure.
+    """
     try:
-        user = users_ref.child(user_id).get() or {}
-        verified = user.get('verified_skills') or {}
-        verified[skill_name] = True
-        # optionally store who verified it under a separate map
-        users_ref.child(user_id).update({"verified_skills": verified})
-        return True
+        record = _verification(verifier_id, score)
+        _write_verifications({(user_id, skill_name): record})
+        return record
     except Exception as e:
+        user_cache.delete(user_id)
         print(f"Error verifying skill: {e}")
-        return False
+        return None
 
 
 def unverify_skill(user_id: str, skill_name: str):
     """Remove verification for a user's skill."""
     try:
-        user = users_ref.child(user_id).get() or {}
-        verified = user.get('verified_skills') or {}
-        if skill_name in verified:
-            verified.pop(skill_name, None)
-            users_ref.child(user_id).update({"verified_skills": verified})
+        _write_verifications({(user_id, skill_name): None})
         return True
     except Exception as e:
+        user_cache.delete(user_id)
         print(f"Error unverifying skill: {e}")
         return False
 
+
+def set_verifications(items: list, verifier_id: str = None) -> int:
+    """
+    Verify or unverify many (user_id, skill_name, verified, score) items in one
+    multi-location update; the last item wins for a repeated user and skill.
+    Returns the number of paths written. Raises on failure (nothing is written).
+    """
+    changes = {}
+    for user_id, skill_name, verified, score in items:
+        changes[(user_id, skill_name)] = _verification(verifier_id, score) if verified else None
+    if changes:
+        _write_verifications(changes)
+    return len(changes)
+
 def authorize_user(username: str, password: str) -> bool:
     user_data = get_user_by_username(username)
-    if not user_data:
-        return False
-
-    user = get_user(user_data["user_id"])
-    if user and user.get("password") == password:
+    if user_data and user_data.get("password") == password:
         return True
     return False
 
 # Conversations and Messages
 conversations_ref = db.reference("conversations")
 messages_ref = db.reference("messages")
+# Fan-out index: user_conversations/{user_id}/{conv_id} -> conversation summary,
+# ordered by last_message_at (needs ".indexOn" from database.rules.json)
+user_conversations_ref = db.reference("user_conversations")
+_participants = {}  # conv_id -> (user1, user2); participants never change
+# listener(conv_id, message) after every stored message, e.g. to push it to clients
+_message_listeners = []
+
+def on_message_added(listener):
+    """Register listener(conv_id, message) to be called after add_message stores a message."""
+    _message_listeners.append(listener)
 
 def create_conversation(user1_id: str, user2_id: str):
     """Create or get a conversation between two users."""
@@ -118,12 +396,18 @@ def create_conversation(user1_id: str, user2_id: str):
         
         if not existing or (hasattr(existing, 'val') and not existing.val()):
             now = datetime.now().isoformat()
-            conversations_ref.child(conv_id).set({
+            conv = {
                 "user1": user1_id,
                 "user2": user2_id,
                 "created_at": now,
                 "last_message_at": now
+            }
+            root_ref.update({
+                f"conversations/{conv_id}": conv,
+                f"user_conversations/{user1_id}/{conv_id}": conv,
+                f"user_conversations/{user2_id}/{conv_id}": conv
             })
+        _participants[conv_id] = (user1_id, user2_id)
         return conv_id
     except Exception as e:
         print(f"Error creating conversation: {e}")
@@ -132,7 +416,7 @@ def create_conversation(user1_id: str, user2_id: str):
 def get_conversation(conv_id: str):
     """Get conversation details."""
     try:
-        data = conversations_ref.child(conv_id).get()
+        data = _read(conversations_ref.child(conv_id))
         if data and hasattr(data, 'val'):
             return data.val() or {}
         return data if isinstance(data, dict) else {}
@@ -140,35 +424,123 @@ def get_conversation(conv_id: str):
         print(f"Error getting conversation: {e}")
         return {}
 
-def get_user_conversations(user_id: str):
-    """Get all conversations for a user."""
-    all_convs = conversations_ref.get() or {}
-    user_convs = []
-    for conv_id, conv_data in all_convs.items():
-        if user_id == conv_data.get("user1") or user_id == conv_data.get("user2"):
-            user_convs.append({"conv_id": conv_id, **conv_data})
+def get_user_conversations(user_id: str, limit: int = None):
+    """Get a user's conversations, most recent first (at most `limit`)."""
+    query = user_conversations_ref.child(user_id).order_by_child("last_message_at")
+    if limit:
+        query = query.limit_to_last(limit)
+    convs = _read(user_conversations_ref, query, f"user_conversations/{user_id}?limit={limit}") or {}
+    user_convs = [{"conv_id": conv_id, **conv_data} for conv_id, conv_data in convs.items()]
+    user_convs.sort(key=lambda c: c.get("last_message_at", ""), reverse=True)
     return user_convs
 
+def _conversation_participants(conv_id: str):
+    participants = _participants.get(conv_id)
+    if participants is None:
+        conv = get_conversation(conv_id)
+        participants = tuple(p for p in (conv.get("user1"), conv.get("user2")) if p)
+        if participants:
+            _participants[conv_id] = participants
+    return participants
+
+# Firebase-style push ids, generated locally so a send needs no extra round-trip.
+# 8 timestamp chars + 12 random chars; ids sort chronologically.
+_PUSH_CHARS = "-0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZ_abcdefghijklmnopqrstuvwxyz"
+_push_lock = threading.Lock()
+_last_push_time = 0
+_last_rand = [0] * 12
+
+def _push_id() -> str:
+    global _last_push_time
+    now = int(time.time() * 1000)
+    with _push_lock:
+        if now <= _last_push_time:
+            # Same (or earlier) millisecond: bump the random part so ids keep increasing
+            now = _last_push_time
+            i = 11
+            while i >= 0 and _last_rand[i] == 63:
+                _last_rand[i] = 0
+                i -= 1
+            if i >= 0:
+                _last_rand[i] += 1
+            else:
+                now += 1
+        else:
+            for i in range(12):
+                _last_rand[i] = random.randrange(64)
+        _last_push_time = now
+        rand = list(_last_rand)
+    stamp = []
+    for _ in range(8):
+        stamp.append(_PUSH_CHARS[now % 64])
+        now //= 64
+    return "".join(reversed(stamp)) + "".join(_PUSH_CHARS[r] for r in rand)
+
+def add_messages(conv_id: str, sender_id: str, texts: list):
+    """Add several messages to a conversation in one multi-location write. Returns their ids."""
+    now = datetime.now().isoformat()
+    changes = {}
+    stored = []
+    for text in texts:
+        msg_id = _push_id()
+        message = {
+            "sender_id": sender_id,
+            "text": text,
+            "timestamp": now
+        }
+        changes[f"messages/{conv_id}/{msg_id}"] = message
+        stored.append({"msg_id": msg_id, **message})
+    # last_message_at on the conversation and both participants' index entries, in the same write
+    changes[f"conversations/{conv_id}/last_message_at"] = now
+    for participant in _conversation_participants(conv_id):
+        changes[f"user_conversations/{participant}/{conv_id}/last_message_at"] = now
+    root_ref.update(changes)
+    for message in stored:
+        for listener in _message_listeners:
+            try:
+                listener(conv_id, message)
+            except Exception as e:
+                print(f"Error in message listener: {e}")
+    return [message["msg_id"] for message in stored]
+
 def add_message(conv_id: str, sender_id: str, text: str):
     """Add a message to a conversation."""
-    msg_id = messages_ref.child(conv_id).push().key
-    now = datetime.now().isoformat()
-    messages_ref.child(conv_id).child(msg_id).set({
-        "sender_id": sender_id,
-        "text": text,
-        "timestamp": now
-    })
-    # Update conversation last_message_at
-    conversations_ref.child(conv_id).update({"last_message_at": now})
-    return msg_id
-
-def get_messages(conv_id: str):
-    """Get all messages in a conversation."""
-    msgs = messages_ref.child(conv_id).get() or {}
-    result = []
-    for msg_id, msg_data in msgs.items():
-        result.append({"msg_id": msg_id, **msg_data})
-    # Sort by timestamp
-    result.sort(key=lambda x: x.get("timestamp", 0))
+    return add_messages(conv_id, sender_id, [text])[0]
+
+def rebuild_conversation_index():
+    """Rebuild user_conversations/ from conversations/. Returns the number of conversations indexed."""
+    all_convs = conversations_ref.get() or {}
+    index = {}
+    for conv_id, conv_data in all_convs.items():
+        for participant in (conv_data.get("user1"), conv_data.get("user2")):
+            if participant:
+                index.setdefault(participant, {})[conv_id] = conv_data
+    user_conversations_ref.set(index)
+    return len(all_convs)
+
+def get_messages(conv_id: str, after: str = None, before: str = None, limit: int = None):
+    """
+    Get messages in a conversation, oldest first.
+
+    Push keys are chronological, so ordering by key needs no sort. `after` /
+    `before` take a msg_id and return only newer / older messages; `limit`
+    caps the count (the newest ones when paging backwards or with no cursor).
+    """
+    query = messages_ref.child(conv_id).order_by_key()
+    if after:
+        query = query.start_at(after)
+        if limit:
+            query = query.limit_to_first(limit + 1)
+    elif before:
+        query = query.end_at(before)
+        if limit:
+            query = query.limit_to_last(limit + 1)
+    elif limit:
+        query = query.limit_to_last(limit)
+    msgs = _read(messages_ref, query, f"messages/{conv_id}?after={after}&before={before}&limit={limit}") or {}
+    # start_at / end_at are inclusive of the cursor itself
+    result = [{"msg_id": msg_id, **msg_data} for msg_id, msg_data in msgs.items() if msg_id not in (after, before)]
+    if limit:
+        result = result[:limit] if after else result[-limit:]
     return result
 #add_user("123456", "mukund", "password123","Computer Science", 2, "johndoe", "example", ["python", "django", "firebase"], False, ["team1", "team2"])
\ No newline at end of file
@@ -0,0 +1,179 @@
+"""
+In-memory stand-in for the Realtime Database REST API, for offline runs and load tests.
+
+Supports GET / PUT / PATCH (including multi-location root updates) / POST /
+DELETE on /<path>.json, `shallow`, and orderBy ("$key" or a child) with
+startAt / endAt / equalTo / limitToFirst / limitToLast. No rules, no auth.
+
+    python -m database.fake_rtdb --seed 10000 --latency-ms 20 --fail-rate 0.01
+    RTDB_URL=http://127.0.0.1:9000 RTDB_AUTH=none python -m database.async_database
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import string
+
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.responses import JSONResponse, Response
+
+app = FastAPI()
+tree = {}
+settings = {"latency_ms": 0.0, "fail_rate": 0.0}
+
+
+def _parts(path: str):
+    return [p for p in path.strip("/").split("/") if p]
+
+
+def _get(parts):
+    node = tree
+    for part in parts:
+        if not isinstance(node, dict) or part not in node:
+            return None
+        node = node[part]
+    return node
+
+
+def _prune(node):
+    # Firebase never stores empty objects or nulls
+    if isinstance(node, dict):
+        pruned = {k: _prune(v) for k, v in node.items()}
+        return {k: v for k, v in pruned.items() if v is not None} or None
+    return node
+
+
+def _set(parts, value):
+    global tree
+    value = _prune(value)
+    if not parts:
+        tree = value or {}
+        return
+    node = tree
+    trail = []
+    for part in parts[:-1]:
+        child = node.get(part)
+        if not isinstance(child, dict):
+            child = node[part] = {}
+        trail.append((node, part))
+        node = child
+    if value is None:
+        node.pop(parts[-1], None)
+        # drop parents left empty
+        for parent, key in reversed(trail):
+            if parent[key]:
+                break
+            del parent[key]
+    else:
+        node[parts[-1]] = value
+
+
+def _order_key(order_by: str, key: str, value):
+    if order_by == "$key":
+        return key
+    if order_by == "$value":
+        return value
+    child = value
+    for part in _parts(order_by):
+        child = child.get(part) if isinstance(child, dict) else None
+    return child
+
+
+def _sort_key(value):
+    # nulls < booleans < numbers < strings < objects, as in Firebase
+    if value is None:
+        return (0, 0)
+    if isinstance(value, bool):
+        return (1, value)
+    if isinstance(value, (int, float)):
+        return (2, value)
+    if isinstance(value, str):
+        return (3, value)
+    return (4, 0)
+
+
+def _apply_query(node, params):
+    if "orderBy" not in params or not isinstance(node, dict):
+        return node
+    order_by = json.loads(params["orderBy"])
+    items = sorted(node.items(), key=lambda kv: (_sort_key(_order_key(order_by, *kv)), kv[0]))
+    for name, keep in (("startAt", lambda v, b: v >= b), ("endAt", lambda v, b: v <= b),
+                       ("equalTo", lambda v, b: v == b)):
+        if name in params:
+            bound = _sort_key(json.loads(params[name]))
+            items = [kv for kv in items if keep(_sort_key(_order_key(order_by, *kv)), bound)]
+    if "limitToFirst" in params:
+        items = items[:int(params["limitToFirst"])]
+    if "limitToLast" in params:
+        items = items[-int(params["limitToLast"]):] if int(params["limitToLast"]) else []
+    return dict(items)
+
+
+def _push_key():
+    return "-" + "".join(random.choices(string.ascii_letters + string.digits, k=19))
+
+
+@app.api_route("/{path:path}", methods=["GET", "PUT", "PATCH", "POST", "DELETE"])
+async def handle(path: str, request: Request):
+    if not path.endswith(".json"):
+        raise HTTPException(status_code=404, detail="Paths must end in .json")
+    if settings["latency_ms"]:
+        await asyncio.sleep(random.expovariate(1000 / settings["latency_ms"]))
+    if settings["fail_rate"] and random.random() < settings["fail_rate"]:
+        return JSONResponse({"error": "injected failure"}, status_code=503)
+
+    parts = _parts(path[:-len(".json")])
+    params = request.query_params
+    silent = params.get("print") == "silent"
+
+    if request.method == "GET":
+        node = _get(parts)
+        if params.get("shallow") == "true" and isinstance(node, dict):
+            node = {k: True for k in node}
+        return JSONResponse(_apply_query(node, params))
+
+    body = await request.json() if request.method != "DELETE" else None
+    if request.method == "PUT":
+        _set(parts, body)
+    elif request.method == "PATCH":
+        if not isinstance(body, dict):
+            raise HTTPException(status_code=400, detail="PATCH body must be an object")
+        for key, value in body.items():
+            _set(parts + _parts(key), value)
+    elif request.method == "POST":
+        name = _push_key()
+        _set(parts + [name], body)
+        return JSONResponse({"name": name})
+    else:
+        _set(parts, None)
+    return Response(status_code=204) if silent else JSONResponse(body)
+
+
+def seed_users(count: int):
+    """Fill users/ and usernames/ with synthetic profiles."""
+    skills = ["python", "react", "sql", "docker", "java", "figma", "pytorch", "go", "aws", "node.js"]
+    for i in range(count):
+        user_id = f"user{i:06d}"
+        tree.setdefault("users", {})[user_id] = {
+            "username": f"user{i}",
+            "name": f"User {i}",
+            "department": random.choice(["CSE", "ECE", "ME"]),
+            "year": random.randint(1, 4),
+            "skills": random.sample(skills, random.randint(1, 5)),
+        }
+        tree.setdefault("usernames", {})[f"user{i}"] = user_id
+
+
+if __name__ == "__main__":
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description="Run an in-memory fake Realtime Database")
+    parser.add_argument("--port", type=int, default=9000)
+    parser.add_argument("--seed", type=int, default=0, help="number of synthetic users to create")
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="mean injected latency per request")
+    parser.add_argument("--fail-rate", type=float, default=0.0, help="fraction of requests answered with 503")
+    args = parser.parse_args()
+    settings.update(latency_ms=args.latency_ms, fail_rate=args.fail_rate)
+    seed_users(args.seed)
+    uvicorn.run(app, host="127.0.0.1", port=args.port, log_level="warning")
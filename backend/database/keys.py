@@ -0,0 +1,40 @@
+"""
+Firebase key escaping.
+
+RTDB keys may not contain . $ # [ ] /, so usernames (usernames/) and skill
+names (users/{id}/verified_skills/) are percent-escaped when used as keys.
+Records are decoded as they are read, so callers only ever see the names.
+"""
+
+import re
+
+_KEY_ESCAPES = {"%": "%25", ".": "%2E", "$": "%24", "#": "%23", "[": "%5B", "]": "%5D", "/": "%2F"}
+_KEY_UNESCAPES = {escaped: ch for ch, escaped in _KEY_ESCAPES.items()}
+# one pass, so an escaped "%" is never decoded twice ("%252E" -> "%2E")
+_ESCAPED = re.compile("|".join(re.escape(escaped) for escaped in _KEY_UNESCAPES))
+
+
+def escape_key(value) -> str:
+    """Encode a string so it is a legal Firebase key."""
+    return "".join(_KEY_ESCAPES.get(ch, ch) for ch in str(value))
+
+
+def unescape_key(key) -> str:
+    """Inverse of escape_key."""
+    return _ESCAPED.sub(lambda m: _KEY_UNESCAPES[m.group()], str(key))
+
+
+def decode_verified_skills(verified):
+    """A verified_skills map keyed by skill name; the same object when no key is escaped."""
+    if not isinstance(verified, dict) or not any("%" in str(k) for k in verified):
+        return verified
+    return {unescape_key(k): v for k, v in verified.items()}
+
+
+def decode_user(record):
+    """A user record as stored, with its verified_skills keys decoded (unchanged if none are escaped)."""
+    if not isinstance(record, dict):
+        return record
+    verified = record.get("verified_skills")
+    decoded = decode_verified_skills(verified)
+    return record if decoded is verified else {**record, "verified_skills": decoded}
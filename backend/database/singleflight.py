@@ -0,0 +1,99 @@
+"""
+Single-flight read coalescing.
+
+Concurrent callers asking for the same key share one outstanding fetch: the
+first caller (the leader) runs it, the rest wait for its result or exception.
+Nothing is remembered once the fetch completes; caching stays in cache.py.
+Every caller gets its own result object: followers get deep copies, and so
+does the leader whenever anyone else is waiting on the same fetch.
+"""
+
+import asyncio
+import copy
+import threading
+
+
+class _Call:
+    __slots__ = ("done", "result", "error", "followers")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+        self.followers = 0
+
+
+class SingleFlight:
+    """Coalesces identical blocking reads across threads."""
+
+    def __init__(self):
+        self._calls = {}
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.coalesced = 0
+
+    def do(self, key, fetch):
+        with self._lock:
+            self.calls += 1
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+            else:
+                self.coalesced += 1
+                call.followers += 1
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return copy.deepcopy(call.result)
+        try:
+            call.result = fetch()
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+                shared = call.followers > 0
+            call.done.set()
+        # followers copy call.result concurrently, so the leader must not get (and mutate) it
+        return copy.deepcopy(call.result) if shared else call.result
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"calls": self.calls, "coalesced": self.coalesced, "in_flight": len(self._calls)}
+
+
+class AsyncSingleFlight:
+    """Coalesces identical awaitable reads within one event loop."""
+
+    def __init__(self):
+        self._calls = {}
+        self.calls = 0
+        self.coalesced = 0
+
+    async def do(self, key, fetch):
+        """`fetch` is a zero-argument coroutine function, only called by the leader."""
+        self.calls += 1
+        entry = self._calls.get(key)  # [future, follower count]
+        if entry is not None:
+            self.coalesced += 1
+            entry[1] += 1
+            # shield: a cancelled follower must not cancel the leader's fetch
+            return copy.deepcopy(await asyncio.shield(entry[0]))
+        future = asyncio.ensure_future(fetch())
+        entry = self._calls[key] = [future, 0]
+        try:
+            result = await asyncio.shield(future)
+            # followers still waiting to copy the result must not see the leader's mutations
+            return copy.deepcopy(result) if entry[1] else result
+        finally:
+            if self._calls.get(key) is entry:
+                del self._calls[key]
+            if not future.done():
+                # the leader was cancelled; let remaining followers still get a result
+                future.add_done_callback(lambda f: f.cancelled() or f.exception())
+
+    def stats(self) -> dict:
+        return {"calls": self.calls, "coalesced": self.coalesced, "in_flight": len(self._calls)}
@@ -0,0 +1,462 @@
+"""
+In-process mirror of the users/ tree, kept current from the RTDB change feed.
+
+Directory listing, username lookups and the skill matrix used to read users/
+from Firebase, in full or page by page. The mirror subscribes once with
+`users_ref.listen()`: the first event is a snapshot of the whole tree and every
+later event is an incremental put or patch, applied here as it arrives. Reads
+are then dictionary lookups, with secondary indexes on username, department
+and skill. Escaped verified_skills keys are decoded as records are applied
+(see keys.py), so readers see skill names.
+
+Staleness is reported as the time since the last event or consistency check.
+A gap (the stream dropped events while reconnecting, or an event that does not
+apply cleanly) is detected by periodically comparing the mirror's user ids with
+a shallow read of users/, and repaired by re-subscribing, which delivers a
+fresh snapshot.
+
+FakeEventStream stands in for the Firebase listener so the mirror can be
+exercised offline: python -m database.users_mirror
+"""
+
+import copy
+import threading
+import time
+from bisect import bisect_right, insort
+
+from database.keys import decode_user, decode_verified_skills, unescape_key
+
+
+def _skill_keys(skills) -> set:
+    # same normalisation as c_score.normalize_skills
+    if isinstance(skills, dict):
+        skills = list(skills.keys())
+    elif not isinstance(skills, list):
+        skills = list(skills) if skills else []
+    return {str(s).lower().strip() for s in skills if s}
+
+
+def _dept_key(department) -> str:
+    return str(department or "").lower().strip()
+
+
+def _split(path: str) -> list:
+    return [part for part in str(path).split("/") if part]
+
+
+def _decode(parts: list, value):
+    """(parts, value) of a write with escaped verified_skills keys turned back into skill names."""
+    if len(parts) == 1:
+        return parts, decode_user(value)
+    if parts[1] == "verified_skills":
+        if len(parts) == 2:
+            return parts, decode_verified_skills(value)
+        return parts[:2] + [unescape_key(parts[2])] + parts[3:], value
+    return parts, value
+
+
+def _set_in(node, parts: list, value):
+    """Return node with value written at parts; None deletes and prunes empty parents, as Firebase does."""
+    if not parts:
+        return copy.deepcopy(value)
+    head, rest = parts[0], parts[1:]
+    if isinstance(node, list):
+        node = {str(i): v for i, v in enumerate(node) if v is not None}
+    node = dict(node) if isinstance(node, dict) else {}
+    child = _set_in(node.get(head), rest, value)
+    if child in (None, {}, []):
+        node.pop(head, None)
+    else:
+        node[head] = child
+    if node and all(k.isdigit() for k in node):
+        # Firebase returns objects with small integer keys as arrays
+        size = max(int(k) for k in node) + 1
+        if size <= 2 * len(node):
+            return [node.get(str(i)) for i in range(size)]
+    return node
+
+
+class UsersMirror:
+    """
+    listen(callback) subscribes to users/ and returns something with close();
+    callback(event) receives objects with event_type ("put"/"patch"), path and data.
+    keys() returns the current user ids (a shallow read) for gap detection.
+    """
+
+    def __init__(self, listen, keys=None, verify_seconds: float = 300.0):
+        self._listen = listen
+        self._keys = keys
+        self.verify_seconds = verify_seconds
+        self._lock = threading.RLock()
+        self._registration = None
+        self._verifier = None
+        self._stop = threading.Event()
+        self._reset()
+        self.ready = False
+        self.synced_at = 0.0      # monotonic time of the last full snapshot
+        self.last_event_at = 0.0
+        self.verified_at = 0.0
+        self.events = 0
+        self.resyncs = 0
+        self.gaps = 0
+        self._change_listeners = []
+
+    def _reset(self):
+        self.users = {}           # user_id -> record (treat as read-only)
+        self.sorted_ids = []
+        self.by_username = {}
+        self.by_department = {}   # department -> set(user_id)
+        self.by_skill = {}        # skill -> set(user_id)
+
+    # --- subscription ---
+
+    def start(self):
+        """Subscribe to the change feed and, if keys() was given, start the gap checker."""
+        with self._lock:
+            self._stop.clear()
+            if self._registration is None:
+                self._registration = self._listen(self._on_event)
+        verifier = self._verifier
+        if self._keys is not None and self.verify_seconds > 0 and (verifier is None or not verifier.is_alive()):
+            self._verifier = threading.Thread(target=self._verify_loop, name="users-mirror-verify", daemon=True)
+            self._verifier.start()
+        return self
+
+    def close(self):
+        """Unsubscribe and stop the gap checker."""
+        self._stop.set()
+        self._unsubscribe()
+
+    def _unsubscribe(self):
+        with self._lock:
+            registration, self._registration = self._registration, None
+            self.ready = False
+        if registration is not None:
+            try:
+                registration.close()
+            except Exception as e:
+                print(f"users_mirror close error: {e}")
+
+    def resync(self, reason: str = ""):
+        """Drop the subscription and subscribe again; the new first event is a full snapshot."""
+        print(f"users_mirror: resync ({reason})")
+        self.resyncs += 1
+        # leaves _stop alone: the gap checker keeps running across resyncs
+        self._unsubscribe()
+        with self._lock:
+            if not self._stop.is_set() and self._registration is None:
+                self._registration = self._listen(self._on_event)
+
+    def _verify_loop(self):
+        while not self._stop.wait(self.verify_seconds):
+            try:
+                self.check()
+            except Exception as e:
+                print(f"users_mirror check error: {e}")
+
+    def check(self) -> bool:
+        """Compare user ids with the server; resync on a mismatch. True if consistent."""
+        if not self.ready:
+            return True
+        remote = set(self._keys() or ())
+        with self._lock:
+            consistent = remote == self.users.keys()
+        if consistent:
+            self.verified_at = time.monotonic()
+            return True
+        self.gaps += 1
+        self.resync(f"{len(remote)} users on server, {len(self.users)} mirrored")
+        return False
+
+    def on_change(self, listener):
+        """Register listener(user_id, record) for changes from the feed; user_id is None after a snapshot."""
+        self._change_listeners.append(listener)
+
+    def _notify(self, user_ids):
+        for user_id in user_ids:
+            record = self.users.get(user_id) if user_id is not None else None
+            for listener in self._change_listeners:
+                try:
+                    listener(user_id, record)
+                except Exception as e:
+                    print(f"Error in users mirror listener: {e}")
+
+    # --- applying events ---
+
+    def _on_event(self, event):
+        try:
+            changed = self.apply(event.event_type, event.path, event.data)
+        except Exception as e:
+            print(f"users_mirror event error: {e}")
+            threading.Thread(target=self.resync, args=(f"bad event at {event.path}",), daemon=True).start()
+            return
+        self.events += 1
+        self.last_event_at = time.monotonic()
+        self._notify(changed)
+
+    def apply(self, event_type: str, path: str, data) -> list:
+        """Apply one put/patch at a path relative to users/. Returns the changed user ids ([None] for a snapshot)."""
+        parts = _split(path)
+        with self._lock:
+            if event_type == "put" and not parts:
+                self._load(data or {})
+                return [None]
+            if event_type == "put":
+                self._write(parts, data)
+                return [parts[0]]
+            if event_type == "patch":
+                changed = []
+                for key, value in (data or {}).items():
+                    sub = parts + _split(key)
+                    if not sub:
+                        continue
+                    self._write(sub, value)
+                    if sub[0] not in changed:
+                        changed.append(sub[0])
+                return changed
+        raise ValueError(f"unknown event type {event_type!r}")
+
+    def put(self, user_id: str, record):
+        """Local write-through of a whole record (None deletes), ahead of the feed echoing it."""
+        if self.ready:
+            with self._lock:
+                self._write([user_id], record)
+
+    def patch(self, user_id: str, data: dict):
+        """Local write-through of a partial update, ahead of the feed echoing it."""
+        if self.ready and user_id in self.users:
+            with self._lock:
+                for key, value in data.items():
+                    self._write([user_id] + _split(key), value)
+
+    def _load(self, tree: dict):
+        self._reset()
+        for user_id, record in tree.items():
+            if isinstance(record, dict):
+                self._index(user_id, decode_user(record))
+        self.ready = True
+        self.synced_at = self.verified_at = time.monotonic()
+
+    def _write(self, parts: list, value):
+        parts, value = _decode(parts, value)
+        user_id = parts[0]
+        old = self.users.get(user_id)
+        record = _set_in(old, parts[1:], value)
+        if old is not None:
+            self._unindex(user_id, old)
+        if isinstance(record, dict) and record:
+            self._index(user_id, record)
+
+    def _index(self, user_id: str, record: dict):
+        if user_id not in self.users:
+            insort(self.sorted_ids, user_id)
+        self.users[user_id] = record
+        if record.get("username"):
+            self.by_username[record["username"]] = user_id
+        self.by_department.setdefault(_dept_key(record.get("department")), set()).add(user_id)
+        for skill in _skill_keys(record.get("skills")):
+            self.by_skill.setdefault(skill, set()).add(user_id)
+
+    def _unindex(self, user_id: str, record: dict):
+        del self.users[user_id]
+        i = bisect_right(self.sorted_ids, user_id) - 1
+        if i >= 0 and self.sorted_ids[i] == user_id:
+            del self.sorted_ids[i]
+        if self.by_username.get(record.get("username")) == user_id:
+            del self.by_username[record["username"]]
+        self._discard(self.by_department, _dept_key(record.get("department")), user_id)
+        for skill in _skill_keys(record.get("skills")):
+            self._discard(self.by_skill, skill, user_id)
+
+    @staticmethod
+    def _discard(index: dict, key, user_id):
+        members = index.get(key)
+        if members is not None:
+            members.discard(user_id)
+            if not members:
+                del index[key]
+
+    # --- reads ---
+
+    def get(self, user_id: str):
+        """A copy of the user's record, or None."""
+        record = self.users.get(user_id)
+        return copy.deepcopy(record) if record is not None else None
+
+    def get_by_username(self, username: str):
+        with self._lock:
+            user_id = self.by_username.get(username)
+            record = self.users.get(user_id) if user_id is not None else None
+        if record is None:
+            return None
+        return {**copy.deepcopy(record), "user_id": user_id}
+
+    def snapshot(self) -> dict:
+        """{user_id: record} for every user. The records are shared; do not mutate them."""
+        with self._lock:
+            return dict(self.users)
+
+    def candidates(self, department: str = None, skill: str = None):
+        """User ids matching the indexed filters (None if no indexed filter was given)."""
+        sets = []
+        with self._lock:
+            if department:
+                sets.append(self.by_department.get(_dept_key(department), set()))
+            if skill:
+                sets.append(self.by_skill.get(str(skill).lower().strip(), set()))
+            if not sets:
+                return None
+            return set.intersection(*sets) if len(sets) > 1 else set(sets[0])
+
+    def page(self, cursor: str = None, limit: int = 50, match=None, candidates=None):
+        """Same contract as database.list_users_page, served from memory."""
+        results = []
+        with self._lock:
+            ids = sorted(candidates) if candidates is not None else self.sorted_ids
+            start = bisect_right(ids, cursor) if cursor is not None else 0
+            for i in range(start, len(ids)):
+                user_id = ids[i]
+                record = self.users.get(user_id) or {}
+                if match is None or match(user_id, record):
+                    results.append((user_id, copy.deepcopy(record)))
+                    if len(results) == limit:
+                        return results, (user_id if i + 1 < len(ids) else None)
+        return results, None
+
+    def staleness(self):
+        """Seconds since the mirror was last known to be current (None before the first snapshot)."""
+        if not self.ready:
+            return None
+        return round(time.monotonic() - max(self.last_event_at, self.verified_at, self.synced_at), 3)
+
+    def stats(self) -> dict:
+        return {
+            "ready": self.ready,
+            "users": len(self.users),
+            "usernames": len(self.by_username),
+            "departments": len(self.by_department),
+            "skills": len(self.by_skill),
+            "events": self.events,
+            "resyncs": self.resyncs,
+            "gaps": self.gaps,
+            "staleness_seconds": self.staleness(),
+        }
+
+
+class FakeEvent:
+    def __init__(self, event_type, path, data):
+        self.event_type = event_type
+        self.path = path
+        self.data = data
+
+
+class FakeEventStream:
+    """
+    In-memory users tree with the listen() contract of firebase_admin's Reference.
+
+    put()/patch() change the tree and deliver the event to subscribers
+    synchronously; drop_next(n) silently loses the next n events, to simulate
+    a gap in the feed.
+    """
+
+    def __init__(self, tree: dict = None):
+        self.tree = copy.deepcopy(tree or {})
+        self._subscribers = []
+        self._drop = 0
+
+    def listen(self, callback):
+        stream = self
+
+        class Registration:
+            def close(self):
+                if callback in stream._subscribers:
+                    stream._subscribers.remove(callback)
+
+        self._subscribers.append(callback)
+        callback(FakeEvent("put", "/", copy.deepcopy(self.tree)))
+        return Registration()
+
+    def keys(self):
+        return list(self.tree)
+
+    def drop_next(self, n: int = 1):
+        self._drop += n
+
+    def _write(self, parts: list, value):
+        if not parts:
+            self.tree = copy.deepcopy(value or {})
+            return
+        record = _set_in(self.tree.get(parts[0]), parts[1:], value)
+        if record in (None, {}, []):
+            self.tree.pop(parts[0], None)
+        else:
+            self.tree[parts[0]] = record
+
+    def _deliver(self, event):
+        if self._drop:
+            self._drop -= 1
+            return
+        for callback in list(self._subscribers):
+            callback(event)
+
+    def put(self, path: str, data):
+        parts = _split(path)
+        self._write(parts, data)
+        self._deliver(FakeEvent("put", "/" + "/".join(parts), copy.deepcopy(data)))
+
+    def patch(self, path: str, data: dict):
+        parts = _split(path)
+        for key, value in data.items():
+            self._write(parts + _split(key), value)
+        self._deliver(FakeEvent("patch", "/" + "/".join(parts), copy.deepcopy(data)))
+
+
+if __name__ == "__main__":
+    # Offline check and benchmark: python -m database.users_mirror [users]
+    import random
+    import sys
+
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    rng = random.Random(1)
+    skills = [f"skill{i}" for i in range(300)]
+    departments = ["cse", "ece", "me", "civil", "it"]
+    stream = FakeEventStream({
+        f"u{i:06d}": {
+            "username": f"user{i}", "name": f"User {i}", "department": rng.choice(departments),
+            "skills": rng.sample(skills, rng.randint(2, 12)), "year": rng.randint(1, 4),
+        }
+        for i in range(n)
+    })
+
+    start = time.perf_counter()
+    mirror = UsersMirror(stream.listen, stream.keys, verify_seconds=0).start()
+    print(f"snapshot: {n} users in {(time.perf_counter() - start) * 1000:.0f} ms")
+
+    start = time.perf_counter()
+    for i in range(5000):
+        user_id = f"u{rng.randrange(n):06d}"
+        roll = rng.random()
+        if roll < 0.6:
+            stream.patch(f"/{user_id}", {"skills": rng.sample(skills, 4)})
+        elif roll < 0.8:
+            stream.put(f"/{user_id}/department", rng.choice(departments))
+        elif roll < 0.9:
+            stream.put(f"/u{n + i:06d}", {"username": f"new{i}", "department": "cse", "skills": ["python"]})
+        else:
+            stream.put(f"/{user_id}", None)
+    elapsed = time.perf_counter() - start
+    print(f"events: 5000 in {elapsed * 1000:.0f} ms ({elapsed / 5000 * 1e6:.1f} us/event)")
+    assert mirror.users == stream.tree, "mirror diverged from the stream"
+
+    stream.drop_next()
+    stream.put("/u999999", {"username": "lost", "skills": ["go"]})
+    assert mirror.check() is False and mirror.users == stream.tree, "gap was not repaired"
+    print(f"gap detected and resynced: {mirror.stats()}")
+
+    start = time.perf_counter()
+    for i in range(10000):
+        mirror.get_by_username(f"user{rng.randrange(n)}")
+    print(f"username lookups: {(time.perf_counter() - start) / 10000 * 1e6:.1f} us each")
+    start = time.perf_counter()
+    page, _ = mirror.page(None, 50, candidates=mirror.candidates(department="cse", skill="skill7"))
+    print(f"indexed page: {len(page)} users in {(time.perf_counter() - start) * 1000:.2f} ms")
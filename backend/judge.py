@@ -0,0 +1,548 @@
+"""
+Local judge: runs submissions against a problem's stored test cases.
+
+Each job runs in a fresh interpreter subprocess in an empty temporary directory
+with a scrubbed environment. When the judge runs as root the child drops to an
+unprivileged uid (JUDGE_UID, nobody by default). Before loading the submission
+the harness applies rlimits (CPU seconds, address space, file size, open files,
+no core dumps) and, on Linux, a seccomp filter that refuses exec, new processes,
+sockets and ptrace at the kernel, so nothing the submission does to the
+interpreter gets it a shell. On top of that an audit hook, closed over its own
+state, refuses the same at the Python level plus any file access outside the
+working directory except reading the standard library; where the kernel allows
+it the child also gets its own empty network namespace. Errors report only the
+exception type, never its text. Still run the judge in a locked-down container.
+
+Jobs go through a bounded queue served by JUDGE_WORKERS threads; submit()
+returns a job id immediately and callers poll get() for the verdict, per-test
+timings and peak memory.
+"""
+
+import json
+import os
+import queue
+import shutil
+import signal
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from bisect import bisect_left, insort
+
+WORKERS = int(os.getenv("JUDGE_WORKERS", str(max(1, (os.cpu_count() or 2) // 2))))
+QUEUE_SIZE = int(os.getenv("JUDGE_QUEUE_SIZE", "100"))
+TIME_LIMIT_SECONDS = float(os.getenv("JUDGE_TIME_LIMIT_SECONDS", "2"))
+MEMORY_LIMIT_MB = int(os.getenv("JUDGE_MEMORY_LIMIT_MB", "256"))
+JOB_TTL_SECONDS = float(os.getenv("JUDGE_JOB_TTL_SECONDS", "600"))
+MAX_CODE_BYTES = 64 * 1024
+# When the judge runs as root, submissions run as this unprivileged uid/gid (nobody by
+# default), which must be able to execute sys.executable. Empty: run as the judge's user.
+_RUN_AS = os.getenv("JUDGE_UID", "65534" if hasattr(os, "geteuid") and os.geteuid() == 0 else "")
+RUN_AS_UID = int(_RUN_AS) if _RUN_AS else None
+RUN_AS_GID = int(os.getenv("JUDGE_GID", _RUN_AS)) if _RUN_AS else None
+# The only verdicts a report may carry; "accepted" and "wrong_answer" are decided here from the outputs
+REPORT_VERDICTS = {"compile_error", "runtime_error", "memory_limit_exceeded", "time_limit_exceeded", "internal_error"}
+
+RESULT_MARKER = "__JUDGE_RESULT__"
+
+# Runs inside the sandboxed interpreter. Reads {"code", "entry_point", "args",
+# "time_limit", "rlimits"} from stdin and prints one marked JSON line with each
+# test's return value. Expected outputs never enter the sandbox: the parent
+# compares them, so a submission can't forge its own verdict.
+PYTHON_HARNESS = r'''
+import io, json, os, sys, time
+try:
+    import resource
+except ImportError:  # Windows: no rlimits, development use only
+    resource = None
+
+
+def _unshare_network(ctypes):
+    # Best effort: a new, empty network namespace (needs root or unprivileged user namespaces)
+    try:
+        libc = ctypes.CDLL(None, use_errno=True)
+        CLONE_NEWUSER, CLONE_NEWNET = 0x10000000, 0x40000000
+        if libc.unshare(CLONE_NEWNET) != 0:
+            libc.unshare(CLONE_NEWUSER | CLONE_NEWNET)
+    except Exception:
+        pass
+
+
+# seccomp: arch -> (AUDIT_ARCH, syscalls refused with EPERM, clone, clone3, x32 bit)
+_SYSCALLS = {
+    # execve, execveat, fork, vfork, socket, ptrace
+    "x86_64": (0xC000003E, (59, 322, 57, 58, 41, 101), 56, 435, 0x40000000),
+    # execve, execveat, socket, ptrace (no fork/vfork syscalls)
+    "aarch64": (0xC00000B7, (221, 281, 198, 117), 220, 435, None),
+}
+
+
+def _install_seccomp(ctypes):
+    # Kernel-level backstop for the audit hook: no exec, no new processes (threads are
+    # fine), no sockets, no ptrace, whatever the submission does to the interpreter.
+    # Returns False if the filter could not be installed.
+    import struct
+    spec = _SYSCALLS.get(os.uname().machine)
+    if spec is None:
+        return False
+    arch, denied, clone, clone3, x32 = spec
+    LD, JEQ, JGE, JSET, RET = 0x20, 0x15, 0x35, 0x45, 0x06
+    ALLOW, EPERM, ENOSYS, KILL = 0x7FFF0000, 0x00050001, 0x00050026, 0x80000000
+    CLONE_THREAD = 0x00010000
+    # Layout: checks, then [ALLOW, EPERM, ENOSYS, KILL]; jumps count from the next instruction
+    checks = [(LD, 0, 0, 4), ("arch",), (LD, 0, 0, 0)]
+    if x32:
+        checks.append(("x32",))
+    checks += [("deny", nr) for nr in denied] + [("clone",), ("clone3",), (RET, 0, 0, ALLOW)]
+    n = len(checks)
+    # instruction i jumping to the EPERM/ENOSYS/KILL returns placed after the clone-flags check
+    flags_at = n
+    eperm_at, enosys_at, kill_at = n + 3, n + 4, n + 5
+    program = []
+    for i, check in enumerate(checks):
+        kind = check[0]
+        if kind == "arch":
+            program.append((JEQ, 0, kill_at - i - 1, arch))
+        elif kind == "x32":
+            program.append((JGE, eperm_at - i - 1, 0, x32))
+        elif kind == "deny":
+            program.append((JEQ, eperm_at - i - 1, 0, check[1]))
+        elif kind == "clone":
+            program.append((JEQ, flags_at - i - 1, 0, clone))
+        elif kind == "clone3":
+            # ENOSYS makes libc fall back to clone(), where the flags can be checked
+            program.append((JEQ, enosys_at - i - 1, 0, clone3))
+        else:
+            program.append(check)
+    program += [
+        (LD, 0, 0, 16),                      # clone flags (low 32 bits of the first argument)
+        (JSET, 0, eperm_at - flags_at - 2, CLONE_THREAD),
+        (RET, 0, 0, ALLOW),
+        (RET, 0, 0, EPERM),
+        (RET, 0, 0, ENOSYS),
+        (RET, 0, 0, KILL),
+    ]
+    filters = b"".join(struct.pack("HBBI", *ins) for ins in program)
+    buffer = ctypes.create_string_buffer(filters, len(filters))
+
+    class SockFprog(ctypes.Structure):
+        _fields_ = [("len", ctypes.c_ushort), ("filter", ctypes.c_void_p)]
+
+    prog = SockFprog(len(program), ctypes.cast(buffer, ctypes.c_void_p))
+    libc = ctypes.CDLL(None, use_errno=True)
+    PR_SET_NO_NEW_PRIVS, PR_SET_SECCOMP, SECCOMP_MODE_FILTER = 38, 22, 2
+    if libc.prctl(PR_SET_NO_NEW_PRIVS, 1, 0, 0, 0) != 0:
+        return False
+    return libc.prctl(PR_SET_SECCOMP, SECCOMP_MODE_FILTER, ctypes.byref(prog), 0, 0) == 0
+
+
+def _make_audit_hook(workdir, read_roots):
+    # Everything the hook uses is bound here, as locals of this closure: a submission can
+    # rebind module globals (os.path.*, builtins, __main__ names) but not these.
+    import posix, stat
+    lstat, stat_path, fspath = posix.lstat, posix.stat, posix.fspath
+    S_ISLNK, S_ISDIR = stat.S_ISLNK, stat.S_ISDIR
+    encoding = sys.getfilesystemencoding()
+    isinstance_, len_, any_, bool_ = isinstance, len, any, bool
+    str_, bytes_, int_ = str, bytes, int
+    OSError_, TypeError_, PermissionError_ = OSError, TypeError, PermissionError
+    write_flags = os.O_WRONLY | os.O_RDWR | os.O_APPEND | os.O_CREAT | os.O_TRUNC
+
+    blocked = ("socket.", "subprocess.", "os.system", "os.exec", "os.posix_spawn", "os.spawn",
+               "os.fork", "os.forkpty", "os.kill", "ctypes.", "pty.", "signal.",
+               # reaching the hook: through the object graph, or its frame while it runs
+               "gc.", "sys.settrace", "sys.setprofile")
+    blocked_modules = frozenset(("_posixsubprocess", "_ctypes"))
+    # Reads may touch the working directory and the standard library (imports); everything
+    # else only the working directory. File-descriptor paths and ".." are refused.
+    reads = frozenset(("open", "os.listdir", "os.scandir", "os.listxattr", "os.getxattr"))
+    writes = frozenset(("os.chdir", "os.remove", "os.rmdir", "os.mkdir", "os.chmod", "os.chown",
+                        "os.chflags", "os.truncate", "os.utime", "os.setxattr", "os.removexattr",
+                        "os.rename", "os.link", "os.symlink"))
+    two_paths = frozenset(("os.rename", "os.link", "os.symlink"))
+    work_roots = (workdir,)
+
+    def resolve(path):
+        if path is None:
+            path = "."
+        if isinstance_(path, int_):
+            return None
+        try:
+            path = fspath(path)
+        except TypeError_:
+            return None
+        if isinstance_(path, bytes_):
+            path = path.decode(encoding, "surrogateescape")
+        if not path.startswith("/"):
+            path = workdir + "/" + path
+        parts = [part for part in path.split("/") if part and part != "."]
+        if ".." in parts:
+            return None
+        return "/" + "/".join(parts)
+
+    def root_of(path, roots):
+        for root in roots:
+            if path == root or path.startswith(root + "/"):
+                return root
+        return None
+
+    def no_links(path, root):
+        # below a trusted root no component may be a symlink (it could point anywhere)
+        current = root
+        for part in path[len_(root):].split("/"):
+            if not part:
+                continue
+            current = current + "/" + part
+            try:
+                mode = lstat(current).st_mode
+            except OSError_:
+                return True  # not there yet (a file being created)
+            if S_ISLNK(mode):
+                return False
+        return True
+
+    def is_dir(path):
+        try:
+            return S_ISDIR(stat_path(path).st_mode)
+        except OSError_:
+            return False
+
+    def allowed(event, args):
+        if event == "open":
+            mode, flags = args[1], args[2]
+            write = bool_(flags & write_flags) or (isinstance_(mode, str_) and any_(c in mode for c in "wax+"))
+            indexes = (0,)
+        else:
+            write = event in writes
+            indexes = (0, 1) if event in two_paths else (0,)
+        for i in indexes:
+            path = resolve(args[i] if i < len_(args) else None)
+            if path is None:
+                return False
+            root = root_of(path, work_roots)
+            if root is None:
+                root = None if write else root_of(path, read_roots)
+                if root is None:
+                    return False
+            if not no_links(path, root):
+                return False
+            # no directory is opened as a file, so no dir_fd can reach outside
+            if event == "open" and is_dir(path):
+                return False
+        return True
+
+    def audit(event, args):
+        if event.startswith(blocked):
+            refused = True
+        elif event == "import":
+            refused = args[0] in blocked_modules
+        elif event in reads or event in writes:
+            refused = not allowed(event, args)
+        else:
+            refused = False
+        if refused:
+            raise PermissionError_(f"{event} is not allowed in submissions")
+
+    return audit
+
+
+def _main():
+    out = sys.stdout
+    job = json.loads(sys.stdin.read())
+
+    # Limits are set here, before any submitted code runs, and can't be raised again
+    for name, value in (job["rlimits"].items() if resource else ()):
+        resource.setrlimit(getattr(resource, name), (value, value))
+
+    def peak_memory_kb():
+        try:
+            status.seek(0)
+            for line in status.read().splitlines():
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1])
+        except (AttributeError, OSError):
+            pass
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss if resource else None
+
+    def finish(**result):
+        result["memory_kb"] = peak_memory_kb()
+        out.write("__JUDGE_RESULT__" + json.dumps(result) + "\n")
+        out.flush()
+        sys.exit(0)
+
+    # VmHWM resets on exec; ru_maxrss on Linux can carry over the parent's peak from fork.
+    # Opened before the audit hook, which would refuse it.
+    try:
+        status = open("/proc/self/status")
+    except OSError:
+        status = None
+
+    if sys.platform.startswith("linux"):
+        import ctypes
+        _unshare_network(ctypes)
+        if not _install_seccomp(ctypes):
+            finish(verdict="internal_error", error="sandbox unavailable (seccomp)")
+
+    workdir = os.path.realpath(os.getcwd())
+    stdlib = [p for p in sys.path if p and os.path.basename(p) not in ("site-packages", "dist-packages")]
+    # as imports spell them and with symlinks resolved
+    read_roots = tuple(dict.fromkeys([os.path.normpath(os.path.abspath(p)) for p in stdlib] +
+                                     [os.path.realpath(p) for p in stdlib]))
+    sys.dont_write_bytecode = True  # no __pycache__ writes into the standard library
+    sys.addaudithook(_make_audit_hook(workdir, read_roots))
+
+    # The hook is a closure and needs none of these; drop them so `import __main__` finds no harness
+    main_globals = globals()
+    for name in [n for n in main_globals if n.startswith("_") and not n.startswith("__")]:
+        del main_globals[name]
+    del main_globals
+
+    namespace = {"__name__": "submission"}
+    sys.stdout = io.StringIO()  # submissions may print; keep it out of the result stream
+    try:
+        exec(compile(job["code"], "submission.py", "exec"), namespace)
+    except SyntaxError as e:
+        finish(verdict="compile_error", error=f"{e.msg} (line {e.lineno})")
+    except MemoryError:
+        finish(verdict="memory_limit_exceeded", error="MemoryError while loading")
+    except BaseException as e:
+        finish(verdict="runtime_error", error=f"{type(e).__name__} raised while loading the submission")
+
+    func = namespace.get(job["entry_point"])
+    if not callable(func):
+        finish(verdict="compile_error", error=f"function {job['entry_point']!r} not defined")
+
+    outputs = []
+    for args in job["args"]:
+        start = time.perf_counter()
+        try:
+            value = json.loads(json.dumps(func(*args)))
+            outputs.append({"value": value, "time_ms": round((time.perf_counter() - start) * 1000, 3)})
+        except MemoryError:
+            outputs.append({"error": "MemoryError"})
+            break
+        except BaseException as e:
+            # the type only: exception text can carry anything the submission read
+            outputs.append({"error": f"{type(e).__name__} raised"})
+        if outputs[-1].get("time_ms", 0) > job["time_limit"] * 1000:
+            break
+    finish(outputs=outputs)
+
+
+_main()
+'''
+
+
+class PythonRunner:
+    language = "python"
+
+    def command(self, workdir: str) -> list:
+        path = os.path.join(workdir, "harness.py")
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(PYTHON_HARNESS)
+        # -I: isolated mode (no user site, no PYTHON* env vars, script dir not on sys.path)
+        return [sys.executable, "-I", path]
+
+
+RUNNERS = {"python": PythonRunner()}
+
+
+def run_submission(language: str, code: str, entry_point: str, tests: list,
+                   time_limit: float = TIME_LIMIT_SECONDS, memory_limit_mb: int = MEMORY_LIMIT_MB) -> dict:
+    """Judge code synchronously. Returns verdict, passed/total, per-test results, time and memory."""
+    runner = RUNNERS[language]
+    workdir = tempfile.mkdtemp(prefix="judge-")
+    # CPU limit covers the whole run; the wall-clock limit also allows for interpreter startup
+    cpu_seconds = int(time_limit * max(1, len(tests))) + 1
+    wall_seconds = time_limit * max(1, len(tests)) + 5
+    rlimits = {
+        "RLIMIT_CPU": cpu_seconds,
+        "RLIMIT_AS": memory_limit_mb * 1024 * 1024,
+        "RLIMIT_FSIZE": 1024 * 1024,
+        "RLIMIT_NOFILE": 32,
+        "RLIMIT_CORE": 0,
+    }
+    payload = json.dumps({"code": code, "entry_point": entry_point, "args": [t.get("args", []) for t in tests],
+                          "time_limit": time_limit, "rlimits": rlimits})
+    start = time.perf_counter()
+    try:
+        command = runner.command(workdir)
+        privileges = {}
+        if RUN_AS_UID is not None:
+            os.chown(workdir, RUN_AS_UID, RUN_AS_GID)
+            privileges = {"user": RUN_AS_UID, "group": RUN_AS_GID, "extra_groups": []}
+        proc = subprocess.Popen(
+            command, cwd=workdir, stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE, env={"PATH": "/usr/bin:/bin", "HOME": workdir}, text=True,
+            start_new_session=True,  # own process group, so a timeout kills everything it started
+            **privileges,
+        )
+        try:
+            stdout, stderr = proc.communicate(payload, timeout=wall_seconds)
+        except subprocess.TimeoutExpired:
+            if hasattr(os, "killpg"):
+                os.killpg(proc.pid, signal.SIGKILL)
+            else:
+                proc.kill()
+            proc.communicate()
+            return _summary({"verdict": "time_limit_exceeded", "error": "wall-clock limit exceeded"}, [], tests)
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+    wall_ms = (time.perf_counter() - start) * 1000
+
+    report = None
+    for line in reversed(stdout.splitlines()):
+        if line.startswith(RESULT_MARKER):
+            # the submission shares stdout and may print a marker line of its own
+            try:
+                report = json.loads(line[len(RESULT_MARKER):])
+            except ValueError:
+                pass
+            if not isinstance(report, dict) or not isinstance(report.get("outputs", []), list):
+                report = None
+            break
+    if report is None:
+        # killed by an rlimit (SIGXCPU / SIGKILL) or crashed before reporting
+        if proc.returncode in (-getattr(signal, "SIGXCPU", 24), -getattr(signal, "SIGKILL", 9)):
+            verdict = "time_limit_exceeded"
+        elif "MemoryError" in stderr:
+            verdict = "memory_limit_exceeded"
+        else:
+            verdict = "runtime_error"
+        report = {"verdict": verdict, "error": f"exit code {proc.returncode}"}
+
+    result = _summary(report, report.pop("outputs", []), tests, time_limit)
+    result["wall_ms"] = round(wall_ms, 1)
+    return result
+
+
+def _summary(report: dict, outputs: list, tests: list, time_limit: float = TIME_LIMIT_SECONDS) -> dict:
+    """Compare outputs with expected values and work out the overall verdict."""
+    verdict = report.get("verdict") if report.get("verdict") in REPORT_VERDICTS else None
+    results = []
+    for test, output in zip(tests, outputs):
+        if "error" in output:
+            entry = {"passed": False, "error": output["error"]}
+            if output["error"] == "MemoryError":
+                verdict = verdict or "memory_limit_exceeded"
+            verdict = verdict or "runtime_error"
+        elif output["time_ms"] > time_limit * 1000:
+            entry = {"passed": False, "time_ms": output["time_ms"]}
+            verdict = verdict or "time_limit_exceeded"
+        else:
+            passed = output["value"] == test.get("expected")
+            entry = {"passed": passed, "time_ms": output["time_ms"]}
+            if not passed:
+                verdict = verdict or "wrong_answer"
+        results.append(entry)
+    if verdict is None and len(results) < len(tests):
+        verdict = "runtime_error"
+    return {
+        **report,
+        "verdict": verdict or "accepted",
+        "tests": results,
+        "passed": sum(1 for r in results if r["passed"]),
+        "total": len(tests),
+        "time_ms": round(sum(r.get("time_ms", 0) for r in results), 3),
+    }
+
+
+class Job:
+    __slots__ = ("id", "problem_id", "language", "code", "entry_point", "tests", "status", "result", "created_at")
+
+    def __init__(self, problem_id, language, code, entry_point, tests):
+        self.id = uuid.uuid4().hex
+        self.problem_id = problem_id
+        self.language = language
+        self.code = code
+        self.entry_point = entry_point
+        self.tests = tests
+        self.status = "queued"
+        self.result = None
+        self.created_at = time.time()
+
+    def view(self) -> dict:
+        return {"job_id": self.id, "problem_id": self.problem_id, "status": self.status, "result": self.result}
+
+
+class JudgeFull(Exception):
+    pass
+
+
+class Judge:
+    def __init__(self, workers: int = WORKERS, queue_size: int = QUEUE_SIZE):
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._jobs = {}
+        self._lock = threading.Lock()
+        self._accepted_times = {}  # problem_id -> sorted total time_ms of accepted runs
+        self._threads = []
+        self.workers = workers
+        self.completed = 0
+
+    def _start(self):
+        # caller holds the lock
+        while len(self._threads) < self.workers:
+            thread = threading.Thread(target=self._work, name=f"judge-{len(self._threads)}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def submit(self, problem_id: str, language: str, code: str, entry_point: str, tests: list) -> Job:
+        if language not in RUNNERS:
+            raise ValueError(f"Unsupported language: {language}")
+        if len(code.encode("utf-8")) > MAX_CODE_BYTES:
+            raise ValueError("Submission is too large")
+        job = Job(problem_id, language, code, entry_point, tests)
+        with self._lock:
+            self._start()
+            self._expire()
+            try:
+                self._queue.put_nowait(job)
+            except queue.Full:
+                raise JudgeFull("Judge queue is full, try again shortly")
+            self._jobs[job.id] = job
+        return job
+
+    def get(self, job_id: str):
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def _expire(self):
+        # caller holds the lock
+        cutoff = time.time() - JOB_TTL_SECONDS
+        for job_id in [j.id for j in self._jobs.values() if j.status == "done" and j.created_at < cutoff]:
+            del self._jobs[job_id]
+
+    def _work(self):
+        while True:
+            job = self._queue.get()
+            job.status = "running"
+            try:
+                result = run_submission(job.language, job.code, job.entry_point, job.tests)
+            except Exception as e:
+                print(f"Judge error for job {job.id}: {e}")
+                result = {"verdict": "internal_error", "error": str(e), "passed": 0, "total": len(job.tests), "tests": []}
+            result["score"] = round(100 * result["passed"] / result["total"], 1) if result["total"] else 0
+            if result["verdict"] == "accepted":
+                result["faster_than_percent"] = self._rank_time(job.problem_id, result["time_ms"])
+            job.code = job.tests = None  # no longer needed; keep finished jobs small
+            job.result = result
+            job.status = "done"
+            self.completed += 1
+
+    def _rank_time(self, problem_id: str, time_ms: float) -> float:
+        """Share of earlier accepted runs of this problem that were slower, in percent."""
+        with self._lock:
+            times = self._accepted_times.setdefault(problem_id, [])
+            slower = len(times) - bisect_left(times, time_ms)
+            rank = round(100 * slower / len(times), 1) if times else 100.0
+            insort(times, time_ms)
+        return rank
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"queued": self._queue.qsize(), "jobs": len(self._jobs), "completed": self.completed, "workers": len(self._threads)}
+
+
+judge = Judge()
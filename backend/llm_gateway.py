@@ -0,0 +1,237 @@
+"""
+Single async entry point for LLM calls (quiz generation, problem generation, judging).
+
+Every call goes through the same pipeline:
+    response cache (sha256 of model + prompt, TTL; generate_json caches only
+    parsed values that matched the schema, so a malformed reply is retried)
+    -> de-duplication of identical in-flight prompts
+    -> token-bucket rate limit -> concurrency semaphore
+    -> backend call with timeout and jittered retries
+and its latency is recorded in a histogram exposed by stats().
+
+LLM_BACKEND=gemini (default) uses google-generativeai; LLM_BACKEND=fake answers
+locally with canned JSON so the whole path runs without network or API key.
+"""
+
+import asyncio
+import bisect
+import hashlib
+import itertools
+import json
+import os
+import random
+import time
+
+import cleanjson
+from database.cache import TTLCache
+from database.singleflight import AsyncSingleFlight
+
+BACKEND = os.getenv("LLM_BACKEND", "gemini")  # gemini | fake
+MODEL_NAME = os.getenv("LLM_MODEL", "gemini-flash-latest")
+RATE_PER_SECOND = float(os.getenv("LLM_RATE_PER_SECOND", "1"))
+BURST = int(os.getenv("LLM_BURST", "5"))
+MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "4"))
+TIMEOUT_SECONDS = float(os.getenv("LLM_TIMEOUT_SECONDS", "30"))
+MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "2"))
+CACHE_TTL = float(os.getenv("LLM_CACHE_TTL", "86400"))
+CACHE_MAX_ENTRIES = int(os.getenv("LLM_CACHE_MAX_ENTRIES", "2000"))
+
+
+class GeminiBackend:
+    def __init__(self, model_name: str = MODEL_NAME):
+        import google.generativeai as genai
+        genai.configure(api_key=os.getenv("GOOGLE_API_KEY", ""))
+        self.name = model_name
+        self._model = genai.GenerativeModel(model_name)
+
+    async def generate(self, prompt: str) -> str:
+        # the SDK call blocks, so keep it off the event loop
+        response = await asyncio.to_thread(self._model.generate_content, prompt)
+        return response.text
+
+
+class FakeBackend:
+    """Offline stand-in. `responder(prompt) -> str` overrides the canned answers."""
+
+    name = "fake"
+
+    def __init__(self, responder=None, latency: float = 0.0):
+        self.responder = responder or self._canned
+        self.latency = latency
+        self.calls = 0
+        self._serial = itertools.count()
+
+    def _canned(self, prompt: str) -> str:
+        n = next(self._serial)
+        if "MCQ" in prompt:
+            return "```json\n" + json.dumps([
+                {"id": i, "question": f"Sample question {n}-{i}?", "options": ["A", "B", "C", "D"], "correct_answer": "A"}
+                for i in range(1, 11)
+            ]) + "\n```"
+        if "Judge" in prompt:
+            return json.dumps({"score": 80, "status": "accepted", "feedback": "Looks correct."})
+        return json.dumps({
+            "title": f"Sample problem {n}",
+            "description": "Return the sum of a list of integers.",
+            "requirements": ["Handle an empty list"],
+            "starter_code": "def solve(nums):\n    pass\n",
+            "entry_point": "solve",
+            "tests": [{"args": [[1, 2, 3]], "expected": 6}, {"args": [[]], "expected": 0}, {"args": [[-5, 5]], "expected": 0}],
+        })
+
+    async def generate(self, prompt: str) -> str:
+        self.calls += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        return self.responder(prompt)
+
+
+class TokenBucket:
+    """Allows `rate` acquisitions per second on average, bursting up to `burst`."""
+
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate
+        self.burst = burst
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._lock = None
+
+    async def acquire(self):
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        async with self._lock:  # FIFO: waiters are served in arrival order
+            while True:
+                now = time.monotonic()
+                self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+
+
+class LatencyHistogram:
+    BOUNDS_MS = (50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000)
+
+    def __init__(self):
+        self.counts = [0] * (len(self.BOUNDS_MS) + 1)
+        self.total_ms = 0.0
+
+    def record(self, seconds: float):
+        ms = seconds * 1000
+        self.counts[bisect.bisect_left(self.BOUNDS_MS, ms)] += 1
+        self.total_ms += ms
+
+    def _quantile(self, q: float):
+        # upper bound of the bucket holding the q-th observation
+        target = q * sum(self.counts)
+        seen = 0
+        for i, count in enumerate(self.counts):
+            seen += count
+            if count and seen >= target:
+                return self.BOUNDS_MS[i] if i < len(self.BOUNDS_MS) else None
+        return None
+
+    def snapshot(self) -> dict:
+        count = sum(self.counts)
+        labels = [f"<={b}ms" for b in self.BOUNDS_MS] + [f">{self.BOUNDS_MS[-1]}ms"]
+        return {
+            "count": count,
+            "mean_ms": round(self.total_ms / count, 1) if count else None,
+            "p50_ms": self._quantile(0.5),
+            "p95_ms": self._quantile(0.95),
+            "buckets": dict(zip(labels, self.counts)),
+        }
+
+
+class LLMGateway:
+    def __init__(self, backend, rate: float = RATE_PER_SECOND, burst: int = BURST,
+                 max_concurrency: int = MAX_CONCURRENCY, timeout: float = TIMEOUT_SECONDS,
+                 retries: int = MAX_RETRIES, cache_ttl: float = CACHE_TTL):
+        self.backend = backend
+        self.timeout = timeout
+        self.retries = retries
+        self.max_concurrency = max_concurrency
+        self.cache = TTLCache(ttl=cache_ttl, max_entries=CACHE_MAX_ENTRIES)
+        self.bucket = TokenBucket(rate, burst)
+        self.inflight = AsyncSingleFlight()
+        self.latency = LatencyHistogram()
+        self._semaphore = None
+        self.calls = 0
+        self.errors = 0
+        self.timeouts = 0
+
+    def _key(self, prompt: str) -> str:
+        return hashlib.sha256(f"{self.backend.name}\n{prompt}".encode("utf-8")).hexdigest()
+
+    async def generate(self, prompt: str, cache: bool = True) -> str:
+        """Completion text for prompt. cache=False skips the response cache (but still de-duplicates)."""
+        key = self._key(prompt)
+        if cache:
+            text = self.cache.get(key)
+            if text is not None:
+                return text
+        text = await self.inflight.do(key, lambda: self._call(prompt))
+        self.cache.set(key, text)
+        return text
+
+    async def generate_json(self, prompt: str, schema: dict = None, cache: bool = True):
+        """
+        The completion run through cleanjson.extract_json; raises ValueError if no
+        value matches schema. Only validated values are cached, so one malformed
+        reply doesn't keep failing the prompt until the TTL runs out.
+        """
+        key = self._key(prompt)
+        json_key = f"{key}:json:{json.dumps(schema, sort_keys=True)}"
+        if cache:
+            value = self.cache.get(json_key)
+            if value is not None:
+                return value
+        text = await self.inflight.do(key, lambda: self._call(prompt))
+        value = cleanjson.extract_json(text, schema)
+        self.cache.set(json_key, value)
+        return value
+
+    async def _call(self, prompt: str) -> str:
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        attempt = 0
+        while True:
+            attempt += 1
+            await self.bucket.acquire()
+            async with self._semaphore:
+                self.calls += 1
+                start = time.perf_counter()
+                try:
+                    return await asyncio.wait_for(self.backend.generate(prompt), self.timeout)
+                except asyncio.TimeoutError as e:
+                    self.timeouts += 1
+                    error = e
+                except Exception as e:
+                    self.errors += 1
+                    error = e
+                finally:
+                    self.latency.record(time.perf_counter() - start)
+            if attempt > self.retries:
+                raise error
+            await asyncio.sleep(random.uniform(0, 2 ** attempt))
+
+    def stats(self) -> dict:
+        return {
+            "backend": self.backend.name,
+            "calls": self.calls,
+            "errors": self.errors,
+            "timeouts": self.timeouts,
+            "cache": self.cache.stats(),
+            "dedup": self.inflight.stats(),
+            "latency": self.latency.snapshot(),
+        }
+
+
+def _make_backend():
+    if BACKEND == "fake":
+        return FakeBackend()
+    return GeminiBackend()
+
+
+gateway = LLMGateway(_make_backend())
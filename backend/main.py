@@ -1,10 +1,25 @@
 # main.py
-from fastapi import FastAPI, HTTPException, Query
+from fastapi import FastAPI, HTTPException, Query, Request, Response, WebSocket, WebSocketDisconnect
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, StreamingResponse
 from pydantic import BaseModel
+from typing import List
+import asyncio
+import hashlib
+import json
 import quiz
+import skill_index
+import skill_matrix
+import team_builder
+from chat_hub import hub as chat_hub
+from partner_cache import partner_cache
 from quiz import router as quiz_router
+from problem import router as problem_router
 from database import database  # Assumes database.py exists
+from database import async_database
+from c_score import normalize_skills
+from llm_gateway import gateway
+from judge import judge
 
 app = FastAPI()
 
@@ -15,12 +30,16 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["ETag"],
 )
 
 # --- REGISTER QUIZ ROUTER ---
 # This adds /verification/start and /verification/submit from quiz.py
 app.include_router(quiz_router, prefix="/verification", tags=["Verification"])
 
+# /generate-problem, /problems and /submit-solution from problem.py
+app.include_router(problem_router, tags=["Problems"])
+
 # --- MODELS ---
 class SignupDetails(BaseModel):
     userid: str
@@ -60,13 +79,15 @@ def signup(details: SignupDetails):
             teams=details.teams
         )
         return {"message": "User added successfully"}
+    except database.UsernameTaken:
+        raise HTTPException(status_code=409, detail="Username already taken")
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.post("/login")
-def login_user(data: LoginRequest):
+async def login_user(data: LoginRequest):
     print("LOGIN REQUEST:", data.username)
-    user = database.get_user_by_username(data.username)
+    user = await async_database.get_user_by_username(data.username)
     
     if not user:
         raise HTTPException(status_code=401, detail="User not found")
@@ -83,10 +104,11 @@ def login_user(data: LoginRequest):
 # --- COMPATIBILITY ENDPOINTS ---
 
 @app.post("/compatibility-score")
-def compatibility_score(username1: str, username2: str):
+async def compatibility_score(username1: str, username2: str):
     # Accept either username or user_id for flexibility
-    user1 = database.get_user_by_username(username1) or database.get_user(username1)
-    user2 = database.get_user_by_username(username2) or database.get_user(username2)
+    user1, user2 = await asyncio.gather(
+        async_database.get_user_by_identifier(username1), async_database.get_user_by_identifier(username2)
+    )
 
     missing = []
     if not user1:
@@ -103,12 +125,31 @@ def compatibility_score(username1: str, username2: str):
 
     return {"score": score, "reason": reason}
 
+
+def _score_function(mode: str):
+    if mode == "semantic":
+        from semantic_score import get_semantic_compatibility_score
+        return get_semantic_compatibility_score
+    if mode != "keyword":
+        raise HTTPException(status_code=400, detail=f"Unknown scoring mode: {mode}")
+    from c_score import get_compatibility_score
+    return get_compatibility_score
+
+
+async def _run_score(mode: str, get_score, skills1, skills2):
+    # Semantic scoring may load or run the embedding model; keep it off the event loop
+    if mode == "semantic":
+        return await asyncio.to_thread(get_score, skills1, skills2)
+    return get_score(skills1, skills2)
+
+
 @app.get("/compatibility/compare/{username1}/{username2}")
-def get_compatibility(username1: str, username2: str):
+async def get_compatibility(username1: str, username2: str, mode: str = "keyword"):
     try:
         # Accept either username or user_id
-        user1 = database.get_user_by_username(username1) or database.get_user(username1)
-        user2 = database.get_user_by_username(username2) or database.get_user(username2)
+        user1, user2 = await asyncio.gather(
+            async_database.get_user_by_identifier(username1), async_database.get_user_by_identifier(username2)
+        )
 
         missing = []
         if not user1:
@@ -120,12 +161,12 @@ def get_compatibility(username1: str, username2: str):
             print(f"get_compatibility: {detail}")
             raise HTTPException(status_code=404, detail=detail)
 
-        from c_score import get_compatibility_score
+        get_score = _score_function(mode)
 
         skills1 = user1.get("skills", []) if isinstance(user1, dict) else []
         skills2 = user2.get("skills", []) if isinstance(user2, dict) else []
 
-        score, reason = get_compatibility_score(skills1, skills2)
+        score, reason = await _run_score(mode, get_score, skills1, skills2)
 
         return {
             "score": score,
@@ -133,6 +174,8 @@ def get_compatibility(username1: str, username2: str):
             "user1": username1,
             "user2": username2
         }
+    except HTTPException:
+        raise
     except Exception as e:
         print(f"Compatibility error: {e}")
         raise HTTPException(status_code=500, detail=f"Error calculating compatibility: {str(e)}")
@@ -141,17 +184,20 @@ def get_compatibility(username1: str, username2: str):
 class CompatibilityComputeRequest(BaseModel):
     user1: str
     user2: str
+    mode: str = "keyword"  # or "semantic"
+
 
 
 @app.post("/compatibility/compute")
-def compute_compatibility(req: CompatibilityComputeRequest):
+async def compute_compatibility(req: CompatibilityComputeRequest):
     """Compute compatibility given two identifiers (username or user_id)."""
     try:
         id1 = req.user1
         id2 = req.user2
         # resolve by username or id
-        user1 = database.get_user_by_username(id1) or database.get_user(id1)
-        user2 = database.get_user_by_username(id2) or database.get_user(id2)
+        user1, user2 = await asyncio.gather(
+            async_database.get_user_by_identifier(id1), async_database.get_user_by_identifier(id2)
+        )
 
         missing = []
         if not user1:
@@ -163,10 +209,10 @@ def compute_compatibility(req: CompatibilityComputeRequest):
             print(f"compute_compatibility: {detail}")
             raise HTTPException(status_code=404, detail=detail)
 
-        from c_score import get_compatibility_score
+        get_score = _score_function(req.mode)
         skills1 = user1.get('skills') or []
         skills2 = user2.get('skills') or []
-        score, reason = get_compatibility_score(skills1, skills2)
+        score, reason = await _run_score(req.mode, get_score, skills1, skills2)
         return { 'score': score, 'reason': reason }
     except HTTPException:
         raise
@@ -175,6 +221,84 @@ def compute_compatibility(req: CompatibilityComputeRequest):
         raise HTTPException(status_code=500, detail=str(e))
 
 
+class CompatibilityBatchRequest(BaseModel):
+    # Either explicit [user1, user2] pairs, or a list of users for an all-pairs matrix
+    pairs: List[List[str]] = None
+    users: List[str] = None
+
+
+MAX_BATCH_PAIRS = 20000
+MAX_BATCH_USERS = 200
+
+
+@app.post("/compatibility/batch")
+def compute_compatibility_batch(req: CompatibilityBatchRequest):
+    """Score many pairs in one request. Streams one JSON object per line (NDJSON).
+
+    With `users`, only the upper triangle (i < j) of the matrix is returned,
+    since scores are symmetric.
+    """
+    if (req.pairs is None) == (req.users is None):
+        raise HTTPException(status_code=400, detail="Provide exactly one of 'pairs' or 'users'")
+    if req.pairs is not None:
+        if any(len(pair) != 2 for pair in req.pairs):
+            raise HTTPException(status_code=400, detail="Each pair must have exactly two identifiers")
+        if len(req.pairs) > MAX_BATCH_PAIRS:
+            raise HTTPException(status_code=400, detail=f"At most {MAX_BATCH_PAIRS} pairs per request")
+        identifiers = [ident for pair in req.pairs for ident in pair]
+    else:
+        if len(req.users) > MAX_BATCH_USERS:
+            raise HTTPException(status_code=400, detail=f"At most {MAX_BATCH_USERS} users per request")
+        identifiers = req.users
+
+    try:
+        # Identifiers resolve against the in-memory matrix (one users snapshot);
+        # only ones it has never seen fall back to individual lookups.
+        matrix = skill_matrix.get_matrix()
+        rows = {}
+        missing = []
+        for ident in dict.fromkeys(identifiers):
+            row = matrix.resolve(ident)
+            if row is None:
+                user = database.get_user_by_username(ident)
+                user_id = user["user_id"] if user else ident
+                user = user or database.get_user(ident)
+                if user:
+                    skill_matrix.ensure_user(user_id, user, matrix)
+                    row = matrix.row_of.get(user_id)
+            if row is None:
+                missing.append(ident)
+            rows[ident] = row
+        if missing:
+            raise HTTPException(status_code=404, detail=f"Users not found: {', '.join(missing)}")
+
+        if req.pairs is not None:
+            labels = [(a, b) for a, b in req.pairs]
+        else:
+            labels = [(req.users[i], req.users[j]) for i in range(len(req.users)) for j in range(i + 1, len(req.users))]
+        rows_a = [rows[a] for a, _ in labels]
+        rows_b = [rows[b] for _, b in labels]
+        scores, exact, cat_matches = matrix.pair_scores(rows_a, rows_b) if labels else ([], [], [])
+    except HTTPException:
+        raise
+    except Exception as e:
+        print(f"compute_compatibility_batch error: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+    def stream():
+        chunk = []
+        for i, (user1, user2) in enumerate(labels):
+            score, reason = matrix.result(rows_a[i], rows_b[i], scores[i], exact[i], cat_matches[i])
+            chunk.append(json.dumps({"user1": user1, "user2": user2, "score": score, "reason": reason}))
+            if len(chunk) == 500:
+                yield "\n".join(chunk) + "\n"
+                chunk = []
+        if chunk:
+            yield "\n".join(chunk) + "\n"
+
+    return StreamingResponse(stream(), media_type="application/x-ndjson")
+
+
 @app.get("/compatibility/ranked/{username}")
 def rank_compatibility(username: str, limit: int = 20):
     """Return other users ranked by compatibility with the given username."""
@@ -183,35 +307,13 @@ def rank_compatibility(username: str, limit: int = 20):
         if not base_user:
             raise HTTPException(status_code=404, detail="User not found")
 
-        all_users = database.users_ref.get() or {}
-        print(f"rank_compatibility: base={base_user.get('user_id')} users_count={len(all_users)}")
-        results = []
-        from c_score import get_compatibility_score
-
-        base_skills = base_user.get('skills') or []
-
-        for uid, udata in all_users.items():
-            # skip self
-            if uid == base_user.get('user_id'):
-                continue
-            try:
-                other_skills = udata.get('skills') or []
-                score, reason = get_compatibility_score(base_skills, other_skills)
-                results.append({
-                    'user_id': uid,
-                    'username': udata.get('username'),
-                    'name': udata.get('name'),
-                    'department': udata.get('department'),
-                    'score': score,
-                    'reason': reason
-                })
-            except Exception as e:
-                print(f"Error scoring {uid}: {e}")
-
-        # sort descending
-        results.sort(key=lambda x: x.get('score', 0), reverse=True)
-        print(f"rank_compatibility: results_count={len(results)}")
-        return { 'user': base_user.get('user_id'), 'results': results[:limit] }
+        matrix = skill_matrix.ensure_user(base_user['user_id'], base_user)
+        results = [
+            {k: v for k, v in item.items() if k != 'verified_skills'}
+            for item in matrix.rank(base_user['user_id'], limit)
+        ]
+        print(f"rank_compatibility: base={base_user.get('user_id')} users_count={matrix.size} results_count={len(results)}")
+        return { 'user': base_user.get('user_id'), 'results': results }
     except HTTPException:
         raise
     except Exception as e:
@@ -227,42 +329,68 @@ def partners_compatible(username: str, limit: int = 50, department: str = None):
         if not base_user:
             raise HTTPException(status_code=404, detail="User not found")
 
-        all_users = database.users_ref.get() or {}
-        print(f"partners_compatible: base={base_user.get('user_id')} users_count={len(all_users)}")
-        results = []
-        from c_score import get_compatibility_score
-
-        base_skills = base_user.get('skills') or []
-
-        for uid, udata in all_users.items():
-            if uid == base_user.get('user_id'):
-                continue
-            if department and udata.get('department', '').lower() != department.lower():
-                continue
-            try:
-                other_skills = udata.get('skills') or []
-                score, reason = get_compatibility_score(base_skills, other_skills)
-                results.append({
-                    'user_id': uid,
-                    'username': udata.get('username'),
-                    'name': udata.get('name'),
-                    'department': udata.get('department'),
-                    'score': score,
-                    'reason': reason,
-                    'verified_skills': udata.get('verified_skills', {})
-                })
-            except Exception as e:
-                print(f"Error scoring {uid}: {e}")
-
-        results.sort(key=lambda x: x.get('score', 0), reverse=True)
-        print(f"partners_compatible: results_count={len(results)}")
-        return { 'user': base_user.get('user_id'), 'results': results[:limit] }
+        matrix = skill_matrix.ensure_user(base_user['user_id'], base_user)
+        results = partner_cache.get(matrix, base_user['user_id'], limit, department)
+        print(f"partners_compatible: base={base_user.get('user_id')} users_count={matrix.size} results_count={len(results)}")
+        return { 'user': base_user.get('user_id'), 'results': results }
     except HTTPException:
         raise
     except Exception as e:
         print(f"partners_compatible error: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
+
+class TeamSuggestRequest(BaseModel):
+    seed: str  # username or user_id; every suggested team includes them
+    team_size: int = 3
+    required_skills: List[str] = []
+    department: str = None
+    college: str = None
+    count: int = 5
+    beam_width: int = 8  # search quality/time knob; 1 is greedy
+    budget_ms: float = 200
+
+
+MAX_TEAM_SIZE = 8
+MAX_TEAM_SUGGESTIONS = 20
+MAX_BEAM_WIDTH = 64
+MAX_TEAM_BUDGET_MS = 2000
+
+
+@app.post("/teams/suggest")
+def suggest_teams(req: TeamSuggestRequest):
+    """Top candidate teams around a seed user, by mean pairwise compatibility and required skill coverage."""
+    if not 2 <= req.team_size <= MAX_TEAM_SIZE:
+        raise HTTPException(status_code=400, detail=f"team_size must be between 2 and {MAX_TEAM_SIZE}")
+    if not 1 <= req.count <= MAX_TEAM_SUGGESTIONS:
+        raise HTTPException(status_code=400, detail=f"count must be between 1 and {MAX_TEAM_SUGGESTIONS}")
+    if not 1 <= req.beam_width <= MAX_BEAM_WIDTH:
+        raise HTTPException(status_code=400, detail=f"beam_width must be between 1 and {MAX_BEAM_WIDTH}")
+    if not 0 < req.budget_ms <= MAX_TEAM_BUDGET_MS:
+        raise HTTPException(status_code=400, detail=f"budget_ms must be between 0 and {MAX_TEAM_BUDGET_MS}")
+    try:
+        seed = database.get_user_by_username(req.seed)
+        seed_id = seed["user_id"] if seed else req.seed
+        seed = seed or database.get_user(req.seed)
+        if not seed:
+            raise HTTPException(status_code=404, detail="User not found")
+
+        matrix = skill_matrix.ensure_user(seed_id, seed)
+        result = team_builder.suggest_teams(
+            matrix, seed_id, req.team_size, req.required_skills, req.department, req.college,
+            req.count, req.beam_width, req.budget_ms,
+        )
+        print(f"suggest_teams: seed={seed_id} pool={result['search']['pool_size']} "
+              f"teams={len(result['teams'])} elapsed_ms={result['search']['elapsed_ms']}")
+        return result
+    except HTTPException:
+        raise
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        print(f"suggest_teams error: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
 # --- CHAT ENDPOINTS ---
 
 @app.post("/conversations")
@@ -280,35 +408,211 @@ def create_conversation(user1_id: str = Query(...), user2_id: str = Query(...)):
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.get("/conversations/{user_id}")
-def get_user_conversations(user_id: str):
-    return database.get_user_conversations(user_id)
+async def get_user_conversations(user_id: str, limit: int = Query(None, ge=1)):
+    return await async_database.get_user_conversations(user_id, limit)
+
+class MessageRequest(BaseModel):
+    sender_id: str
+    text: str
+
+
+class MessageBatchItem(BaseModel):
+    text: str
+
+
+class MessageBatchRequest(BaseModel):
+    sender_id: str
+    messages: List[MessageBatchItem]
+
+
+MAX_BATCH_MESSAGES = 100
+
 
 @app.post("/messages/{conv_id}")
-def send_message(conv_id: str, sender_id: str, text: str):
-    if not text.strip():
+def send_message(conv_id: str, msg: MessageRequest):
+    if not msg.text.strip():
         raise HTTPException(status_code=400, detail="Message cannot be empty")
-    msg_id = database.add_message(conv_id, sender_id, text.strip())
+    msg_id = database.add_message(conv_id, msg.sender_id, msg.text.strip())
     return {"msg_id": msg_id, "status": "sent"}
 
+@app.post("/messages/{conv_id}/batch")
+def send_messages(conv_id: str, batch: MessageBatchRequest):
+    """Send several queued messages at once; they are committed in a single write."""
+    texts = [m.text.strip() for m in batch.messages]
+    if not texts or any(not t for t in texts):
+        raise HTTPException(status_code=400, detail="Messages cannot be empty")
+    if len(texts) > MAX_BATCH_MESSAGES:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_BATCH_MESSAGES} messages per batch")
+    msg_ids = database.add_messages(conv_id, batch.sender_id, texts)
+    return {"msg_ids": msg_ids, "status": "sent"}
+
 @app.get("/messages/{conv_id}")
-def get_messages(conv_id: str):
-    return database.get_messages(conv_id)
+async def get_messages(conv_id: str, after: str = None, before: str = None, limit: int = Query(None, ge=1, le=500)):
+    """Message history; pass after=<msg_id> for new messages only, before=<msg_id> to page back."""
+    if after and before:
+        raise HTTPException(status_code=400, detail="Use either 'after' or 'before', not both")
+    return await async_database.get_messages(conv_id, after, before, limit)
+
+# --- REAL-TIME CHAT ---
+# New messages are pushed to open conversations instead of clients polling /messages.
+
+SSE_HEARTBEAT_SECONDS = 15
+
+
+def _is_participant(conv_id: str, user_id: str) -> bool:
+    conv = database.get_conversation(conv_id)
+    return bool(user_id) and user_id in (conv.get("user1"), conv.get("user2"))
+
+
+@app.websocket("/ws/conversations/{conv_id}")
+async def conversation_socket(websocket: WebSocket, conv_id: str, user_id: str = None):
+    if not await asyncio.to_thread(_is_participant, conv_id, user_id):
+        await websocket.close(code=4403)
+        return
+    await websocket.accept()
+    conn = chat_hub.connect(conv_id)
+
+    async def pump():
+        while True:
+            await websocket.send_json(await conn.queue.get())
+
+    async def drain():
+        # Clients don't send anything; this only notices the disconnect
+        while True:
+            await websocket.receive_text()
+
+    tasks = [asyncio.create_task(pump()), asyncio.create_task(drain())]
+    try:
+        done, _ = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+        for task in done:
+            error = task.exception()
+            if error and not isinstance(error, WebSocketDisconnect):
+                print(f"conversation_socket error: {error}")
+    finally:
+        for task in tasks:
+            task.cancel()
+        chat_hub.disconnect(conn)
+
+
+@app.get("/conversations/{conv_id}/events")
+async def conversation_events(request: Request, conv_id: str, user_id: str):
+    """Server-sent events fallback for clients that can't use the WebSocket."""
+    if not await asyncio.to_thread(_is_participant, conv_id, user_id):
+        raise HTTPException(status_code=403, detail="Not a participant in this conversation")
+    conn = chat_hub.connect(conv_id)
+
+    async def stream():
+        try:
+            while not await request.is_disconnected():
+                try:
+                    event = await asyncio.wait_for(conn.queue.get(), SSE_HEARTBEAT_SECONDS)
+                except asyncio.TimeoutError:
+                    yield ": keep-alive\n\n"
+                    continue
+                yield f"data: {json.dumps(event)}\n\n"
+        finally:
+            chat_hub.disconnect(conn)
+
+    return StreamingResponse(stream(), media_type="text/event-stream", headers={"Cache-Control": "no-cache"})
 
 # --- USER MANAGEMENT ENDPOINTS ---
 
+# Columns the directory view needs; `password` is never returned by the listing
+USER_SUMMARY_FIELDS = ["user_id", "username", "name", "department", "college", "year", "skills", "verified_skills"]
+USER_HIDDEN_FIELDS = {"password"}
+
+
+def _user_filter(department, college, year, skill, verified_skill):
+    if not any([department, college, year is not None, skill, verified_skill]):
+        return None
+    skill = skill.lower().strip() if skill else None
+    verified_skill = verified_skill.lower().strip() if verified_skill else None
+
+    def match(uid, data):
+        if department and (data.get("department") or "").lower() != department.lower():
+            return False
+        if college and (data.get("college") or "").lower() != college.lower():
+            return False
+        if year is not None and data.get("year") != year:
+            return False
+        if skill and skill not in normalize_skills(data.get("skills")):
+            return False
+        if verified_skill:
+            verified = {str(k).lower().strip() for k, v in (data.get("verified_skills") or {}).items() if v}
+            if verified_skill not in verified:
+                return False
+        return True
+
+    return match
+
+
 @app.get("/users")
-def list_users():
-    all_users = database.users_ref.get() or {}
-    result = []
-    for uid, data in all_users.items():
-        item = {"user_id": uid}
-        item.update(data)
-        result.append(item)
-    return result
+def list_users(
+    request: Request,
+    cursor: str = None,
+    limit: int = Query(50, ge=1, le=200),
+    department: str = None,
+    college: str = None,
+    year: int = None,
+    skill: str = None,
+    verified_skill: str = None,
+    fields: str = None,
+):
+    """Paginated user directory. Pass the returned `next_cursor` back as `cursor` for the next page."""
+    wanted = [f.strip() for f in fields.split(",") if f.strip()] if fields else USER_SUMMARY_FIELDS
+    wanted = [f for f in wanted if f not in USER_HIDDEN_FIELDS]
+
+    match = _user_filter(department, college, year, skill, verified_skill)
+    page, next_cursor = database.list_users_page(cursor, limit, match, department=department, skill=skill)
+    users = []
+    for uid, data in page:
+        item = {"user_id": uid, **data}
+        users.append({f: item[f] for f in wanted if f in item})
+    body = {"users": users, "next_cursor": next_cursor}
+
+    etag = '"' + hashlib.sha1(json.dumps(body, sort_keys=True, default=str).encode()).hexdigest() + '"'
+    if etag in (request.headers.get("if-none-match") or ""):
+        return Response(status_code=304, headers={"ETag": etag})
+    return JSONResponse(body, headers={"ETag": etag})
+
+def _skill_list(value: str) -> List[str]:
+    return [s.strip() for s in (value or "").split(",") if s.strip()]
+
+
+@app.get("/skills/search")
+def search_skills(
+    all: str = None,
+    any: str = None,
+    verified: bool = False,
+    cursor: str = None,
+    limit: int = Query(50, ge=1, le=200),
+):
+    """Users with every skill in `all` and at least one in `any` (comma-separated); `verified` counts only verified skills."""
+    all_of, any_of = _skill_list(all), _skill_list(any)
+    if not all_of and not any_of:
+        raise HTTPException(status_code=400, detail="Pass skills in `all` and/or `any`")
+    try:
+        user_ids, total, next_cursor = skill_index.get_index().search(all_of, any_of, verified, cursor, limit)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    users = []
+    for uid in user_ids:
+        data = database.get_user(uid)
+        if data:
+            item = {"user_id": uid, **data}
+            users.append({f: item[f] for f in USER_SUMMARY_FIELDS if f in item})
+    return {"users": users, "total": total, "next_cursor": next_cursor}
+
+
+@app.get("/skills/autocomplete")
+def autocomplete_skills(prefix: str = "", limit: int = Query(10, ge=1, le=50)):
+    """Known skills starting with `prefix`, most used first."""
+    return skill_index.get_index().autocomplete(prefix, limit)
+
 
 @app.get("/users/{user_id}")
-def get_user(user_id: str):
-    user = database.get_user(user_id)
+async def get_user(user_id: str):
+    user = await async_database.get_user(user_id)
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
     return {"user_id": user_id, **user}
@@ -319,13 +623,16 @@ def patch_user(user_id: str, updates: dict):
     if not existing:
         raise HTTPException(status_code=404, detail="User not found")
     
-    database.update_user(user_id, updates)
+    try:
+        database.update_user(user_id, updates)
+    except database.UsernameTaken:
+        raise HTTPException(status_code=409, detail="Username already taken")
     updated = database.get_user(user_id)
     return {"user_id": user_id, **updated}
 
 @app.get("/users/{user_id}/skills")
-def get_user_skills(user_id: str):
-    user = database.get_user(user_id)
+async def get_user_skills(user_id: str):
+    user = await async_database.get_user(user_id)
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
     skills = user.get("skills") or []
@@ -333,8 +640,8 @@ def get_user_skills(user_id: str):
     return {"user_id": user_id, "skills": skills, "verified_skills": verified}
 
 @app.get("/users/by-username/{username}")
-def get_user_by_username(username: str):
-    user = database.get_user_by_username(username)
+async def get_user_by_username(username: str):
+    user = await async_database.get_user_by_username(username)
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
     return user
@@ -346,10 +653,10 @@ def verify_user_skill(user_id: str, skill_name: str, verifier_id: str = Query(No
     user = database.get_user(user_id)
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
-    success = database.verify_skill(user_id, skill_name, verifier_id)
-    if not success:
+    verification = database.verify_skill(user_id, skill_name, verifier_id)
+    if not verification:
         raise HTTPException(status_code=500, detail="Failed to verify skill")
-    return {"user_id": user_id, "skill": skill_name, "verified": True}
+    return {"user_id": user_id, "skill": skill_name, "verified": True, "verification": verification}
 
 @app.post("/users/{user_id}/skills/{skill_name}/unverify")
 def unverify_user_skill(user_id: str, skill_name: str):
@@ -359,4 +666,73 @@ def unverify_user_skill(user_id: str, skill_name: str):
     success = database.unverify_skill(user_id, skill_name)
     if not success:
         raise HTTPException(status_code=500, detail="Failed to unverify skill")
-    return {"user_id": user_id, "skill": skill_name, "verified": False}
\ No newline at end of file
+    return {"user_id": user_id, "skill": skill_name, "verified": False}
+
+
+class VerificationItem(BaseModel):
+    user_id: str
+    skill: str
+    verified: bool = True  # False removes the verification
+    score: float = None
+
+
+class BulkVerificationRequest(BaseModel):
+    verifier_id: str = None
+    items: List[VerificationItem]
+
+
+MAX_BULK_VERIFICATIONS = 500
+
+
+@app.post("/skills/verify/bulk")
+def verify_skills_bulk(req: BulkVerificationRequest):
+    """Verify or unverify many user skills in one atomic multi-location update."""
+    if len(req.items) > MAX_BULK_VERIFICATIONS:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_BULK_VERIFICATIONS} items per request")
+    # Writing under users/{id}/verified_skills would create a stub for an unknown id
+    missing = [uid for uid in dict.fromkeys(item.user_id for item in req.items) if not database.get_user(uid)]
+    if missing:
+        raise HTTPException(status_code=404, detail=f"Users not found: {', '.join(missing)}")
+    try:
+        written = database.set_verifications(
+            [(item.user_id, item.skill, item.verified, item.score) for item in req.items], req.verifier_id
+        )
+    except Exception as e:
+        print(f"verify_skills_bulk error: {e}")
+        raise HTTPException(status_code=500, detail="Failed to update verifications")
+    return {"updated": written}
+# --- DIAGNOSTICS ---
+
+@app.get("/stats/cache")
+def cache_stats():
+    return {
+        **database.cache_stats(),
+        "partners": partner_cache.stats(),
+        "skill_index": skill_index.stats(),
+        "chat": chat_hub.stats(),
+        "rtdb": {**async_database.rtdb.stats(), "reads": async_database.reads.stats()},
+        "quiz_bank": {**quiz.quiz_bank.stats(), **quiz.refill_worker.stats()},
+        "quiz_sessions": quiz.verification_sessions.stats(),
+        "llm": gateway.stats(),
+        "judge": judge.stats(),
+    }
+
+
+@app.on_event("startup")
+def start_users_mirror():
+    database.start_users_mirror()
+
+
+@app.on_event("shutdown")
+def stop_users_mirror():
+    database.users_mirror.close()
+
+
+@app.on_event("shutdown")
+async def close_rtdb_client():
+    await async_database.rtdb.aclose()
+
+
+@app.on_event("shutdown")
+def flush_quiz_bank():
+    quiz.quiz_bank.flush_served()
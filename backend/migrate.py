@@ -0,0 +1,34 @@
+"""
+One-shot maintenance commands for the Firebase data.
+
+Run from the backend directory, e.g.:
+    python migrate.py usernames
+    python migrate.py conversations
+"""
+
+import argparse
+
+from database import database
+
+
+def rebuild_usernames():
+    count = database.rebuild_username_index()
+    print(f"usernames: wrote {count} index entries")
+
+
+def rebuild_conversations():
+    count = database.rebuild_conversation_index()
+    print(f"conversations: indexed {count} conversations")
+
+
+COMMANDS = {
+    "usernames": rebuild_usernames,
+    "conversations": rebuild_conversations,
+}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="CollabQuest data migrations")
+    parser.add_argument("command", choices=sorted(COMMANDS))
+    args = parser.parse_args()
+    COMMANDS[args.command]()
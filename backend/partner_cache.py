@@ -0,0 +1,140 @@
+"""
+Materialized top-N partner lists, served by /partners/compatible.
+
+Each list holds the exact best N partners of one user as (score, user_id,
+reason) entries in ranking order. Lists are computed on first visit and then
+maintained incrementally from skill matrix changes: when a user's skills change
+only their own list is recomputed, and every other cached list just drops the
+user and re-inserts them if their new score beats that list's last entry.
+Profile fields (name, department, verified skills) are read from the matrix at
+serve time, so they never go stale.
+"""
+
+import os
+import threading
+from collections import OrderedDict
+from typing import List, Optional
+
+import skill_matrix
+
+TOP_N = int(os.getenv("PARTNER_CACHE_TOP_N", "50"))
+MAX_LISTS = int(os.getenv("PARTNER_CACHE_MAX_LISTS", "20000"))
+
+
+class PartnerList:
+    __slots__ = ("entries", "complete")
+
+    def __init__(self, entries: list, complete: bool):
+        # Invariant: entries are the exact top len(entries) partners. If
+        # `complete`, they are all of the user's possible partners.
+        self.entries = entries
+        self.complete = complete
+
+
+def _key(entry):
+    return (-entry[0], entry[1])
+
+
+class PartnerCache:
+    def __init__(self, top_n: int = TOP_N, max_lists: int = MAX_LISTS):
+        self.top_n = top_n
+        self.max_lists = max_lists
+        self._lists = OrderedDict()  # user_id -> PartnerList, LRU order
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _compute(self, matrix, user_id: str, vectors=None) -> PartnerList:
+        ranked = matrix.rank(user_id, self.top_n, vectors=vectors)
+        entries = [(item["score"], item["user_id"], item["reason"]) for item in ranked]
+        return PartnerList(entries, complete=len(entries) < self.top_n)
+
+    def _store(self, user_id: str, plist: PartnerList):
+        # caller holds the lock
+        self._lists[user_id] = plist
+        self._lists.move_to_end(user_id)
+        while len(self._lists) > self.max_lists:
+            self._lists.popitem(last=False)
+
+    def get(self, matrix, user_id: str, limit: int, department: Optional[str] = None) -> List[dict]:
+        """Top `limit` partners for user_id, optionally restricted to one department."""
+        if limit > self.top_n:
+            return matrix.rank(user_id, limit, department)
+        with self._lock:
+            plist = self._lists.get(user_id)
+            if plist is not None:
+                self._lists.move_to_end(user_id)
+        if plist is None or (len(plist.entries) < limit and not plist.complete):
+            self.misses += 1
+            plist = self._compute(matrix, user_id)
+            with self._lock:
+                self._store(user_id, plist)
+        else:
+            self.hits += 1
+
+        results = []
+        for score, uid, reason in plist.entries:
+            row = matrix.row_of.get(uid)
+            profile = matrix.profile(row) if row is not None else None
+            if profile is None:
+                continue
+            if department and (profile.get("department") or "").lower() != department.lower():
+                continue
+            results.append({**profile, "score": score, "reason": reason})
+            if len(results) == limit:
+                return results
+        if department and not plist.complete:
+            # Not enough of this department in the cached prefix; rank it live
+            return matrix.rank(user_id, limit, department)
+        return results
+
+    def on_change(self, matrix, user_id, skills_changed: bool):
+        if user_id is None:
+            with self._lock:
+                self._lists.clear()
+            return
+        if not skills_changed:
+            return
+
+        row = matrix.row_of.get(user_id)
+        vectors = matrix.score_vector(row) if row is not None else None
+        with self._lock:
+            cached = list(self._lists.items())
+        for other_id, plist in cached:
+            if other_id == user_id:
+                continue
+            entries = [e for e in plist.entries if e[1] != user_id]
+            if vectors is not None:
+                other_row = matrix.row_of.get(other_id)
+                if other_row is None:
+                    continue
+                scores, exact, cat_matches = vectors
+                # Compatibility is symmetric, so user_id's vector covers other_id too
+                score, reason = matrix.result(row, other_row, scores[other_row], exact[other_row], cat_matches[other_row])
+                entry = (score, user_id, reason)
+                if plist.complete or (entries and _key(entry) < _key(entries[-1])):
+                    entries.append(entry)
+                    entries.sort(key=_key)
+            complete = plist.complete
+            if len(entries) > self.top_n:
+                entries = entries[:self.top_n]
+                complete = False
+            with self._lock:
+                if self._lists.get(other_id) is plist:
+                    self._lists[other_id] = PartnerList(entries, complete)
+
+        if row is None:
+            with self._lock:
+                self._lists.pop(user_id, None)
+        elif user_id in self._lists:
+            plist = self._compute(matrix, user_id, vectors)
+            with self._lock:
+                self._store(user_id, plist)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"lists": len(self._lists), "hits": self.hits, "misses": self.misses}
+
+
+partner_cache = PartnerCache()
+skill_matrix.on_change(partner_cache.on_change)
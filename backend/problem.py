@@ -1,51 +1,100 @@
 
-import google.generativeai as genai
-from fastapi import APIRouter
+from fastapi import APIRouter, HTTPException, Query, Response
 from pydantic import BaseModel
 import os
 from dotenv import load_dotenv
-import json
 import cleanjson 
 load_dotenv()
-# Setup AI 
-GOOGLE_API_KEY = os.getenv("") 
-genai.configure(api_key=GOOGLE_API_KEY)
-model = genai.GenerativeModel('gemini-flash-latest')
+from llm_gateway import gateway
+from problem_catalog import ProblemCatalog, problem_id, problem_prompt
+from judge import JudgeFull, judge
 
 router = APIRouter()
+catalog = ProblemCatalog()
 
 # Models specific to coding problems
 class QuizRequest(BaseModel):
     skill: str          
+    difficulty: str = None
+    fresh: bool = False  # skip the catalogue and generate a new problem
 
 class CodeSubmission(BaseModel):
     skill: str
     problem_title: str
     user_code: str
+    problem_id: str = None  # catalogue problems with test cases are judged locally
+    language: str = "python"
+
+EXAMPLE_TESTS = 2
+
+def _public(problem: dict) -> dict:
+    # The test cases are the judge's answer key; only show the first few as examples
+    if not problem or "tests" not in problem:
+        return problem
+    public = {k: v for k, v in problem.items() if k != "tests"}
+    public["examples"] = problem["tests"][:EXAMPLE_TESTS]
+    return public
 
 @router.post("/generate-problem")
-def generate_problem(request: QuizRequest):
+async def generate_problem(request: QuizRequest):
+    """A problem for the skill, served from the catalogue; generated live only when it has none."""
     try:
-        prompt = f"""
-        Create a coding problem for: {request.skill}.
-        Format: JSON Object with title, description, requirements, starter_code.
-        """
-        response = model.generate_content(prompt)
-        clean_text = cleanjson.clean_ai_json(response.text)
-        return json.loads(clean_text)
+        if not request.fresh:
+            problem = catalog.pick(request.skill, request.difficulty)
+            if problem:
+                return _public(problem)
+        difficulty = request.difficulty or "medium"
+        problem = await gateway.generate_json(
+            problem_prompt(request.skill, difficulty), cleanjson.PROBLEM_SCHEMA, cache=not request.fresh
+        )
+        # add() returns None for a problem already in the catalogue; its id is still deterministic
+        catalog.add(request.skill, difficulty, problem)
+        return _public(catalog.get(problem_id(request.skill, difficulty, problem.get("title"))) or problem)
     except Exception as e:
         return {"error": str(e)}
 
-@router.post("/submit-solution")
-def submit_solution(request: CodeSubmission):
+@router.get("/problems")
+def list_problems(q: str = None, skill: str = None, difficulty: str = None,
+                  limit: int = Query(20, ge=1, le=100), offset: int = Query(0, ge=0)):
+    """Browse the catalogue, or full-text search it with `q`."""
+    return [_public(p) for p in catalog.search(q, skill, difficulty, limit, offset)]
+
+@router.get("/problems/{problem_id}")
+def get_problem(problem_id: str, response: Response):
+    problem = catalog.get(problem_id)
+    if not problem:
+        raise HTTPException(status_code=404, detail="Problem not found")
+    # ids are content hashes of skill/difficulty/title and problems are never edited
+    response.headers["Cache-Control"] = "public, max-age=86400"
+    response.headers["ETag"] = f'"{problem_id}"'
+    return _public(problem)
+
+@router.post("/submit-solution", status_code=202)
+async def submit_solution(request: CodeSubmission, response: Response):
+    """Queue a judge run for catalogue problems with tests (poll /submissions/{job_id}); otherwise ask the LLM."""
+    problem = catalog.get(request.problem_id) if request.problem_id else None
+    if problem and problem.get("tests") and problem.get("entry_point"):
+        try:
+            job = judge.submit(problem["id"], request.language, request.user_code, problem["entry_point"], problem["tests"])
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        except JudgeFull as e:
+            raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "5"})
+        return job.view()
+    response.status_code = 200
     try:
         prompt = f"""
         Judge this code for {request.skill}. Problem: {request.problem_title}.
         Code: {request.user_code}
         Return JSON: score, status, feedback.
         """
-        response = model.generate_content(prompt)
-        clean_text = cleanjson.clean_ai_json(response.text)
-        return json.loads(clean_text)
+        return await gateway.generate_json(prompt, cleanjson.JUDGEMENT_SCHEMA)
     except Exception as e:
-        return {"error": str(e)}
\ No newline at end of file
+        return {"error": str(e)}
+
+@router.get("/submissions/{job_id}")
+def get_submission(job_id: str):
+    job = judge.get(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Submission not found")
+    return job.view()
@@ -0,0 +1,217 @@
+"""
+Catalogue of pre-generated coding problems, keyed by skill and difficulty.
+
+/generate-problem used to make a live Gemini call on every click. Problems are
+now generated ahead of time by the batch job below and stored in SQLite with an
+FTS5 index over title, description, skill and tags for browse/search. A
+problem's id is a hash of its skill, difficulty and title, so regenerating the
+same problem never duplicates it and an id always names the same content
+(safe to cache forever by id).
+
+Batch generation, run from the backend directory:
+    python problem_catalog.py generate --skills python,react --per 20
+    python problem_catalog.py stats
+"""
+
+import argparse
+import asyncio
+import hashlib
+import json
+import os
+import random
+import sqlite3
+import threading
+import time
+
+CATALOG_PATH = os.getenv(
+    "PROBLEM_CATALOG_PATH", os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache", "problems.sqlite3")
+)
+DIFFICULTIES = ("easy", "medium", "hard")
+PROBLEM_FIELDS = ("title", "description", "requirements", "starter_code", "tags", "entry_point", "tests")
+
+
+def _norm(text) -> str:
+    return " ".join(str(text or "").lower().split())
+
+
+def problem_id(skill: str, difficulty: str, title: str) -> str:
+    """Deterministic id: the same skill, difficulty and title always map to the same id."""
+    return hashlib.sha1(f"{_norm(skill)}|{_norm(difficulty)}|{_norm(title)}".encode("utf-8")).hexdigest()[:16]
+
+
+def _fts_query(text: str) -> str:
+    # Quote each word so user input can't use FTS5 syntax; prefix-match the last one
+    words = [w.replace('"', '""') for w in str(text).split()]
+    if not words:
+        return ""
+    return " ".join(f'"{w}"' for w in words[:-1]) + (" " if len(words) > 1 else "") + f'"{words[-1]}"*'
+
+
+class ProblemCatalog:
+    def __init__(self, path: str = CATALOG_PATH):
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS problems (
+                seq INTEGER PRIMARY KEY,
+                id TEXT UNIQUE NOT NULL,
+                skill TEXT NOT NULL,
+                difficulty TEXT NOT NULL,
+                title TEXT NOT NULL,
+                body TEXT NOT NULL,
+                created_at REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS problems_skill ON problems (skill, difficulty);
+            CREATE VIRTUAL TABLE IF NOT EXISTS problems_fts USING fts5(
+                title, description, skill, tags, content=''
+            );
+            """
+        )
+        self._conn.commit()
+        self._lock = threading.Lock()
+        self.served = 0
+
+    def add(self, skill: str, difficulty: str, problem: dict):
+        """Store a generated problem. Returns its id, or None if it is invalid or already present."""
+        if not isinstance(problem, dict) or not str(problem.get("title") or "").strip():
+            return None
+        skill, difficulty = _norm(skill), _norm(difficulty)
+        pid = problem_id(skill, difficulty, problem["title"])
+        body = {k: problem[k] for k in PROBLEM_FIELDS if k in problem}
+        tags = body.get("tags") if isinstance(body.get("tags"), list) else []
+        with self._lock:
+            cursor = self._conn.execute(
+                "INSERT OR IGNORE INTO problems (id, skill, difficulty, title, body, created_at) VALUES (?, ?, ?, ?, ?, ?)",
+                (pid, skill, difficulty, body["title"], json.dumps(body), time.time()),
+            )
+            if not cursor.rowcount:
+                return None
+            self._conn.execute(
+                "INSERT INTO problems_fts (rowid, title, description, skill, tags) VALUES (?, ?, ?, ?, ?)",
+                (cursor.lastrowid, body["title"], str(body.get("description") or ""), skill, " ".join(map(str, tags))),
+            )
+            self._conn.commit()
+        return pid
+
+    @staticmethod
+    def _row(row) -> dict:
+        pid, skill, difficulty, body = row
+        return {"id": pid, "skill": skill, "difficulty": difficulty, **json.loads(body)}
+
+    def get(self, pid: str):
+        with self._lock:
+            row = self._conn.execute("SELECT id, skill, difficulty, body FROM problems WHERE id = ?", (pid,)).fetchone()
+        return self._row(row) if row else None
+
+    def pick(self, skill: str, difficulty: str = None):
+        """A random stored problem for skill (and difficulty, if given), or None."""
+        clauses, params = ["skill = ?"], [_norm(skill)]
+        if difficulty:
+            clauses.append("difficulty = ?")
+            params.append(_norm(difficulty))
+        where = " AND ".join(clauses)
+        with self._lock:
+            count = self._conn.execute(f"SELECT COUNT(*) FROM problems WHERE {where}", params).fetchone()[0]
+            if not count:
+                return None
+            row = self._conn.execute(
+                f"SELECT id, skill, difficulty, body FROM problems WHERE {where} LIMIT 1 OFFSET ?",
+                params + [random.randrange(count)],
+            ).fetchone()
+            self.served += 1
+        return self._row(row)
+
+    def search(self, query: str = None, skill: str = None, difficulty: str = None, limit: int = 20, offset: int = 0):
+        """Browse or full-text search. Best matches first when `query` is given, else newest first."""
+        clauses, params = [], []
+        if skill:
+            clauses.append("p.skill = ?")
+            params.append(_norm(skill))
+        if difficulty:
+            clauses.append("p.difficulty = ?")
+            params.append(_norm(difficulty))
+        match = _fts_query(query) if query else ""
+        if match:
+            sql = ("SELECT p.id, p.skill, p.difficulty, p.body FROM problems_fts f JOIN problems p ON p.seq = f.rowid "
+                   "WHERE problems_fts MATCH ?" + "".join(f" AND {c}" for c in clauses) + " ORDER BY f.rank")
+            params.insert(0, match)
+        else:
+            sql = ("SELECT p.id, p.skill, p.difficulty, p.body FROM problems p"
+                   + (" WHERE " + " AND ".join(clauses) if clauses else "") + " ORDER BY p.seq DESC")
+        with self._lock:
+            rows = self._conn.execute(sql + " LIMIT ? OFFSET ?", params + [limit, offset]).fetchall()
+        return [self._row(row) for row in rows]
+
+    def counts(self) -> dict:
+        """{skill: {difficulty: count}}"""
+        with self._lock:
+            rows = self._conn.execute("SELECT skill, difficulty, COUNT(*) FROM problems GROUP BY skill, difficulty").fetchall()
+        counts = {}
+        for skill, difficulty, count in rows:
+            counts.setdefault(skill, {})[difficulty] = count
+        return counts
+
+    def stats(self) -> dict:
+        with self._lock:
+            total = self._conn.execute("SELECT COUNT(*) FROM problems").fetchone()[0]
+        return {"problems": total, "served": self.served}
+
+
+def problem_prompt(skill: str, difficulty: str) -> str:
+    return f"""
+    Create a {difficulty} coding problem for: {skill}, solved by one Python function.
+    Format: JSON Object with title, description, requirements, starter_code, tags,
+    entry_point (the function name), and tests: a list of at least 5 objects
+    {{"args": [positional arguments], "expected": return value}} using only JSON values.
+    """
+
+
+async def generate_batch(catalog: ProblemCatalog, skills: list, difficulties: list, per: int,
+                         max_attempts_factor: int = 3) -> dict:
+    """Fill the catalogue up to `per` problems for every (skill, difficulty). Returns how many were added."""
+    from llm_gateway import gateway
+    import cleanjson
+
+    counts = catalog.counts()
+    added = {}
+
+    async def fill(skill, difficulty):
+        have = counts.get(_norm(skill), {}).get(_norm(difficulty), 0)
+        attempts = 0
+        while have < per and attempts < per * max_attempts_factor:
+            attempts += 1
+            try:
+                problem = await gateway.generate_json(problem_prompt(skill, difficulty), cleanjson.PROBLEM_SCHEMA, cache=False)
+            except Exception as e:
+                print(f"{skill}/{difficulty}: generation failed: {e}")
+                continue
+            if catalog.add(skill, difficulty, problem):
+                have += 1
+                added[(skill, difficulty)] = added.get((skill, difficulty), 0) + 1
+
+    # the gateway's rate limit and semaphore bound the actual LLM concurrency
+    await asyncio.gather(*(fill(s, d) for s in skills for d in difficulties))
+    return added
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="CollabQuest problem catalogue")
+    sub = parser.add_subparsers(dest="command", required=True)
+    gen = sub.add_parser("generate", help="pre-generate problems")
+    gen.add_argument("--skills", required=True, help="comma-separated skills")
+    gen.add_argument("--difficulties", default=",".join(DIFFICULTIES))
+    gen.add_argument("--per", type=int, default=10, help="target problems per skill and difficulty")
+    sub.add_parser("stats", help="show problem counts")
+    args = parser.parse_args()
+
+    catalog = ProblemCatalog()
+    if args.command == "generate":
+        skills = [s.strip() for s in args.skills.split(",") if s.strip()]
+        difficulties = [d.strip() for d in args.difficulties.split(",") if d.strip()]
+        added = asyncio.run(generate_batch(catalog, skills, difficulties, args.per))
+        for (skill, difficulty), count in sorted(added.items()):
+            print(f"{skill}/{difficulty}: +{count}")
+    print(json.dumps(catalog.counts(), indent=2))
@@ -1,20 +1,19 @@
-import google.generativeai as genai
 from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel
-import json
+import asyncio
+import cleanjson
 import uuid
 from database import database
+from llm_gateway import gateway
+from quiz_bank import QUIZ_SIZE, QuizBank, RefillWorker
+from session_store import make_store
 
 # --- 1. SETUP ROUTER ---
 router = APIRouter() 
 
 # --- 2. CONFIG & STATE ---
-GOOGLE_API_KEY = "" 
-genai.configure(api_key=GOOGLE_API_KEY)
-model = genai.GenerativeModel('gemini-flash-latest')
-
-# Store sessions here since the routes are here
-verification_sessions = {}
+# Sessions live from /start to /submit; see session_store for backends and expiry
+verification_sessions = make_store()
 
 # --- 3. MODELS ---
 class VerificationStartRequest(BaseModel):
@@ -26,63 +25,60 @@ class VerificationSubmitRequest(BaseModel):
     answers: dict
 
 # --- 4. HELPER FUNCTIONS ---
-def clean_ai_json(text):
-    text = text.replace("```json", "").replace("```", "")
-    start = text.find('[')
-    end = text.rfind(']') + 1
-    if start != -1 and end != 0:
-        text = text[start:end]
-    return text.strip()
-
-def generate_quiz_ai(skill):
-    # (Same AI generation logic as before)
+async def generate_quiz_ai(skill, cache=True):
     prompt = f"""
     Generate 10 MCQ questions for {skill}.
     Format: JSON Array with keys: id, question, options, correct_answer.
     """
     try:
-        response = model.generate_content(prompt)
-        clean_text = clean_ai_json(response.text)
-        return json.loads(clean_text)
-    except Exception:
+        return await gateway.generate_json(prompt, cleanjson.QUIZ_SCHEMA, cache=cache)
+    except Exception as e:
+        print(f"Quiz generation error: {e}")
         return None
 
 # --- 5. ROUTES (Notice we use @router, not @app) ---
 
+# Questions are served from the bank; Gemini only tops it up in the background
+quiz_bank = QuizBank()
+refill_worker = RefillWorker(quiz_bank, generate_quiz_ai)
+
 @router.post("/start")  # This becomes /verification/start in main.py
-def start_verification(req: VerificationStartRequest):
-    questions = generate_quiz_ai(req.skill)
-    
+async def start_verification(req: VerificationStartRequest):
+    questions = quiz_bank.sample(req.skill, QUIZ_SIZE)
     if not questions:
-        raise HTTPException(status_code=500, detail="AI failed")
+        # Skill never seen before: generate once live and keep the batch
+        generated = await generate_quiz_ai(req.skill)
+        if not generated:
+            raise HTTPException(status_code=500, detail="AI failed")
+        await asyncio.to_thread(quiz_bank.add, req.skill, generated)
+        questions = quiz_bank.sample(req.skill, QUIZ_SIZE)
+        if not questions:
+            raise HTTPException(status_code=500, detail="AI failed")
+    if quiz_bank.needs_refill(req.skill):
+        refill_worker.request(req.skill)
 
     # Separate answers for security
-    answers_map = {}
-    safe_questions = []
-    
-    for q in questions:
-        qid = str(q.get('id'))
-        answers_map[qid] = q.get('correct_answer')
-        q_copy = {k: v for k, v in q.items() if k != 'correct_answer'}
-        safe_questions.append(q_copy)
+    safe_questions = [{k: v for k, v in q.items() if k != 'correct_answer'} for q in questions]
 
+    # Only ids and answers are kept; question text is looked up in the bank on submit
     session_id = uuid.uuid4().hex
-    verification_sessions[session_id] = {
+    await asyncio.to_thread(verification_sessions.put, session_id, {
         'user_id': req.user_id,
         'skill': req.skill,
-        'answers': answers_map,
-        'questions_full': {str(q.get('id')): q for q in questions}
-    }
+        'question_ids': [q['id'] for q in questions],
+        'answers': [q['correct_answer'] for q in questions],
+    })
 
     return {'session_id': session_id, 'questions': safe_questions}
 
 
 @router.post("/submit") # This becomes /verification/submit
 def submit_verification(req: VerificationSubmitRequest):
-    session = verification_sessions.get(req.session_id)
+    # pop, not get: a session can only be submitted once, even across workers
+    session = verification_sessions.pop(req.session_id)
     if not session:
         raise HTTPException(status_code=404, detail='Session not found')
-    correct_map = session['answers']
+    correct_map = dict(zip(session['question_ids'], session['answers']))
     correct = 0
     for qid, correct_ans in correct_map.items():
         user_ans = req.answers.get(qid)
@@ -94,7 +90,7 @@ def submit_verification(req: VerificationSubmitRequest):
     passed = score_percent >= 60.0
 
     # build solutions with question text, options, correct_answer, your_answer
-    qfull = session.get('questions_full', {}) or {}
+    qfull = quiz_bank.get_many(session['question_ids'])
     solutions = []
     for qid, correct_ans in correct_map.items():
         qobj = qfull.get(qid, {})
@@ -109,13 +105,10 @@ def submit_verification(req: VerificationSubmitRequest):
     # mark verified if passed
     if passed:
         try:
-            database.verify_skill(session['user_id'], session['skill'])
+            database.verify_skill(session['user_id'], session['skill'], verifier_id="quiz", score=score_percent)
         except Exception as e:
             print(f"Error marking verified: {e}")
 
-    # Cleanup
-    del verification_sessions[req.session_id]
-
     return {
         'user_id': session['user_id'],
         'skill': session['skill'],
@@ -0,0 +1,215 @@
+"""
+Per-skill bank of pre-generated verification questions.
+
+/verification/start used to wait on a live Gemini call for every attempt. The
+bank keeps validated, de-duplicated questions per normalized skill in SQLite
+(and in memory once a skill has been asked for), so starting a quiz is a random
+sample. When a skill's pool drops below LOW_WATER usable questions a background
+refill generates batches until it reaches HIGH_WATER; at most CONCURRENCY
+generations run at once and each skill has at most one refill in flight.
+
+Questions are retired once they are older than MAX_AGE_DAYS or have been served
+MAX_SERVES times, so frequently verified skills rotate through fresh ones.
+"""
+
+import asyncio
+import hashlib
+import json
+import os
+import random
+import sqlite3
+import threading
+import time
+from collections import Counter
+
+QUIZ_SIZE = 10
+BANK_PATH = os.getenv(
+    "QUIZ_BANK_PATH", os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache", "quiz_bank.sqlite3")
+)
+LOW_WATER = int(os.getenv("QUIZ_BANK_LOW_WATER", "30"))
+HIGH_WATER = int(os.getenv("QUIZ_BANK_HIGH_WATER", "100"))
+MAX_AGE_DAYS = float(os.getenv("QUIZ_BANK_MAX_AGE_DAYS", "30"))
+MAX_SERVES = int(os.getenv("QUIZ_BANK_MAX_SERVES", "200"))
+CONCURRENCY = int(os.getenv("QUIZ_BANK_CONCURRENCY", "2"))
+# A refill gives up after this many batches in a row that add nothing new
+MAX_STALE_BATCHES = 3
+
+
+def normalize_skill(skill: str) -> str:
+    return " ".join(str(skill).lower().split())
+
+
+def fingerprint(question: dict) -> str:
+    """Identity of a question for de-duplication: its text and options, case- and space-insensitive."""
+    text = " ".join(str(question.get("question", "")).lower().split())
+    options = sorted(" ".join(str(o).lower().split()) for o in question.get("options") or [])
+    return hashlib.sha1(json.dumps([text, options]).encode("utf-8")).hexdigest()
+
+
+def _valid(question) -> bool:
+    if not isinstance(question, dict):
+        return False
+    options = question.get("options")
+    return (
+        bool(str(question.get("question") or "").strip())
+        and isinstance(options, list) and len(options) >= 2
+        and question.get("correct_answer") is not None
+    )
+
+
+class QuizBank:
+    def __init__(self, path: str = BANK_PATH, max_age_days: float = MAX_AGE_DAYS, max_serves: int = MAX_SERVES):
+        self.path = path
+        self.max_age = max_age_days * 86400
+        self.max_serves = max_serves
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS questions ("
+            " id INTEGER PRIMARY KEY, skill TEXT NOT NULL, fingerprint TEXT NOT NULL,"
+            " body TEXT NOT NULL, created_at REAL NOT NULL, served INTEGER NOT NULL DEFAULT 0,"
+            " UNIQUE (skill, fingerprint))"
+        )
+        self._conn.commit()
+        self._lock = threading.Lock()
+        self._pools = {}  # skill -> [question dict with "id"], loaded on first use
+        self._served = Counter()  # question id -> serves not yet written to SQLite
+        self.samples = 0
+
+    def _pool(self, skill: str) -> list:
+        # caller holds the lock
+        pool = self._pools.get(skill)
+        if pool is None:
+            rows = self._conn.execute(
+                "SELECT id, body FROM questions WHERE skill = ? AND created_at >= ? AND served < ?",
+                (skill, time.time() - self.max_age, self.max_serves),
+            ).fetchall()
+            pool = self._pools[skill] = [{"id": str(qid), **json.loads(body)} for qid, body in rows]
+        return pool
+
+    def size(self, skill: str) -> int:
+        with self._lock:
+            return len(self._pool(normalize_skill(skill)))
+
+    def needs_refill(self, skill: str) -> bool:
+        return self.size(skill) < LOW_WATER
+
+    def sample(self, skill: str, n: int = QUIZ_SIZE) -> list:
+        """Up to n random questions (with correct_answer) for skill; [] if the bank has none."""
+        skill = normalize_skill(skill)
+        with self._lock:
+            pool = self._pool(skill)
+            picked = random.sample(pool, min(n, len(pool)))
+            for question in picked:
+                self._served[question["id"]] += 1
+            self.samples += 1
+        return [dict(q) for q in picked]
+
+    def get_many(self, question_ids: list) -> dict:
+        """{id: question} for the ids still in the bank."""
+        ids = [int(qid) for qid in question_ids]
+        if not ids:
+            return {}
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT id, body FROM questions WHERE id IN ({','.join('?' * len(ids))})", ids
+            ).fetchall()
+        return {str(qid): {"id": str(qid), **json.loads(body)} for qid, body in rows}
+
+    def add(self, skill: str, questions: list) -> int:
+        """Store generated questions, skipping invalid ones and duplicates. Returns how many were new."""
+        skill = normalize_skill(skill)
+        now = time.time()
+        added = []
+        with self._lock:
+            for question in questions or []:
+                if not _valid(question):
+                    continue
+                body = {k: question[k] for k in ("question", "options", "correct_answer")}
+                cursor = self._conn.execute(
+                    "INSERT OR IGNORE INTO questions (skill, fingerprint, body, created_at) VALUES (?, ?, ?, ?)",
+                    (skill, fingerprint(question), json.dumps(body), now),
+                )
+                if cursor.rowcount:
+                    added.append({"id": str(cursor.lastrowid), **body})
+            self._conn.commit()
+            if skill in self._pools:
+                self._pools[skill].extend(added)
+        return len(added)
+
+    def flush_served(self):
+        with self._lock:
+            served, self._served = self._served, Counter()
+            self._conn.executemany(
+                "UPDATE questions SET served = served + ? WHERE id = ?",
+                [(count, int(qid)) for qid, count in served.items()],
+            )
+            self._conn.commit()
+
+    def evict(self) -> int:
+        """Delete stale and over-served questions. Returns how many were removed."""
+        self.flush_served()
+        with self._lock:
+            cursor = self._conn.execute(
+                "DELETE FROM questions WHERE created_at < ? OR served >= ?",
+                (time.time() - self.max_age, self.max_serves),
+            )
+            self._conn.commit()
+            if cursor.rowcount:
+                self._pools.clear()  # reloaded lazily without the retired questions
+        return cursor.rowcount
+
+    def stats(self) -> dict:
+        with self._lock:
+            total = self._conn.execute("SELECT COUNT(*) FROM questions").fetchone()[0]
+            return {"questions": total, "skills_loaded": len(self._pools), "samples": self.samples}
+
+
+class RefillWorker:
+    """Tops up skills in the background on the running event loop."""
+
+    def __init__(self, bank: QuizBank, generate, concurrency: int = CONCURRENCY):
+        self.bank = bank
+        self.generate = generate  # async generate(skill, cache=False) -> list of questions or None
+        self.concurrency = concurrency
+        self._semaphore = None
+        self._pending = {}  # skill -> refill task
+        self.generated = 0
+        self.failed = 0
+
+    def request(self, skill: str):
+        """Schedule a refill of skill unless one is already running. Call from the event loop."""
+        skill = normalize_skill(skill)
+        if skill in self._pending:
+            return
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.concurrency)
+        task = asyncio.get_running_loop().create_task(self._refill(skill))
+        self._pending[skill] = task
+        task.add_done_callback(lambda _: self._pending.pop(skill, None))
+
+    async def _refill(self, skill: str):
+        await asyncio.to_thread(self.bank.evict)
+        stale = 0
+        while stale < MAX_STALE_BATCHES and self.bank.size(skill) < HIGH_WATER:
+            async with self._semaphore:
+                try:
+                    # uncached: a repeated prompt must still produce a fresh batch
+                    questions = await self.generate(skill, cache=False)
+                except Exception as e:
+                    print(f"Quiz bank refill error for {skill}: {e}")
+                    questions = None
+            added = await asyncio.to_thread(self.bank.add, skill, questions) if questions else 0
+            self.generated += added
+            if added:
+                stale = 0
+            else:
+                stale += 1
+            if questions is None:
+                self.failed += 1
+        print(f"quiz_bank: {skill} has {self.bank.size(skill)} questions")
+
+    def stats(self) -> dict:
+        return {"refilling": sorted(self._pending), "generated": self.generated, "failed_batches": self.failed}
@@ -0,0 +1,235 @@
+"""
+Optional semantic compatibility scoring.
+
+Keyword scoring only counts identical skill strings, so "ml" vs "machine learning"
+or "postgres" vs "postgresql" never match. This mode embeds every distinct
+normalized skill once and counts two skills as matching when their embeddings
+are close, then applies the same 50/40/10 formula as `c_score`.
+
+Embeddings are stored in a memory-mapped float16 matrix (one row per skill,
+keyed by the normalized skill string), so they are computed once and shared
+across restarts and workers. The sentence-transformers model is loaded lazily
+on first use; set SEMANTIC_BACKEND=hash (or run without the package installed)
+to use a deterministic hashed n-gram embedding that needs no weights.
+"""
+
+import hashlib
+import os
+import threading
+from typing import List, Tuple, Union
+
+import numpy as np
+
+try:
+    import fcntl
+except ImportError:  # Windows: single-process use only
+    fcntl = None
+
+from c_score import categorize_skill, compatibility_reason, normalize_skills
+
+MODEL_NAME = os.getenv("SEMANTIC_MODEL", "all-MiniLM-L6-v2")
+BACKEND = os.getenv("SEMANTIC_BACKEND", "auto")  # auto | model | hash
+MATCH_THRESHOLD = float(os.getenv("SEMANTIC_MATCH_THRESHOLD", "0.8"))
+CACHE_DIR = os.getenv(
+    "SEMANTIC_CACHE_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache", "embeddings")
+)
+
+
+class HashedEmbedder:
+    """Deterministic bag of hashed words and character trigrams. No downloads."""
+
+    name = "hashed-ngrams"
+
+    def __init__(self, dim: int = 384):
+        self.dim = dim
+
+    def _features(self, text: str):
+        words = text.split()
+        yield from words
+        padded = f" {text} "
+        for i in range(len(padded) - 2):
+            yield padded[i:i + 3]
+
+    def encode(self, texts: List[str]) -> np.ndarray:
+        out = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for feature in self._features(text):
+                digest = hashlib.blake2b(feature.encode("utf-8"), digest_size=8).digest()
+                value = int.from_bytes(digest, "little")
+                out[row, value % self.dim] += 1.0 if (value >> 63) & 1 else -1.0
+        norms = np.linalg.norm(out, axis=1, keepdims=True)
+        return out / np.where(norms == 0, 1, norms)
+
+
+class SentenceTransformerEmbedder:
+    """sentence-transformers model, loaded on first encode()."""
+
+    def __init__(self, model_name: str = MODEL_NAME):
+        self.name = model_name
+        self._model = None
+        self._lock = threading.Lock()
+
+    def _load(self):
+        with self._lock:
+            if self._model is None:
+                from sentence_transformers import SentenceTransformer
+                print(f"semantic_score: loading model {self.name}")
+                self._model = SentenceTransformer(self.name)
+        return self._model
+
+    def encode(self, texts: List[str]) -> np.ndarray:
+        return self._load().encode(texts, batch_size=64, normalize_embeddings=True).astype(np.float32)
+
+
+class EmbeddingStore:
+    """Append-only float16 embedding matrix on disk, keyed by normalized skill."""
+
+    def __init__(self, embedder, directory: str):
+        self.embedder = embedder
+        self.directory = directory
+        self.dim = None
+        self.index = {}
+        self._matrix = None
+        self._lock = threading.Lock()
+        self._load()
+
+    @property
+    def _vectors_path(self):
+        return os.path.join(self.directory, "vectors.f16")
+
+    @property
+    def _vocab_path(self):
+        return os.path.join(self.directory, "vocab.txt")
+
+    def _load(self):
+        if not os.path.exists(self._vocab_path):
+            return
+        with open(self._vocab_path, encoding="utf-8") as f:
+            header = f.readline()
+            self.dim = int(header.strip())
+            skills = [line.rstrip("\n") for line in f]
+        self.index = {skill: i for i, skill in enumerate(skills)}
+        self._map(len(skills))
+
+    def _map(self, rows: int):
+        if rows:
+            self._matrix = np.memmap(self._vectors_path, dtype=np.float16, mode="r", shape=(rows, self.dim))
+
+    def _append(self, skills: List[str], vectors: np.ndarray):
+        # caller holds both locks
+        if self.dim is None:
+            self.dim = vectors.shape[1]
+            with open(self._vocab_path, "w", encoding="utf-8") as f:
+                f.write(f"{self.dim}\n")
+        with open(self._vectors_path, "ab") as f:
+            f.write(vectors.astype(np.float16).tobytes())
+        with open(self._vocab_path, "a", encoding="utf-8") as f:
+            for skill in skills:
+                f.write(skill + "\n")
+        for skill in skills:
+            self.index[skill] = len(self.index)
+        self._map(len(self.index))
+
+    def _add_missing(self, skills: List[str]):
+        # caller holds the lock; the file lock keeps other workers' appends whole
+        os.makedirs(self.directory, exist_ok=True)
+        with open(os.path.join(self.directory, ".lock"), "w") as lock_file:
+            if fcntl:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+            self._load()  # pick up skills appended by other processes
+            unseen = [s for s in dict.fromkeys(skills) if s not in self.index]
+            if unseen:
+                self._append(unseen, self.embedder.encode(unseen))
+
+    def vectors(self, skills: List[str]) -> np.ndarray:
+        """float32 (len(skills), dim) embeddings, computing unseen skills in one batch."""
+        skills = [s.replace("\n", " ") for s in skills]  # vocab.txt is line-based
+        with self._lock:
+            if any(s not in self.index for s in skills):
+                self._add_missing(skills)
+            if not skills:
+                return np.zeros((0, self.dim or 0), dtype=np.float32)
+            return np.asarray(self._matrix[[self.index[s] for s in skills]], dtype=np.float32)
+
+
+def _make_embedder():
+    if BACKEND == "hash":
+        return HashedEmbedder()
+    try:
+        import sentence_transformers  # noqa: F401
+    except ImportError:
+        if BACKEND == "model":
+            raise
+        print("semantic_score: sentence-transformers not installed, using hashed embeddings")
+        return HashedEmbedder()
+    return SentenceTransformerEmbedder()
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_store() -> EmbeddingStore:
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                embedder = _make_embedder()
+                directory = os.path.join(CACHE_DIR, embedder.name.replace("/", "__"))
+                _store = EmbeddingStore(embedder, directory)
+    return _store
+
+
+def _semantic_matches(similarity: np.ndarray) -> float:
+    """Skills on each side with a close counterpart on the other, averaged over both sides."""
+    close = similarity >= MATCH_THRESHOLD
+    return (close.any(axis=1).sum() + close.any(axis=0).sum()) / 2
+
+
+def semantic_scores(base_skills: Union[List, dict], others: List[Union[List, dict]]) -> List[Tuple[float, str]]:
+    """Score base_skills against many skill lists with one matrix product."""
+    store = get_store()
+    skills1 = normalize_skills(base_skills)
+    others = [normalize_skills(o) for o in others]
+    set1 = list(dict.fromkeys(skills1))
+    cats1 = {categorize_skill(s) for s in skills1}
+
+    flat = [s for skills in others for s in dict.fromkeys(skills)]
+    similarity = store.vectors(set1) @ store.vectors(flat).T if set1 and flat else None
+
+    results = []
+    offset = 0
+    for skills2 in others:
+        set2 = list(dict.fromkeys(skills2))
+        if not skills1 and not skills2:
+            results.append((50, "Both users have no skills listed yet"))
+        elif not skills1 or not skills2:
+            results.append((40, f"One user has no skills, limited collaboration potential"))
+        else:
+            matches = _semantic_matches(similarity[:, offset:offset + len(set2)])
+            cats2 = {categorize_skill(s) for s in skills2}
+            cat_matches = len(cats1 & cats2)
+            exact_match_ratio = min(1.0, matches / max(len(skills1), len(skills2)))
+            category_overlap_ratio = cat_matches / len(cats1 | cats2)
+            complementarity = min(50, (len(skills1) + len(skills2)) / 2) / 50
+            score = (exact_match_ratio * 50) + (category_overlap_ratio * 40) + (complementarity * 10)
+            score = max(0, min(100, score))
+            reason = compatibility_reason(int(round(matches)), cat_matches).replace("exact skill", "close skill")
+            results.append((round(float(score), 1), reason))
+        offset += len(set2)
+    return results
+
+
+def get_semantic_compatibility_score(member1_skills: Union[List, dict], member2_skills: Union[List, dict]) -> Tuple[float, str]:
+    """Semantic counterpart of c_score.get_compatibility_score."""
+    return semantic_scores(member1_skills, [member2_skills])[0]
+
+
+if __name__ == "__main__":
+    pairs = [
+        (["ML", "Python"], ["Machine Learning", "python"]),
+        (["Postgres"], ["PostgreSQL"]),
+        (["React"], ["Embedded Systems"]),
+    ]
+    for a, b in pairs:
+        print(f"{a} vs {b}: {get_semantic_compatibility_score(a, b)}")
@@ -0,0 +1,183 @@
+"""
+Expiring storage for verification quiz sessions.
+
+A session only needs to live from /verification/start to /submit, so every
+entry carries an expiry and a sweeper thread drops abandoned ones. Stores are
+capped at `max_sessions`; when full, the sessions closest to expiry are evicted
+first. Values are small JSON-able dicts (question ids and correct answers; the
+question text stays in the quiz bank).
+
+QUIZ_SESSION_STORE selects the backend:
+    memory              per-process dict, fastest, single worker only
+    sqlite[:///path]    shared file, so any uvicorn worker can finish a quiz (default)
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+SESSION_TTL = float(os.getenv("QUIZ_SESSION_TTL", "1800"))
+MAX_SESSIONS = int(os.getenv("QUIZ_SESSION_MAX", "10000"))
+SWEEP_SECONDS = float(os.getenv("QUIZ_SESSION_SWEEP_SECONDS", "60"))
+DEFAULT_SQLITE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache", "quiz_sessions.sqlite3")
+
+
+class MemorySessionStore:
+    def __init__(self, ttl: float = SESSION_TTL, max_sessions: int = MAX_SESSIONS):
+        self.ttl = ttl
+        self.max_sessions = max_sessions
+        self._sessions = OrderedDict()  # session_id -> (expires_at, data), in expiry order
+        self._lock = threading.Lock()
+        self.expired = 0
+        self.evicted = 0
+
+    def put(self, session_id: str, data: dict):
+        with self._lock:
+            self._sessions[session_id] = (time.time() + self.ttl, data)
+            self._sessions.move_to_end(session_id)
+            while len(self._sessions) > self.max_sessions:
+                self._sessions.popitem(last=False)
+                self.evicted += 1
+
+    def get(self, session_id: str):
+        with self._lock:
+            entry = self._sessions.get(session_id)
+            if entry is None:
+                return None
+            if entry[0] < time.time():
+                del self._sessions[session_id]
+                self.expired += 1
+                return None
+            return entry[1]
+
+    def pop(self, session_id: str):
+        """Remove and return a live session, so it can only be submitted once."""
+        with self._lock:
+            entry = self._sessions.pop(session_id, None)
+        if entry is None or entry[0] < time.time():
+            return None
+        return entry[1]
+
+    def sweep(self) -> int:
+        now = time.time()
+        removed = 0
+        with self._lock:
+            # Every entry has the same ttl, so insertion order is expiry order
+            while self._sessions:
+                session_id, (expires_at, _) = next(iter(self._sessions.items()))
+                if expires_at >= now:
+                    break
+                del self._sessions[session_id]
+                removed += 1
+            self.expired += removed
+        return removed
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"backend": "memory", "sessions": len(self._sessions), "expired": self.expired, "evicted": self.evicted}
+
+
+class SQLiteSessionStore:
+    """Sessions in a SQLite file shared by every worker on the host."""
+
+    def __init__(self, path: str = DEFAULT_SQLITE_PATH, ttl: float = SESSION_TTL, max_sessions: int = MAX_SESSIONS):
+        self.ttl = ttl
+        self.max_sessions = max_sessions
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None, timeout=10)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS sessions (id TEXT PRIMARY KEY, data TEXT NOT NULL, expires_at REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS sessions_expiry ON sessions (expires_at)")
+        self._lock = threading.Lock()
+        self.expired = 0
+        self.evicted = 0
+
+    def put(self, session_id: str, data: dict):
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO sessions (id, data, expires_at) VALUES (?, ?, ?)",
+                    (session_id, json.dumps(data, separators=(",", ":")), time.time() + self.ttl),
+                )
+                excess = self._conn.execute("SELECT COUNT(*) FROM sessions").fetchone()[0] - self.max_sessions
+                if excess > 0:
+                    self._conn.execute(
+                        "DELETE FROM sessions WHERE id IN (SELECT id FROM sessions ORDER BY expires_at LIMIT ?)",
+                        (excess,),
+                    )
+                    self.evicted += excess
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def get(self, session_id: str):
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT data FROM sessions WHERE id = ? AND expires_at >= ?", (session_id, time.time())
+            ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def pop(self, session_id: str):
+        """Remove and return a live session, so it can only be submitted once (even across workers)."""
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = self._conn.execute(
+                    "SELECT data, expires_at FROM sessions WHERE id = ?", (session_id,)
+                ).fetchone()
+                if row:
+                    self._conn.execute("DELETE FROM sessions WHERE id = ?", (session_id,))
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        if row is None or row[1] < time.time():
+            return None
+        return json.loads(row[0])
+
+    def sweep(self) -> int:
+        with self._lock:
+            removed = self._conn.execute("DELETE FROM sessions WHERE expires_at < ?", (time.time(),)).rowcount
+            self.expired += removed
+        return removed
+
+    def stats(self) -> dict:
+        with self._lock:
+            count = self._conn.execute("SELECT COUNT(*) FROM sessions").fetchone()[0]
+        return {"backend": "sqlite", "sessions": count, "expired": self.expired, "evicted": self.evicted}
+
+
+def start_sweeper(store, interval: float = SWEEP_SECONDS):
+    """Sweep expired sessions every `interval` seconds on a daemon thread."""
+    def run():
+        while True:
+            time.sleep(interval)
+            try:
+                store.sweep()
+            except Exception as e:
+                print(f"Session sweep error: {e}")
+
+    thread = threading.Thread(target=run, name="session-sweeper", daemon=True)
+    thread.start()
+    return thread
+
+
+def make_store(spec: str = None):
+    spec = spec or os.getenv("QUIZ_SESSION_STORE", "sqlite")
+    if spec == "memory":
+        store = MemorySessionStore()
+    elif spec.startswith("sqlite"):
+        path = spec[len("sqlite:///"):] if spec.startswith("sqlite:///") else DEFAULT_SQLITE_PATH
+        store = SQLiteSessionStore(path)
+    else:
+        raise ValueError(f"Unknown QUIZ_SESSION_STORE: {spec}")
+    start_sweeper(store)
+    return store
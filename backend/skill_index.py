@@ -0,0 +1,280 @@
+"""
+Inverted skill index: "who knows kubernetes and react, verified?" and skill autocomplete.
+
+Every user gets a dense integer doc id. Each skill in the shared SkillVocab has
+two posting lists, listed and verified, stored as sorted array('I') of doc ids
+(4 bytes per entry, no per-entry Python objects). Queries view them as NumPy
+arrays without copying: AND intersects starting from the shortest list with a
+binary-search membership test, OR is a sorted merge. Autocomplete bisects a
+sorted array of skill names for the prefix and ranks matches by user count.
+
+Like the skill matrix, the index is built from a users snapshot on first use
+and kept current through `database.on_user_write` (add_user, update_user,
+verify_skill, unverify_skill, ...) and the users mirror's change feed.
+"""
+
+import os
+import threading
+import time
+from array import array
+from bisect import bisect_left, insort
+from typing import List, Optional
+
+import numpy as np
+
+from c_score import normalize_skills
+from database import database
+from user_record import SkillVocab
+
+
+def _verified_skills(data: dict) -> set:
+    return {str(k).lower().strip() for k, v in (data.get("verified_skills") or {}).items() if v and str(k).strip()}
+
+
+def _add(posting: array, doc: int):
+    if not posting or posting[-1] < doc:
+        posting.append(doc)  # new users have the highest doc id
+        return
+    i = bisect_left(posting, doc)
+    if i == len(posting) or posting[i] != doc:
+        posting.insert(i, doc)
+
+
+def _discard(posting: array, doc: int):
+    i = bisect_left(posting, doc)
+    if i < len(posting) and posting[i] == doc:
+        del posting[i]
+
+
+def _view(posting: array) -> np.ndarray:
+    return np.frombuffer(posting, dtype=np.uint32) if len(posting) else np.zeros(0, dtype=np.uint32)
+
+
+def _intersect(lists: List[np.ndarray]) -> np.ndarray:
+    lists = sorted(lists, key=len)
+    result = lists[0]
+    for other in lists[1:]:
+        if not len(result):
+            break
+        # each surviving doc id is looked up in the longer list: O(k log n)
+        pos = np.minimum(np.searchsorted(other, result), len(other) - 1)
+        result = result[other[pos] == result] if len(other) else result[:0]
+    return result
+
+
+def _union(lists: List[np.ndarray]) -> np.ndarray:
+    if not lists:
+        return np.zeros(0, dtype=np.uint32)
+    return np.unique(np.concatenate(lists))
+
+
+class SkillIndex:
+    def __init__(self):
+        self._lock = threading.RLock()
+        self.vocab = SkillVocab()
+        self.listed = []          # skill id -> array('I') of doc ids listing the skill
+        self.verified = []        # skill id -> array('I') of doc ids with the skill verified
+        self.names = []           # sorted normalized skill names, for prefix search
+        self.doc_of = {}          # user_id -> doc id
+        self.user_ids = []        # doc id -> user_id (None once deleted)
+        self.skills_of = []       # doc id -> (listed skill ids, verified skill ids)
+
+    def _skill_id(self, skill: str) -> int:
+        size = len(self.vocab)
+        sid = self.vocab.id(skill)
+        if sid == size:
+            self.listed.append(array("I"))
+            self.verified.append(array("I"))
+            insort(self.names, self.vocab.names[sid])
+        return sid
+
+    def upsert(self, user_id: str, data: dict):
+        """Index or re-index a user's listed and verified skills."""
+        data = data or {}
+        with self._lock:
+            listed = frozenset(self._skill_id(s) for s in normalize_skills(data.get("skills")))
+            verified = frozenset(self._skill_id(s) for s in _verified_skills(data))
+            doc = self.doc_of.get(user_id)
+            if doc is None:
+                doc = len(self.user_ids)
+                self.doc_of[user_id] = doc
+                self.user_ids.append(user_id)
+                self.skills_of.append((frozenset(), frozenset()))
+            old_listed, old_verified = self.skills_of[doc]
+            for sid in old_listed - listed:
+                _discard(self.listed[sid], doc)
+            for sid in listed - old_listed:
+                _add(self.listed[sid], doc)
+            for sid in old_verified - verified:
+                _discard(self.verified[sid], doc)
+            for sid in verified - old_verified:
+                _add(self.verified[sid], doc)
+            self.skills_of[doc] = (listed, verified)
+
+    def remove(self, user_id: str):
+        """Drop a user. Doc ids are tombstoned, not reused."""
+        with self._lock:
+            doc = self.doc_of.pop(user_id, None)
+            if doc is None:
+                return
+            listed, verified = self.skills_of[doc]
+            for sid in listed:
+                _discard(self.listed[sid], doc)
+            for sid in verified:
+                _discard(self.verified[sid], doc)
+            self.skills_of[doc] = (frozenset(), frozenset())
+            self.user_ids[doc] = None
+
+    def _posting(self, skill: str, verified: bool) -> np.ndarray:
+        sid = self.vocab.get(skill)
+        if sid is None:
+            return np.zeros(0, dtype=np.uint32)
+        return _view((self.verified if verified else self.listed)[sid])
+
+    def _match(self, all_of, any_of, verified: bool) -> np.ndarray:
+        # Caller holds the lock. The views pin the posting buffers (array.append
+        # raises BufferError meanwhile), so only a copy may outlive this call.
+        parts = []
+        if all_of:
+            parts.append(_intersect([self._posting(s, verified) for s in all_of]))
+        if any_of:
+            parts.append(_union([self._posting(s, verified) for s in any_of]))
+        return np.array(_intersect(parts)) if parts else np.zeros(0, dtype=np.uint32)
+
+    def search(self, all_of: List[str] = (), any_of: List[str] = (), verified: bool = False,
+               cursor: Optional[str] = None, limit: int = 50):
+        """
+        Users holding every skill in all_of and at least one in any_of (either may be empty,
+        not both); with verified=True only verified skills count. Returns (user_ids, total,
+        next_cursor), paged in index order. Raises ValueError for a malformed cursor.
+        """
+        with self._lock:
+            docs = self._match(all_of, any_of, verified)
+            user_ids = self.user_ids
+        start = int(np.searchsorted(docs, int(cursor), side="right")) if cursor else 0
+        page = docs[start:start + limit].tolist()
+        next_cursor = str(page[-1]) if page and start + limit < len(docs) else None
+        return [user_ids[d] for d in page], len(docs), next_cursor
+
+    def autocomplete(self, prefix: str, limit: int = 10, scan: int = 500) -> List[dict]:
+        """Skills starting with prefix, most used first (among the first `scan` matches alphabetically)."""
+        prefix = str(prefix or "").lower().strip()
+        with self._lock:
+            i = bisect_left(self.names, prefix)
+            matches = []
+            while i < len(self.names) and len(matches) < scan and self.names[i].startswith(prefix):
+                sid = self.vocab.ids[self.names[i]]
+                if self.listed[sid] or self.verified[sid]:
+                    matches.append({
+                        "skill": self.vocab.display[sid],
+                        "users": len(self.listed[sid]),
+                        "verified_users": len(self.verified[sid]),
+                    })
+                i += 1
+        matches.sort(key=lambda m: (-m["users"], -m["verified_users"], m["skill"].lower()))
+        return matches[:limit]
+
+    def stats(self) -> dict:
+        with self._lock:
+            entries = sum(len(p) for p in self.listed) + sum(len(p) for p in self.verified)
+            return {
+                "users": len(self.doc_of),
+                "skills": len(self.vocab),
+                "postings": entries,
+                "posting_bytes": entries * 4,
+            }
+
+
+def build_index(all_users: dict) -> SkillIndex:
+    index = SkillIndex()
+    for uid, udata in all_users.items():
+        index.upsert(uid, udata or {})
+    return index
+
+
+_index = None
+_built_at = 0.0
+_build_lock = threading.Lock()
+# Full rebuild interval when the users mirror is off (as for the skill matrix)
+REBUILD_SECONDS = float(os.getenv("SKILL_INDEX_REBUILD_SECONDS", "300"))
+
+
+def _outdated() -> bool:
+    if _index is None:
+        return True
+    mirror = database.users_mirror
+    if mirror.ready:
+        return _built_at < mirror.synced_at
+    return time.monotonic() - _built_at >= REBUILD_SECONDS
+
+
+def get_index() -> SkillIndex:
+    """The process-wide index, built from a users snapshot on first use."""
+    global _index, _built_at
+    if not _outdated():
+        return _index
+    with _build_lock:
+        if _outdated():
+            _index = build_index(database.get_all_users())
+            _built_at = time.monotonic()
+            print(f"skill_index: built users={len(_index.doc_of)} skills={len(_index.vocab)}")
+    return _index
+
+
+def stats():
+    """Index size, or None until it has been built."""
+    return _index.stats() if _index is not None else None
+
+
+def _apply(user_id, data):
+    if _index is None or user_id is None:
+        return
+    if data is None:
+        _index.remove(user_id)
+    else:
+        _index.upsert(user_id, data)
+
+
+def _on_user_write(user_id):
+    if _index is not None:
+        _apply(user_id, database.get_user(user_id))
+
+
+database.on_user_write(_on_user_write)
+database.users_mirror.on_change(_apply)
+
+
+if __name__ == "__main__":
+    # Benchmark: python skill_index.py [users]
+    import itertools
+    import random
+    import sys
+
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    rng = random.Random(5)
+    skills = [f"skill{i}" for i in range(3000)] + ["kubernetes", "react", "python", "docker", "sql"]
+    cum_weights = list(itertools.accumulate([1.0] * 3000 + [40, 150, 300, 80, 200]))
+    users = []
+    for i in range(n):
+        user_skills = list(set(rng.choices(skills, cum_weights=cum_weights, k=rng.randint(1, 10))))
+        users.append((f"u{i}", {"skills": user_skills, "verified_skills": {s: True for s in user_skills[:2]}}))
+    start = time.perf_counter()
+    index = SkillIndex()
+    for user_id, data in users:
+        index.upsert(user_id, data)
+    print(f"built: {n} users in {time.perf_counter() - start:.1f} s, {index.stats()}")
+
+    for query in (dict(all_of=["kubernetes", "react"]), dict(all_of=["kubernetes", "react"], verified=True),
+                  dict(any_of=["python", "sql", "docker"]), dict(all_of=["python"], any_of=["react", "kubernetes"])):
+        start = time.perf_counter()
+        for _ in range(100):
+            ids, total, _ = index.search(**query, limit=50)
+        print(f"{query}: {total} users, {(time.perf_counter() - start) * 10:.2f} ms/query")
+    start = time.perf_counter()
+    for _ in range(1000):
+        index.autocomplete("sk", 10)
+    print(f"autocomplete 'sk': {index.autocomplete('sk', 3)}, {(time.perf_counter() - start):.2f} ms/query")
+    start = time.perf_counter()
+    for i in range(10000):
+        index.upsert(f"u{rng.randrange(n)}", {"skills": rng.sample(skills, 5)})
+    print(f"updates: {(time.perf_counter() - start) / 10000 * 1e6:.0f} us each")
@@ -0,0 +1,349 @@
+"""
+Precomputed skill matrix for one-vs-all compatibility ranking.
+
+Every user becomes a row: a compact UserRecord whose skill ids come from a
+shared vocabulary (also kept as per-skill posting lists, i.e. a sparse user x
+skill matrix), a bit-packed category mask (user x category) and their raw
+skill count. Ranking one user
+against everyone is then a handful of NumPy operations instead of a Python
+loop over `get_compatibility_score`, and produces exactly the same scores.
+
+The matrix is built once from a users snapshot and then kept current through
+`database.on_user_write` and the users mirror's change feed, which also carries
+writes made by other processes. Without the mirror it falls back to a periodic
+full rebuild to pick those up.
+"""
+
+import os
+import threading
+import time
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+from c_score import CATEGORIES, categorize_skill, compatibility_reason, normalize_skills
+from database import database
+from user_record import SkillVocab, UserRecord
+
+CATEGORY_BITS = {name: 1 << i for i, name in enumerate(CATEGORIES)}
+# popcount for every possible uint8 category mask
+POPCOUNT = np.array([bin(i).count("1") for i in range(256)], dtype=np.int64)
+
+
+def _combine(exact, cat_matches, total_categories, len_a, len_b) -> np.ndarray:
+    """Vectorized get_compatibility_score formula (same operations, in the same order)."""
+    with np.errstate(divide="ignore", invalid="ignore"):
+        exact_ratio = exact / np.maximum(len_a, len_b)
+        category_ratio = cat_matches / total_categories
+    complementarity = np.minimum(50, (len_a + len_b) / 2) / 50
+    scores = (exact_ratio * 50) + (category_ratio * 40) + (complementarity * 10)
+    scores = np.clip(scores, 0, 100)
+    # Users without skills get the fixed neutral scores
+    empty_a, empty_b = np.asarray(len_a) == 0, np.asarray(len_b) == 0
+    scores = np.where(empty_a | empty_b, 40.0, scores)
+    return np.where(empty_a & empty_b, 50.0, scores)
+
+
+class SkillMatrix:
+    def __init__(self, capacity: int = 1024):
+        self._lock = threading.RLock()
+        self.vocab = SkillVocab()   # normalized skill -> skill id
+        self.skill_bits = []        # skill id -> category bit
+        self.postings = []          # skill id -> set of rows holding the skill
+        self._posting_arrays = {}   # skill id -> cached np.ndarray of rows
+        self.row_of = {}            # user_id -> row
+        self.row_of_username = {}   # username -> row
+        self.user_ids = []          # row -> user_id (None once deleted)
+        self.records = []           # row -> UserRecord (None once deleted)
+        self.departments = {"": 0}  # lowercased department -> code
+        self.colleges = {"": 0}     # lowercased college -> code
+        self.size = 0
+        self.lengths = np.zeros(capacity, dtype=np.int64)
+        self.cat_masks = np.zeros(capacity, dtype=np.uint8)
+        self.dept_codes = np.zeros(capacity, dtype=np.int64)
+        self.college_codes = np.zeros(capacity, dtype=np.int64)
+        self.active = np.zeros(capacity, dtype=bool)
+
+    def _grow(self):
+        capacity = len(self.lengths) * 2
+        for name in ("lengths", "cat_masks", "dept_codes", "college_codes", "active"):
+            old = getattr(self, name)
+            new = np.zeros(capacity, dtype=old.dtype)
+            new[:len(old)] = old
+            setattr(self, name, new)
+
+    def _sync_vocab(self):
+        # per-skill state for ids the vocabulary handed out since the last call
+        for sid in range(len(self.skill_bits), len(self.vocab)):
+            self.skill_bits.append(CATEGORY_BITS[categorize_skill(self.vocab.names[sid])])
+            self.postings.append(set())
+
+    @staticmethod
+    def _code(table: dict, value) -> int:
+        key = (value or "").lower()
+        code = table.get(key)
+        if code is None:
+            code = len(table)
+            table[key] = code
+        return code
+
+    def _posting_array(self, sid: int) -> np.ndarray:
+        arr = self._posting_arrays.get(sid)
+        if arr is None:
+            arr = np.fromiter(self.postings[sid], dtype=np.int64, count=len(self.postings[sid]))
+            self._posting_arrays[sid] = arr
+        return arr
+
+    def upsert(self, user_id: str, data: dict) -> bool:
+        """Insert or refresh a user's row. Returns True if their skills changed."""
+        with self._lock:
+            try:
+                record = UserRecord.from_dict(user_id, data, self.vocab)
+            finally:
+                # ids handed out before a bad record raised still need their per-skill state
+                self._sync_vocab()
+            skill_set = set(record.skill_ids())
+            mask = 0
+            for sid in skill_set:
+                mask |= self.skill_bits[sid]
+            row = self.row_of.get(user_id)
+            if row is None:
+                if self.size == len(self.lengths):
+                    self._grow()
+                row = self.size
+                self.size += 1
+                self.row_of[user_id] = row
+                self.user_ids.append(user_id)
+                self.records.append(None)
+                old_set, changed = set(), True
+            else:
+                old_set = set(self.records[row].skill_ids())
+                changed = old_set != skill_set or int(self.lengths[row]) != record.skill_count
+            for sid in old_set - skill_set:
+                self.postings[sid].discard(row)
+                self._posting_arrays.pop(sid, None)
+            for sid in skill_set - old_set:
+                self.postings[sid].add(row)
+                self._posting_arrays.pop(sid, None)
+            self.lengths[row] = record.skill_count
+            self.cat_masks[row] = mask
+            self.dept_codes[row] = self._code(self.departments, record.department)
+            self.college_codes[row] = self._code(self.colleges, record.college)
+            self.active[row] = True
+            old = self.records[row]
+            if old and self.row_of_username.get(old.username) == row:
+                del self.row_of_username[old.username]
+            if record.username:
+                self.row_of_username[record.username] = row
+            self.records[row] = record
+            return changed
+
+    def remove(self, user_id: str) -> bool:
+        """Drop a user's row. Rows are tombstoned, not reused."""
+        with self._lock:
+            row = self.row_of.pop(user_id, None)
+            if row is None:
+                return False
+            record = self.records[row]
+            for sid in record.skill_ids():
+                self.postings[sid].discard(row)
+                self._posting_arrays.pop(sid, None)
+            if self.row_of_username.get(record.username) == row:
+                del self.row_of_username[record.username]
+            self.user_ids[row] = None
+            self.records[row] = None
+            self.active[row] = False
+            return True
+
+    def score_vector(self, row: int) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Raw (unrounded) scores of `row` against every row, plus exact/category match counts."""
+        with self._lock:
+            n = self.size
+            lengths = self.lengths[:n]
+            masks = self.cat_masks[:n]
+            base_len = int(self.lengths[row])
+            base_mask = self.cat_masks[row]
+            arrays = [self._posting_array(sid) for sid in self.records[row].skill_ids()]
+
+        if arrays:
+            exact = np.bincount(np.concatenate(arrays), minlength=n)[:n]
+        else:
+            exact = np.zeros(n, dtype=np.int64)
+        cat_matches = POPCOUNT[masks & base_mask]
+        total_categories = POPCOUNT[masks | base_mask]
+        return _combine(exact, cat_matches, total_categories, base_len, lengths), exact, cat_matches
+
+    def rows_with_skill(self, skill: str) -> np.ndarray:
+        """Rows of the users who list skill."""
+        with self._lock:
+            sid = self.vocab.get(skill)
+            if sid is None:
+                return np.zeros(0, dtype=np.int64)
+            return self._posting_array(sid)
+
+    def resolve(self, identifier: str) -> Optional[int]:
+        """Row for a username or user_id (usernames win, like the single-pair endpoints)."""
+        row = self.row_of_username.get(identifier)
+        return row if row is not None else self.row_of.get(identifier)
+
+    def pair_scores(self, rows_a, rows_b) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Raw scores and exact/category match counts for the pairs (rows_a[i], rows_b[i])."""
+        rows_a = np.asarray(rows_a, dtype=np.int64)
+        rows_b = np.asarray(rows_b, dtype=np.int64)
+        unique_rows, inverse = np.unique(np.concatenate([rows_a, rows_b]), return_inverse=True)
+        with self._lock:
+            sets = [self.records[r].skill_ids() for r in unique_rows]
+            lengths = self.lengths[unique_rows]
+            masks = self.cat_masks[unique_rows]
+
+        # Bit-packed skill rows over the local vocabulary of just these users
+        local = {sid: i for i, sid in enumerate(sorted(set().union(*sets)))} if sets else {}
+        dense = np.zeros((len(unique_rows), max(1, len(local))), dtype=bool)
+        for i, skill_set in enumerate(sets):
+            dense[i, [local[sid] for sid in skill_set]] = True
+        packed = np.packbits(dense, axis=1)
+
+        a, b = inverse[:len(rows_a)], inverse[len(rows_a):]
+        exact = POPCOUNT[packed[a] & packed[b]].sum(axis=1)
+        cat_matches = POPCOUNT[masks[a] & masks[b]]
+        total_categories = POPCOUNT[masks[a] | masks[b]]
+        return _combine(exact, cat_matches, total_categories, lengths[a], lengths[b]), exact, cat_matches
+
+    def profile(self, row: int) -> Optional[dict]:
+        """Summary fields the ranking endpoints return for a row (None once deleted)."""
+        record = self.records[row]
+        return record.profile() if record is not None else None
+
+    def result(self, base_row: int, row: int, raw: float, exact: int, cat_matches: int) -> Tuple[float, str]:
+        """(score, reason) for one pair, matching get_compatibility_score's return value."""
+        base_len, other_len = int(self.lengths[base_row]), int(self.lengths[row])
+        if base_len == 0 and other_len == 0:
+            return 50, "Both users have no skills listed yet"
+        if base_len == 0 or other_len == 0:
+            return 40, f"One user has no skills, limited collaboration potential"
+        return round(float(raw), 1), compatibility_reason(int(exact), int(cat_matches))
+
+    def rank(self, user_id: str, limit: int, department: Optional[str] = None, vectors=None) -> List[dict]:
+        """Top `limit` other users by compatibility with user_id, best first.
+
+        `vectors` may carry a score_vector() result already computed for user_id.
+        """
+        row = self.row_of.get(user_id)
+        if row is None or limit <= 0:
+            return []
+        scores, exact, cat_matches = vectors or self.score_vector(row)
+        n = len(scores)
+        valid = self.active[:n].copy()
+        valid[row] = False
+        if department:
+            code = self.departments.get(department.lower())
+            if code is None:
+                return []
+            valid &= self.dept_codes[:n] == code
+        candidates = np.flatnonzero(valid)
+        if len(candidates) > limit:
+            values = scores[candidates]
+            kth = values[np.argpartition(-values, limit - 1)[:limit]].min()
+            # Keep near-ties: anything within 0.1 may round to the k-th score
+            candidates = candidates[values >= kth - 0.1]
+
+        ranked = []
+        for r in candidates:
+            score, reason = self.result(row, r, scores[r], exact[r], cat_matches[r])
+            ranked.append((score, self.user_ids[r], r, reason))
+        ranked.sort(key=lambda item: (-item[0], item[1]))
+        return [
+            {**self.profile(r), "score": score, "reason": reason}
+            for score, _, r, reason in ranked[:limit]
+        ]
+
+
+_matrix = None
+_built_at = 0.0
+# listener(matrix, user_id, skills_changed); user_id is None after a full rebuild
+_change_listeners = []
+_build_lock = threading.Lock()
+# Full rebuild interval, to pick up users written by other processes when the
+# users mirror is off; with it, the matrix is rebuilt only after a mirror resync
+REBUILD_SECONDS = float(os.getenv("SKILL_MATRIX_REBUILD_SECONDS", "300"))
+
+
+def build_matrix(all_users: dict) -> SkillMatrix:
+    matrix = SkillMatrix(capacity=max(1024, len(all_users)))
+    for uid, udata in all_users.items():
+        # one malformed record must not take down every ranking endpoint
+        try:
+            matrix.upsert(uid, udata or {})
+        except Exception as e:
+            print(f"skill_matrix: skipped user {uid}: {e}")
+    return matrix
+
+
+def _outdated() -> bool:
+    if _matrix is None:
+        return True
+    mirror = database.users_mirror
+    if mirror.ready:
+        return _built_at < mirror.synced_at
+    return time.monotonic() - _built_at >= REBUILD_SECONDS
+
+
+def get_matrix() -> SkillMatrix:
+    """The process-wide matrix, built from a users snapshot on first use."""
+    global _matrix, _built_at
+    if not _outdated():
+        return _matrix
+    with _build_lock:
+        if _outdated():
+            all_users = database.get_all_users()
+            _matrix = build_matrix(all_users)
+            _built_at = time.monotonic()
+            print(f"skill_matrix: built rows={_matrix.size} skills={len(_matrix.vocab)}")
+            _notify(_matrix, None, True)
+    return _matrix
+
+
+def on_change(listener):
+    """Register listener(matrix, user_id, skills_changed) for row updates."""
+    _change_listeners.append(listener)
+
+
+def _notify(matrix, user_id, skills_changed):
+    for listener in _change_listeners:
+        try:
+            listener(matrix, user_id, skills_changed)
+        except Exception as e:
+            print(f"Error in skill matrix listener: {e}")
+
+
+def _apply(matrix, user_id, data):
+    if data is None:
+        changed = matrix.remove(user_id)
+    else:
+        changed = matrix.upsert(user_id, data)
+    _notify(matrix, user_id, changed)
+
+
+def ensure_user(user_id: str, data: dict, matrix: SkillMatrix = None) -> SkillMatrix:
+    """Make sure user_id has a row (e.g. created by another worker) and return the matrix."""
+    matrix = matrix or get_matrix()
+    if user_id not in matrix.row_of:
+        _apply(matrix, user_id, data)
+    return matrix
+
+
+def _on_user_write(user_id):
+    if _matrix is None:
+        return
+    _apply(_matrix, user_id, database.get_user(user_id))
+
+
+def _on_mirror_change(user_id, data):
+    # user_id is None after a resync snapshot; get_matrix() rebuilds lazily then
+    if _matrix is None or user_id is None:
+        return
+    _apply(_matrix, user_id, data)
+
+
+database.on_user_write(_on_user_write)
+database.users_mirror.on_change(_on_mirror_change)
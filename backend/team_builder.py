@@ -0,0 +1,236 @@
+"""
+Team suggestions: the most compatible teams around a seed user.
+
+A team is scored by the mean pairwise compatibility of its members (the score
+/compatibility/compute returns) and should cover a set of required skills.
+Enumerating teams is hopeless at 50k users, so the search is staged:
+
+1. Candidate pool: the seed's best matches (one score_vector) plus the best
+   matches among holders of each required skill, so rare skills stay reachable.
+2. Pairwise scores for the pool come from one vectorized pair_scores call.
+3. Beam search adds one member at a time and keeps the `beam_width` best
+   partial teams by (required skills covered, summed pairwise score). Each
+   candidate's required skills are a bitmask; while any extension can still
+   cover everything with the slots left, extensions that cannot are pruned.
+4. Local search swaps members for pool candidates while that raises the score
+   without losing coverage.
+
+beam_width is the quality/time knob (1 is plain greedy). budget_ms bounds the
+whole search: once it is spent the remaining steps run greedily and the swaps
+are skipped. Quality/time table: python team_builder.py 50000
+"""
+
+import time
+from typing import List, Optional
+
+import numpy as np
+
+from skill_matrix import POPCOUNT, SkillMatrix
+
+MAX_REQUIRED_SKILLS = 16
+# popcount for every possible 16-bit coverage mask
+POPCOUNT16 = POPCOUNT[np.arange(1 << 16) & 0xFF] + POPCOUNT[np.arange(1 << 16) >> 8]
+
+
+def _top(rows: np.ndarray, scores: np.ndarray, k: int) -> np.ndarray:
+    if len(rows) <= k:
+        return rows
+    return rows[np.argpartition(-scores[rows], k - 1)[:k]]
+
+
+def _candidate_pool(matrix: SkillMatrix, seed_row: int, required: List[str], pool_size: int,
+                    per_skill: int, department: Optional[str], college: Optional[str]):
+    """(rows, coverage masks) of the seed followed by the pool; row 0 is the seed."""
+    scores, _, _ = matrix.score_vector(seed_row)
+    n = len(scores)
+    valid = matrix.active[:n].copy()
+    valid[seed_row] = False
+    if department:
+        valid &= matrix.dept_codes[:n] == matrix.departments.get(department.lower(), -1)
+    if college:
+        valid &= matrix.college_codes[:n] == matrix.colleges.get(college.lower(), -1)
+
+    covers = np.zeros(n, dtype=np.int64)
+    for bit, skill in enumerate(required):
+        holders = matrix.rows_with_skill(skill)
+        covers[holders[holders < n]] |= 1 << bit
+
+    candidates = np.flatnonzero(valid)
+    picked = [_top(candidates, scores, pool_size)]
+    for bit in range(len(required)):
+        holders = candidates[(covers[candidates] >> bit) & 1 == 1]
+        picked.append(_top(holders, scores, per_skill))
+    pool = np.unique(np.concatenate(picked))
+    rows = np.concatenate([[seed_row], pool]).astype(np.int64)
+    return rows, covers[rows]
+
+
+def _pair_matrix(matrix: SkillMatrix, rows: np.ndarray) -> np.ndarray:
+    size = len(rows)
+    pair = np.zeros((size, size))
+    if size > 1:
+        a, b = np.triu_indices(size, 1)
+        raw, _, _ = matrix.pair_scores(rows[a], rows[b])
+        # rounded like the single-pair endpoint, so team scores add up to what users see
+        pair[a, b] = np.round(raw, 1)
+        pair += pair.T
+    return pair
+
+
+def _beam_search(pair, covers, full, team_size, beam_width, count, deadline):
+    max_cover = int(POPCOUNT16[covers[1:]].max()) if len(covers) > 1 else 0
+    beam = [((0,), int(covers[0]), 0.0)]  # (members, coverage mask, summed pairwise score)
+    exhausted = False
+    expansions = 0
+    for step in range(1, team_size):
+        width = 1 if exhausted else beam_width
+        if step == team_size - 1:
+            width = max(width, count)
+        slots_left = team_size - step - 1
+        extended = {}
+        for members, cover, total in beam:
+            gain = pair[list(members)].sum(axis=0)
+            new_cover = covers | cover
+            ok = np.ones(len(covers), dtype=bool)
+            ok[list(members)] = False
+            if full:
+                feasible = POPCOUNT16[full & ~new_cover] <= slots_left * max_cover
+                if (ok & feasible).any():
+                    ok &= feasible
+            idx = np.flatnonzero(ok)
+            if not len(idx):
+                continue
+            # covered skills first, then compatibility (a sum of scores never reaches 1e6)
+            key = POPCOUNT16[new_cover[idx] & full] * 1e6 + gain[idx]
+            best = idx[np.argsort(-key, kind="stable")[:width]]
+            expansions += len(idx)
+            for c in best:
+                team = tuple(sorted(members + (int(c),)))
+                if team not in extended:
+                    extended[team] = (team, int(new_cover[c]), total + float(gain[c]))
+            if time.perf_counter() > deadline:
+                exhausted = True
+                break
+        if not extended:
+            break
+        beam = sorted(extended.values(), key=lambda s: (-POPCOUNT16[s[1] & full], -s[2]))[:width]
+    return beam, exhausted, expansions
+
+
+def _local_search(members, pair, covers, full, deadline) -> tuple:
+    """Swap non-seed members for pool candidates while the score improves and coverage holds."""
+    members = list(members)
+    improved = True
+    while improved and time.perf_counter() < deadline:
+        improved = False
+        for pos in range(1, len(members)):
+            others = members[:pos] + members[pos + 1:]
+            other_cover = int(np.bitwise_or.reduce(covers[others]))
+            current = POPCOUNT16[(other_cover | int(covers[members[pos]])) & full]
+            gains = pair[others].sum(axis=0)
+            delta = gains - gains[members[pos]]
+            delta[POPCOUNT16[(covers | other_cover) & full] < current] = -np.inf
+            delta[members] = -np.inf
+            best = int(np.argmax(delta))
+            if delta[best] > 1e-9:
+                members[pos] = best
+                improved = True
+    return tuple(sorted(members))
+
+
+def suggest_teams(matrix: SkillMatrix, seed_user_id: str, team_size: int = 3, required_skills: List[str] = (),
+                  department: str = None, college: str = None, count: int = 5, beam_width: int = 8,
+                  budget_ms: float = 200, pool_size: int = None) -> dict:
+    """Top `count` teams of `team_size` that include the seed user, best first."""
+    started = time.perf_counter()
+    deadline = started + budget_ms / 1000
+    seed_row = matrix.row_of.get(seed_user_id)
+    if seed_row is None:
+        raise KeyError(seed_user_id)
+    required = list(dict.fromkeys(str(s).lower().strip() for s in required_skills if str(s).strip()))
+    if len(required) > MAX_REQUIRED_SKILLS:
+        raise ValueError(f"At most {MAX_REQUIRED_SKILLS} required skills")
+    if team_size < 2:
+        raise ValueError("team_size must be at least 2")
+    pool_size = pool_size or min(1000, 64 + 32 * beam_width)
+
+    rows, covers = _candidate_pool(matrix, seed_row, required, pool_size, max(8, pool_size // 4), department, college)
+    pair = _pair_matrix(matrix, rows)
+    # skills nobody in the pool has cannot be covered; leave them out of the target
+    full = int(np.bitwise_or.reduce(covers)) if len(covers) else 0
+    beam, exhausted, expansions = _beam_search(pair, covers, full, team_size, beam_width, count, deadline)
+
+    teams = {}
+    for members, _, _ in beam:
+        if len(members) < team_size:
+            continue  # not enough candidates pass the filters
+        if not exhausted and time.perf_counter() < deadline:
+            improved = _local_search(members, pair, covers, full, deadline)
+            # several beam teams often improve into the same one; keep the alternatives
+            if improved not in teams:
+                members = improved
+        teams[members] = None
+    results = []
+    for members in teams:
+        idx = list(members)
+        sub = pair[np.ix_(idx, idx)][np.triu_indices(len(idx), 1)]
+        cover = int(np.bitwise_or.reduce(covers[idx]))
+        results.append({
+            "members": [
+                {**matrix.profile(int(rows[i])),
+                 "covers": [s for bit, s in enumerate(required) if covers[i] >> bit & 1]}
+                for i in idx
+            ],
+            "score": round(float(sub.mean()), 1) if len(sub) else 0.0,
+            "min_pair_score": round(float(sub.min()), 1) if len(sub) else 0.0,
+            "covered_skills": [s for bit, s in enumerate(required) if cover >> bit & 1],
+            "missing_skills": [s for bit, s in enumerate(required) if not cover >> bit & 1],
+        })
+    results.sort(key=lambda t: (-len(t["covered_skills"]), -t["score"]))
+    return {
+        "seed": seed_user_id,
+        "teams": results[:count],
+        "search": {
+            "pool_size": len(rows) - 1,
+            "beam_width": beam_width,
+            "expansions": expansions,
+            "budget_ms": budget_ms,
+            "budget_exhausted": exhausted or time.perf_counter() > deadline,
+            "elapsed_ms": round((time.perf_counter() - started) * 1000, 1),
+        },
+    }
+
+
+if __name__ == "__main__":
+    # Quality/time trade-off on synthetic users: python team_builder.py [users] [team_size]
+    import random
+    import sys
+
+    from skill_matrix import build_matrix
+
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 50000
+    size = int(sys.argv[2]) if len(sys.argv) > 2 else 4
+    rng = random.Random(11)
+    skills = [f"skill{i}" for i in range(400)] + ["python", "react", "sql", "docker", "figma", "kubernetes"]
+    weights = [1.0] * 400 + [30, 20, 15, 5, 2, 0.5]
+    users = {
+        f"u{i}": {"username": f"user{i}", "department": rng.choice(["cse", "ece", "it"]),
+                  "college": rng.choice(["a", "b"]), "skills": list(set(rng.choices(skills, weights, k=rng.randint(1, 10))))}
+        for i in range(n)
+    }
+    start = time.perf_counter()
+    matrix = build_matrix(users)
+    print(f"matrix: {n} users in {time.perf_counter() - start:.1f} s")
+
+    required = ["python", "react", "docker", "figma"]
+    for width in (1, 2, 4, 8, 16, 32):
+        timings, scores = [], []
+        for seed in range(20):
+            result = suggest_teams(matrix, f"u{seed * 97}", size, required, count=1, beam_width=width, budget_ms=10000)
+            timings.append(result["search"]["elapsed_ms"])
+            team = result["teams"][0]
+            scores.append((len(team["covered_skills"]), team["score"]))
+        timings.sort()
+        print(f"beam_width={width:>2}: mean team score {np.mean([s for _, s in scores]):5.1f}, "
+              f"covered {np.mean([c for c, _ in scores]):.2f}/{len(required)}, "
+              f"p50 {timings[len(timings) // 2]:.0f} ms, p95 {timings[int(len(timings) * 0.95) - 1]:.0f} ms")
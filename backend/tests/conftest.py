@@ -0,0 +1,24 @@
+import os
+import sys
+
+import pytest
+
+# Tests import the backend modules the way main.py does (run from backend/)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import fake_firebase  # noqa: E402
+
+fake_firebase.install()
+
+
+@pytest.fixture
+def rtdb():
+    """database.database over an empty fake Realtime Database, with cold caches and no mirror."""
+    from database import database
+
+    fake_firebase.reset()
+    database.user_cache.clear()
+    database.username_cache.clear()
+    database.users_mirror.close()
+    yield database
+    database.users_mirror.close()
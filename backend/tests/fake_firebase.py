@@ -0,0 +1,116 @@
+"""
+A stand-in for firebase_admin (credentials, initialize_app, db.reference) over
+database/fake_rtdb.py's in-memory tree, so database.py runs offline in tests and
+sync and async clients see the same data. Keys are literal, as on the server.
+"""
+
+import copy
+import json
+import sys
+import threading
+import types
+
+from database import fake_rtdb
+
+_lock = threading.RLock()
+
+
+def _parts(path):
+    return [p for p in str(path or "").split("/") if p]
+
+
+class Query:
+    def __init__(self, ref, order_by):
+        self._ref = ref
+        self._params = {"orderBy": json.dumps(order_by)}
+
+    def _bound(self, name, value):
+        self._params[name] = json.dumps(value)
+        return self
+
+    def start_at(self, value):
+        return self._bound("startAt", value)
+
+    def end_at(self, value):
+        return self._bound("endAt", value)
+
+    def equal_to(self, value):
+        return self._bound("equalTo", value)
+
+    def limit_to_first(self, n):
+        return self._bound("limitToFirst", n)
+
+    def limit_to_last(self, n):
+        return self._bound("limitToLast", n)
+
+    def get(self):
+        with _lock:
+            return copy.deepcopy(fake_rtdb._apply_query(fake_rtdb._get(self._ref._parts), self._params))
+
+
+class Reference:
+    def __init__(self, path=""):
+        self._parts = _parts(path)
+        self.path = "/" + "/".join(self._parts)
+        self.key = self._parts[-1] if self._parts else None
+
+    def child(self, path):
+        return Reference("/".join(self._parts + _parts(path)))
+
+    def get(self, shallow=False):
+        with _lock:
+            node = copy.deepcopy(fake_rtdb._get(self._parts))
+        if shallow and isinstance(node, dict):
+            return {k: True for k in node}
+        return node
+
+    def set(self, value):
+        with _lock:
+            fake_rtdb._set(self._parts, copy.deepcopy(value))
+
+    def update(self, value):
+        with _lock:
+            for key, item in value.items():
+                fake_rtdb._set(self._parts + _parts(key), copy.deepcopy(item))
+
+    def delete(self):
+        self.set(None)
+
+    def transaction(self, transaction_update):
+        # Runs under the lock, so it is trivially serialized; exceptions propagate as in the SDK
+        with _lock:
+            value = transaction_update(self.get())
+            self.set(value)
+            return value
+
+    def order_by_key(self):
+        return Query(self, "$key")
+
+    def order_by_child(self, path):
+        return Query(self, path)
+
+    def listen(self, callback):
+        raise NotImplementedError("use database.users_mirror.FakeEventStream for change feeds")
+
+
+def install():
+    """Register the fake as firebase_admin; call before importing database.database."""
+    firebase_admin = types.ModuleType("firebase_admin")
+    credentials = types.ModuleType("firebase_admin.credentials")
+    db = types.ModuleType("firebase_admin.db")
+    credentials.Certificate = lambda path: None
+    firebase_admin.initialize_app = lambda *args, **kwargs: None
+    db.reference = lambda path=None: Reference(path or "")
+    firebase_admin.credentials = credentials
+    firebase_admin.db = db
+    sys.modules.update({
+        "firebase_admin": firebase_admin,
+        "firebase_admin.credentials": credentials,
+        "firebase_admin.db": db,
+    })
+
+
+def reset(tree=None):
+    """Replace the fake database contents."""
+    with _lock:
+        fake_rtdb.tree = copy.deepcopy(tree or {})
@@ -0,0 +1,44 @@
+import asyncio
+
+import httpx
+import pytest
+
+from database import async_database, fake_rtdb
+
+NAMES = ["john.doe", "dollar$sign", "hash#tag", "slash/name", "50%off", "br[ack]et"]
+
+
+@pytest.fixture
+def client(rtdb, monkeypatch):
+    client = async_database.AsyncRTDB("http://rtdb.test", retries=0, transport=httpx.ASGITransport(app=fake_rtdb.app))
+    monkeypatch.setattr(async_database, "rtdb", client)
+    return client
+
+
+def _add(database, user_id, username):
+    database.add_user(user_id, "college", "", username.title(), "pw", "CSE", 2, username, f"{user_id}@example.com")
+
+
+@pytest.mark.parametrize("username", NAMES)
+def test_username_with_reserved_characters_round_trips(rtdb, client, username):
+    _add(rtdb, "u1", username)
+    rtdb.username_cache.clear()
+    rtdb.user_cache.clear()
+
+    user = asyncio.run(async_database.get_user_by_username(username))
+    assert user is not None and user["user_id"] == "u1"
+    # the async lookup must not have cached a miss for the sync path
+    assert rtdb.get_user_by_username(username)["user_id"] == "u1"
+
+
+def test_unknown_username_is_a_miss(rtdb, client):
+    _add(rtdb, "u1", "john.doe")
+    rtdb.username_cache.clear()
+    assert asyncio.run(async_database.get_user_by_username("john")) is None
+    assert asyncio.run(async_database.get_user_by_username("john%2Edoe")) is None
+
+
+def test_request_quotes_each_segment(client):
+    asyncio.run(client.put("a/b.c/100%", {"x": 1}))
+    assert fake_rtdb.tree == {"a": {"b.c": {"100%": {"x": 1}}}}
+    assert asyncio.run(client.get("/a/b.c/100%/")) == {"x": 1}
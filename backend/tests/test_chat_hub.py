@@ -0,0 +1,47 @@
+import asyncio
+
+import pytest
+
+from chat_hub import ChatHub, Connection, InMemoryBroker
+
+
+def _drain(queue):
+    events = []
+    while not queue.empty():
+        events.append(queue.get_nowait())
+    return events
+
+
+@pytest.mark.parametrize("size", [1, 2, 5])
+def test_full_queue_ends_as_resync_then_latest_event(size):
+    async def run():
+        broker = InMemoryBroker()
+        conn = Connection("c1", asyncio.get_running_loop(), size=size)
+        broker.subscribe("conversation:c1", conn.offer)
+        for i in range(20):
+            broker.publish("conversation:c1", {"type": "message", "n": i})
+        await asyncio.sleep(0)  # offer() schedules the puts onto the loop
+        return conn, _drain(conn.queue)
+
+    conn, events = asyncio.run(run())
+    assert events[-1] == {"type": "message", "n": 19}
+    assert {"type": "resync", "conv_id": "c1"} in events
+    assert len(events) <= max(2, size)
+    assert conn.dropped > 0
+
+
+def test_client_that_keeps_up_sees_every_event():
+    async def run():
+        hub = ChatHub(InMemoryBroker())
+        conn = hub.connect("c1")
+        for i in range(10):
+            hub.publish("c1", {"type": "message", "n": i})
+        await asyncio.sleep(0)
+        stats = hub.stats()
+        hub.disconnect(conn)
+        return _drain(conn.queue), stats, hub.stats()
+
+    events, stats, after = asyncio.run(run())
+    assert [e["n"] for e in events] == list(range(10))
+    assert stats == {"connections": 1, "published": 10, "dropped": 0}
+    assert after["connections"] == 0
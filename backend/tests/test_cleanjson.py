@@ -0,0 +1,40 @@
+import json
+import os
+
+import pytest
+
+import cleanjson
+
+_CORPUS = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "llm_corpus.jsonl")
+_SCHEMAS = {"quiz": cleanjson.QUIZ_SCHEMA, "problem": cleanjson.PROBLEM_SCHEMA,
+            "judgement": cleanjson.JUDGEMENT_SCHEMA, None: None}
+
+with open(_CORPUS, encoding="utf-8") as f:
+    CORPUS = [json.loads(line) for line in f if line.strip()]
+
+
+@pytest.mark.parametrize("case", CORPUS, ids=[c["name"] for c in CORPUS])
+def test_corpus(case):
+    schema = _SCHEMAS[case.get("schema")]
+    if "expect" in case:
+        assert cleanjson.extract_json(case["text"], schema) == case["expect"]
+    else:
+        with pytest.raises(ValueError):
+            cleanjson.extract_json(case["text"], schema)
+
+
+def test_single_quoted_escape_inside_double_quotes():
+    assert cleanjson.extract_json('{"title": "it\\\'s", "description": \'d\'}', cleanjson.PROBLEM_SCHEMA) == \
+        {"title": "it's", "description": "d"}
+
+
+def test_stream_reports_items_before_the_array_closes():
+    case = next(c for c in CORPUS if c.get("schema") == "quiz" and "expect" in c)
+    cut = case["text"][:case["text"].rindex("]")]  # the stream stops before the closing bracket
+    extractor = cleanjson.JSONStreamExtractor()
+    items = []
+    for i in range(0, len(cut), 16):
+        items += [value for kind, value in extractor.feed(cut[i:i + 16]) if kind == "item"]
+    # an element counts as complete once its separator arrives
+    assert items == case["expect"][:-1]
+    assert extractor.finish() == [("value", case["expect"][:-1])]
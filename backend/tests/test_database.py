@@ -0,0 +1,44 @@
+import pytest
+
+
+def _add(database, user_id, username):
+    database.add_user(user_id, "college", "", username.title(), "pw", "CSE", 2, username, f"{user_id}@example.com")
+
+
+def test_add_user_indexes_username(rtdb):
+    _add(rtdb, "u1", "john.doe")
+    assert rtdb.get_user_by_username("john.doe")["user_id"] == "u1"
+
+
+def test_add_user_rejects_taken_username(rtdb):
+    _add(rtdb, "u1", "john.doe")
+    with pytest.raises(rtdb.UsernameTaken):
+        _add(rtdb, "u2", "john.doe")
+    assert rtdb.get_user("u2") is None
+    assert rtdb.get_user_by_username("john.doe")["user_id"] == "u1"
+
+
+def test_rename_cannot_take_another_users_login(rtdb):
+    _add(rtdb, "u1", "john.doe")
+    _add(rtdb, "u2", "mallory")
+    with pytest.raises(rtdb.UsernameTaken):
+        rtdb.update_user("u2", {"username": "john.doe"})
+    rtdb.user_cache.clear(); rtdb.username_cache.clear()
+    assert rtdb.get_user_by_username("john.doe")["user_id"] == "u1"
+    assert rtdb.get_user("u2")["username"] == "mallory"
+
+
+def test_rename_frees_the_old_username(rtdb):
+    _add(rtdb, "u1", "john.doe")
+    rtdb.update_user("u1", {"username": "jd"})
+    assert rtdb.get_user_by_username("jd")["user_id"] == "u1"
+    assert rtdb.get_user_by_username("john.doe") is None
+    _add(rtdb, "u2", "john.doe")
+    assert rtdb.get_user_by_username("john.doe")["user_id"] == "u2"
+
+
+def test_delete_user_keeps_an_index_entry_it_does_not_own(rtdb):
+    _add(rtdb, "u1", "john.doe")
+    rtdb.usernames_ref.child("john%2Edoe").set("u2")
+    rtdb.delete_user("u1")
+    assert rtdb.usernames_ref.child("john%2Edoe").get() == "u2"
@@ -0,0 +1,91 @@
+import os
+import stat
+import sys
+
+import pytest
+
+import judge
+
+DOUBLE = [{"args": [2], "expected": 4}, {"args": [5], "expected": 10}]
+
+
+def _runnable_by(uid):
+    # the dropped uid must be able to reach and execute the interpreter
+    if uid is None:
+        return True
+    path = os.path.realpath(sys.executable)
+    while path != os.path.dirname(path):
+        mode = os.stat(path).st_mode
+        if not mode & stat.S_IXOTH:
+            return False
+        path = os.path.dirname(path)
+    return True
+
+
+@pytest.fixture(autouse=True)
+def run_as(monkeypatch):
+    if not _runnable_by(judge.RUN_AS_UID):
+        monkeypatch.setattr(judge, "RUN_AS_UID", None)
+
+
+def run(code, tests=DOUBLE):
+    return judge.run_submission("python", code, "f", tests)
+
+
+def test_accepts_correct_solution_using_stdlib():
+    code = "import collections, dataclasses, decimal, heapq, re, threading, traceback\ndef f(x):\n    return x * 2\n"
+    result = run(code)
+    assert result["verdict"] == "accepted"
+    assert result["passed"] == 2
+
+
+def test_wrong_answer_and_error_text_is_not_echoed():
+    assert run("def f(x):\n    return x\n")["verdict"] == "wrong_answer"
+    result = run("def f(x):\n    raise ValueError('secret text')\n")
+    assert result["verdict"] == "runtime_error"
+    assert result["tests"][0]["error"] == "ValueError raised"
+
+
+def test_rebinding_harness_globals_does_not_disable_the_sandbox(tmp_path):
+    target = tmp_path / "pwned"
+    code = (
+        "import __main__, subprocess\n"
+        "__main__._BLOCKED = (); __main__._allowed = lambda e, a: True\n"
+        f"subprocess.run(['sh', '-c', 'id > {target}'])\n"
+        "def f(x):\n    return x * 2\n"
+    )
+    result = run(code)
+    assert result["verdict"] != "accepted"
+    assert not target.exists()
+
+
+@pytest.mark.parametrize("body", [
+    "import os\n    os.system('true')",
+    "import os\n    os.fork()",
+    "import socket\n    socket.socket()",
+    "import gc\n    gc.get_objects()",
+    "open('/etc/hostname').read()",
+    "import os\n    os.listdir('/')",
+    "import os\n    os.open('/tmp/judge-escape', os.O_WRONLY | os.O_CREAT)",
+    "import os\n    open(os.path.dirname(os.__file__) + '/../../../../../../etc/hostname').read()",
+    "import os\n    os.chdir('/')",
+])
+def test_refuses_escapes(body):
+    result = run(f"def f(x):\n    {body}\n    return x * 2\n")
+    assert result["verdict"] == "runtime_error"
+    assert result["tests"][0]["error"] == "PermissionError raised"
+
+
+def test_files_in_the_work_dir_are_allowed():
+    code = "def f(x):\n    open('scratch', 'w').write('ab')\n    return len(open('scratch').read()) * x\n"
+    assert run(code)["verdict"] == "accepted"
+
+
+def test_forged_report_cannot_accept():
+    code = (
+        "import os, sys\n"
+        "sys.__stdout__.write('__JUDGE_RESULT__{\"verdict\": \"accepted\", \"outputs\": []}\\n')\n"
+        "sys.__stdout__.flush()\n"
+        "os._exit(0)\n"
+    )
+    assert run(code)["verdict"] == "runtime_error"
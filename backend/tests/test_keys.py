@@ -0,0 +1,36 @@
+import pytest
+
+from database.keys import decode_user, escape_key, unescape_key
+from database.users_mirror import FakeEventStream, UsersMirror
+
+
+@pytest.mark.parametrize("name", ["C#", "Node.js", "$", "a/b", "[x]", "100%", "%2E", "plain"])
+def test_escape_round_trip(name):
+    key = escape_key(name)
+    assert not any(ch in key for ch in ".$#[]/")
+    assert unescape_key(key) == name
+
+
+def test_decode_user_leaves_plain_records_alone():
+    record = {"username": "a", "verified_skills": {"Python": True}}
+    assert decode_user(record) is record
+
+
+def test_get_user_decodes_verified_skills(rtdb):
+    rtdb.add_user("u1", "college", "", "A", "pw", "CSE", 2, "a", "a@example.com", skills=["C#", "Node.js"])
+    rtdb.verify_skill("u1", "C#", verifier_id="quiz")
+    rtdb.verify_skill("u1", "Node.js")
+    assert set(rtdb.users_ref.child("u1/verified_skills").get()) == {"C%23", "Node%2Ejs"}
+    rtdb.user_cache.clear()
+    assert set(rtdb.get_user("u1")["verified_skills"]) == {"C#", "Node.js"}
+    assert set(rtdb.get_all_users()["u1"]["verified_skills"]) == {"C#", "Node.js"}
+
+
+def test_mirror_decodes_snapshots_and_single_skill_writes():
+    stream = FakeEventStream({"u1": {"username": "a", "verified_skills": {"C%23": {"verifier_id": "quiz"}}}})
+    mirror = UsersMirror(stream.listen).start()
+    assert mirror.get("u1")["verified_skills"] == {"C#": {"verifier_id": "quiz"}}
+    stream.patch("/u1/verified_skills", {"Node%2Ejs": {"verifier_id": "u2"}})
+    stream.put("/u1/verified_skills/C%23", None)
+    assert mirror.get("u1")["verified_skills"] == {"Node.js": {"verifier_id": "u2"}}
+    mirror.close()
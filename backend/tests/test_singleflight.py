@@ -0,0 +1,61 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from database.singleflight import AsyncSingleFlight, SingleFlight
+
+
+def test_concurrent_callers_share_one_fetch_and_get_their_own_copies():
+    flight = SingleFlight()
+    release = threading.Event()
+    fetches = []
+
+    def fetch():
+        fetches.append(1)
+        release.wait(5)
+        return {"skills": ["python"]}
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(flight.do("u1", fetch))) for _ in range(5)]
+    for t in threads:
+        t.start()
+    deadline = time.monotonic() + 5
+    while flight.stats()["coalesced"] < 4 and time.monotonic() < deadline:
+        time.sleep(0.001)
+    release.set()
+    for t in threads:
+        t.join()
+    assert len(fetches) == 1
+    assert len({id(r) for r in results}) == 5
+    results[0]["skills"].append("go")
+    assert all(r == {"skills": ["python"]} for r in results[1:])
+    assert flight.stats() == {"calls": 5, "coalesced": 4, "in_flight": 0}
+
+
+def test_errors_reach_every_waiter_and_are_not_remembered():
+    flight = SingleFlight()
+    with pytest.raises(KeyError):
+        flight.do("u1", lambda: {}["missing"])
+    assert flight.do("u1", lambda: 1) == 1
+
+
+def test_async_followers_and_leader_get_separate_copies():
+    async def run():
+        flight = AsyncSingleFlight()
+        fetches = []
+
+        async def fetch():
+            fetches.append(1)
+            await asyncio.sleep(0.01)
+            return {"teams": []}
+
+        results = await asyncio.gather(*(flight.do("u1", fetch) for _ in range(3)))
+        return fetches, results, flight.stats()
+
+    fetches, results, stats = asyncio.run(run())
+    assert len(fetches) == 1
+    results[0]["teams"].append("t1")
+    assert results[1] == results[2] == {"teams": []}
+    assert stats == {"calls": 3, "coalesced": 2, "in_flight": 0}
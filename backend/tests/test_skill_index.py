@@ -0,0 +1,60 @@
+import pytest
+
+import skill_index
+
+
+def _index():
+    users = {f"u{i}": {"skills": ["Python"] + (["React"] if i % 2 else []),
+                       "verified_skills": {"Python": True} if i % 3 == 0 else {}}
+             for i in range(25)}
+    return skill_index.build_index(users)
+
+
+def _all_pages(index, limit, **query):
+    seen, cursor = [], None
+    while True:
+        page, total, cursor = index.search(cursor=cursor, limit=limit, **query)
+        seen.extend(page)
+        if cursor is None:
+            return seen, total
+
+
+@pytest.mark.parametrize("limit", [1, 4, 12, 13, 50])
+def test_pages_cover_every_match_once(limit):
+    seen, total = _all_pages(_index(), limit, all_of=["python", "react"])
+    assert seen == [f"u{i}" for i in range(1, 25, 2)]
+    assert total == 12
+
+
+def test_cursor_survives_writes_between_pages():
+    index = _index()
+    page, _, cursor = index.search(all_of=["python"], limit=5)
+    index.remove("u6")
+    index.upsert("u2", {"skills": ["Go"]})
+    index.upsert("new", {"skills": ["Python"]})
+    rest = []
+    while cursor:
+        more, _, cursor = index.search(all_of=["python"], cursor=cursor, limit=5)
+        rest.extend(more)
+    assert page == ["u0", "u1", "u2", "u3", "u4"]
+    assert "u6" not in rest and rest[-1] == "new"
+    assert len(set(page + rest)) == len(page + rest)
+
+
+def test_verified_and_any_of():
+    index = _index()
+    ids, total, _ = index.search(all_of=["python"], verified=True)
+    assert ids == [f"u{i}" for i in range(0, 25, 3)] and total == 9
+    ids, total, _ = index.search(any_of=["react", "rust"])
+    assert total == 12
+
+
+def test_malformed_cursor_raises_value_error():
+    with pytest.raises(ValueError):
+        _index().search(all_of=["python"], cursor="abc")
+
+
+def test_autocomplete_ranks_by_users():
+    index = _index()
+    index.upsert("x", {"skills": ["Rust"]})
+    assert [m["skill"] for m in index.autocomplete("r")] == ["react", "rust"]
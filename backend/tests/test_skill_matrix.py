@@ -0,0 +1,36 @@
+import skill_matrix
+from c_score import get_compatibility_score
+
+
+def _users(n_skills):
+    # 64 users sharing "python" plus enough distinct skills to pass 65536 in total
+    per_user = n_skills // 64 + 1
+    return {
+        f"u{i}": {"username": f"user{i}", "skills": ["Python"] + [f"skill {i}-{j}" for j in range(per_user)]}
+        for i in range(64)
+    }
+
+
+def test_build_and_update_past_65536_skills():
+    users = _users(0x10000)
+    matrix = skill_matrix.build_matrix(users)
+    assert len(matrix.vocab) > 0x10000
+    users["u1"] = {"username": "user1", "skills": ["Python", "a brand new skill"]}
+    skill_matrix._apply(matrix, "u1", users["u1"])
+    assert len(matrix.rows_with_skill("a brand new skill")) == 1
+    ranked = matrix.rank("u1", 3)
+    for entry in ranked:
+        expected, _ = get_compatibility_score(users["u1"]["skills"], users[entry["user_id"]]["skills"])
+        assert entry["score"] == expected
+
+
+def test_build_skips_malformed_records():
+    users = {
+        "u1": {"username": "a", "skills": ["Python"]},
+        "u2": {"username": "b", "skills": ["Go"], "verified_skills": ["Go"]},
+        "u3": {"username": "c", "skills": ["Python", "Go"]},
+    }
+    matrix = skill_matrix.build_matrix(users)
+    assert set(matrix.row_of) == {"u1", "u3"}
+    assert len(matrix.skill_bits) == len(matrix.vocab)
+    assert [entry["user_id"] for entry in matrix.rank("u1", 5)] == ["u3"]
@@ -0,0 +1,20 @@
+from user_record import SkillVocab, UserRecord
+
+
+def test_vocab_grows_past_65536_skills():
+    vocab = SkillVocab()
+    for i in range(0x10000):
+        vocab.id(f"skill {i}")
+    record = UserRecord.from_dict("u1", {"skills": ["Python", "skill 7"], "verified_skills": {"Rust": True}}, vocab)
+    assert vocab.get("python") == 0x10000
+    assert list(record.skill_ids()) == [0x10000, 7]
+    assert record.verified_ids() == [vocab.get("rust")]
+
+
+def test_from_dict_dedupes_and_marks_verified():
+    vocab = SkillVocab()
+    record = UserRecord.from_dict("u1", {"skills": ["Python", " python", "Go"], "verified_skills": {"Go": True, "C": False}}, vocab)
+    assert [vocab.names[sid] for sid in record.skill_ids()] == ["python", "go"]
+    assert record.skill_count == 3
+    assert record.is_verified(vocab.get("go")) and not record.is_verified(vocab.get("python"))
+    assert vocab.get("c") is None
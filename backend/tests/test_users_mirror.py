@@ -0,0 +1,56 @@
+import time
+
+from database.users_mirror import FakeEvent, FakeEventStream, UsersMirror
+
+
+def _stream():
+    return FakeEventStream({
+        "u1": {"username": "a", "department": "CSE", "skills": ["Python"]},
+        "u2": {"username": "b", "department": "ECE", "skills": ["Go", "Python"]},
+    })
+
+
+def test_events_update_records_and_indexes():
+    stream = _stream()
+    mirror = UsersMirror(stream.listen).start()
+    stream.patch("/u1", {"username": "a2", "skills": ["Rust"]})
+    stream.put("/u2", None)
+    assert mirror.get_by_username("a2")["user_id"] == "u1"
+    assert mirror.get_by_username("a") is None
+    assert mirror.candidates(skill="python") == set()
+    assert mirror.candidates(department="cse", skill="rust") == {"u1"}
+    assert mirror.page(limit=10) == ([("u1", mirror.get("u1"))], None)
+    mirror.close()
+
+
+def test_check_resyncs_after_a_dropped_event():
+    stream = _stream()
+    mirror = UsersMirror(stream.listen, keys=stream.keys, verify_seconds=0).start()
+    stream.drop_next()
+    stream.put("/u3", {"username": "c"})
+    assert mirror.get("u3") is None
+    assert mirror.check() is False
+    assert mirror.get("u3") == {"username": "c"} and mirror.stats()["gaps"] == 1
+    assert mirror.check() is True
+    mirror.close()
+
+
+def _wait_for(condition):
+    deadline = time.monotonic() + 5
+    while not condition() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return condition()
+
+
+def test_gap_checker_survives_a_resync_from_a_bad_event():
+    stream = _stream()
+    mirror = UsersMirror(stream.listen, keys=stream.keys, verify_seconds=0.05).start()
+    stream._deliver(FakeEvent("bogus", "/u1", {}))
+    assert _wait_for(lambda: mirror.stats()["resyncs"] == 1 and mirror.ready)
+    stream.drop_next()
+    stream.put("/u3", {"username": "c"})
+    assert _wait_for(lambda: mirror.get("u3") is not None)
+    assert mirror.stats()["gaps"] == 1
+    mirror.close()
+    mirror._verifier.join(1)
+    assert not mirror._verifier.is_alive()
@@ -0,0 +1,201 @@
+"""
+Compact in-memory user records for scoring and the partner/ranking views.
+
+A Firebase user record is a dict of a dozen string fields (password, email,
+linkdin_url, teams, ...) of which ranking reads four. UserRecord keeps only
+those, in __slots__: department and college strings are interned so each
+distinct value is stored once, skills are integer ids into a shared SkillVocab
+packed in an array('I'), and verified skills are a bitmask over positions in
+that array. Skills that are verified but not listed are appended after the
+listed ones so the mask can still name them. The stored verified_skills map
+(with its verifier metadata) is kept as well, only for users that have one,
+so profiles return it unchanged.
+
+Memory benchmark against plain dicts: python user_record.py 10000,100000,1000000
+"""
+
+import sys
+from array import array
+
+
+def _skill_names(skills) -> list:
+    # raw spellings in stored order; keys of a dict value, as c_score.normalize_skills does
+    if isinstance(skills, dict):
+        skills = list(skills.keys())
+    elif not isinstance(skills, list):
+        skills = list(skills) if skills else []
+    return [str(s) for s in skills if s]
+
+
+def _intern(value):
+    return sys.intern(value) if isinstance(value, str) else value
+
+
+class SkillVocab:
+    """Shared vocabulary: normalized skill -> id, stored in array('I')."""
+
+    def __init__(self):
+        self.ids = {}       # normalized skill -> id
+        self.names = []     # id -> normalized skill
+        self.display = []   # id -> first spelling seen, for output
+
+    def __len__(self):
+        return len(self.names)
+
+    def get(self, skill: str):
+        return self.ids.get(str(skill).lower().strip())
+
+    def id(self, skill: str) -> int:
+        key = str(skill).lower().strip()
+        sid = self.ids.get(key)
+        if sid is None:
+            sid = len(self.names)
+            self.ids[key] = sid
+            self.names.append(sys.intern(key))
+            self.display.append(sys.intern(str(skill).strip()))
+        return sid
+
+
+class UserRecord:
+    __slots__ = ("user_id", "username", "name", "department", "college", "year",
+                 "skills", "listed", "skill_count", "verified", "verified_skills")
+
+    def __init__(self, user_id, username=None, name=None, department=None, college=None, year=None,
+                 skills=None, listed=0, skill_count=0, verified=0, verified_skills=None):
+        self.user_id = user_id
+        self.username = username
+        self.name = name
+        self.department = department
+        self.college = college
+        self.year = year
+        self.skills = skills if skills is not None else array("I")  # listed ids, then verified-only ids
+        self.listed = listed            # how many of `skills` the user listed
+        self.skill_count = skill_count  # raw length of the skills list (duplicates included), as scored
+        self.verified = verified        # bit i set: skills[i] is verified
+        self.verified_skills = verified_skills  # the stored map, None when empty
+
+    @classmethod
+    def from_dict(cls, user_id: str, data: dict, vocab: SkillVocab) -> "UserRecord":
+        data = data or {}
+        # whitespace-only names stay: normalize_skills keeps them as "", and scoring counts them
+        names = _skill_names(data.get("skills"))
+        ids = array("I")
+        position = {}
+        for skill in names:
+            sid = vocab.id(skill)
+            if sid not in position:
+                position[sid] = len(ids)
+                ids.append(sid)
+        listed = len(ids)
+        verified = 0
+        stored = data.get("verified_skills") or {}
+        for skill, value in stored.items():
+            if not value or not str(skill).strip():
+                continue
+            sid = vocab.id(skill)
+            if sid not in position:
+                position[sid] = len(ids)
+                ids.append(sid)
+            verified |= 1 << position[sid]
+        return cls(
+            user_id,
+            username=data.get("username"),
+            name=data.get("name"),
+            department=_intern(data.get("department")),
+            college=_intern(data.get("college")),
+            year=data.get("year"),
+            skills=ids,
+            listed=listed,
+            skill_count=len(names),
+            verified=verified,
+            verified_skills=dict(stored) if stored else None,
+        )
+
+    def skill_ids(self) -> array:
+        """Ids of the skills the user listed (no duplicates)."""
+        return self.skills[:self.listed]
+
+    def verified_ids(self) -> list:
+        return [sid for i, sid in enumerate(self.skills) if self.verified >> i & 1]
+
+    def is_verified(self, sid: int) -> bool:
+        try:
+            return bool(self.verified >> self.skills.index(sid) & 1)
+        except ValueError:
+            return False
+
+    def profile(self) -> dict:
+        """The summary the ranking endpoints return for this user."""
+        return {
+            "user_id": self.user_id,
+            "username": self.username,
+            "name": self.name,
+            "department": self.department,
+            "verified_skills": dict(self.verified_skills or {}),
+        }
+
+
+if __name__ == "__main__":
+    import gc
+    import json
+    import os
+    import random
+    import time
+    import tracemalloc
+
+    sizes = [int(n) for n in (sys.argv[1] if len(sys.argv) > 1 else "10000,100000").split(",")]
+    skills = [f"Skill{i}" for i in range(2000)]
+    departments = ["CSE", "ECE", "ME", "Civil", "IT", "EEE"]
+    colleges = [f"College {i}" for i in range(50)]
+
+    def synthetic(n):
+        # Encoded and decoded like the Firebase client does, so no strings are shared between records
+        rng = random.Random(7)
+        for i in range(n):
+            user_skills = rng.sample(skills, rng.randint(2, 12))
+            yield f"u{i}", json.loads(json.dumps({
+                "username": f"user{i}", "name": f"User Number {i}", "email": f"user{i}@example.com",
+                "password": f"pw{rng.getrandbits(64):x}", "department": rng.choice(departments),
+                "college": rng.choice(colleges), "year": rng.randint(1, 4), "skills": user_skills,
+                "verified": False, "verified_skills": {s: True for s in user_skills[:rng.randint(0, 2)]},
+                "teams": [], "linkdin_url": f"https://linkedin.com/in/user{i}",
+            }))
+
+    def measure(build):
+        # Resident-set growth where /proc is available; tracemalloc (slow, memory hungry) elsewhere
+        gc.collect()
+        if os.path.exists("/proc/self/statm"):
+            def rss():
+                with open("/proc/self/statm") as f:
+                    return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+            before = rss()
+            store = build()
+            gc.collect()
+            return store, rss() - before
+        tracemalloc.start()
+        store = build()
+        used = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        return store, used
+
+    for n in sizes:
+        vocab = SkillVocab()
+        # compact store first: freed dict memory is not always returned to the OS
+        records, compact_bytes = measure(lambda: [UserRecord.from_dict(uid, data, vocab) for uid, data in synthetic(n)])
+        dicts, dict_bytes = measure(lambda: dict(synthetic(n)))
+
+        # One scoring-style pass: exact skill overlap of every user with one base user
+        base = {s.lower() for s in dicts["u0"]["skills"]}
+        start = time.perf_counter()
+        for data in dicts.values():
+            len(base & {s.lower().strip() for s in data["skills"]})
+        dict_scan = time.perf_counter() - start
+        base_ids = set(records[0].skill_ids())
+        start = time.perf_counter()
+        for record in records:
+            len(base_ids.intersection(record.skill_ids()))
+        compact_scan = time.perf_counter() - start
+
+        print(f"{n:>9} users: dicts {dict_bytes / n:6.0f} B/user, UserRecord {compact_bytes / n:5.0f} B/user "
+              f"({dict_bytes / compact_bytes:.1f}x smaller); overlap scan {dict_scan * 1000:.0f} ms -> {compact_scan * 1000:.0f} ms")
+        del dicts, records
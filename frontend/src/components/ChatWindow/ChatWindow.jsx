@@ -4,6 +4,8 @@ import Navbar from '../Navbar/Navbar';
 import { useParams, useNavigate } from 'react-router-dom';
 import { useUser } from '../../context/Index';
 
+const API_BASE = import.meta.env.VITE_API_BASE || 'http://localhost:8000';
+
 function ChatWindow() {
   const { convId } = useParams();
   const navigate = useNavigate();
@@ -14,7 +16,36 @@ function ChatWindow() {
   const [messageText, setMessageText] = useState('');
   const [sending, setSending] = useState(false);
   const [otherUser, setOtherUser] = useState(null);
+  const [hasEarlier, setHasEarlier] = useState(false);
   const messagesEndRef = useRef(null);
+  const messagesRef = useRef([]);
+  const liveRef = useRef(false);
+
+  const PAGE_SIZE = 50;
+
+  useEffect(() => {
+    messagesRef.current = messages;
+  }, [messages]);
+
+  // Append only messages newer than the last one we have
+  const fetchNewMessages = async () => {
+    const current = messagesRef.current;
+    const last = current[current.length - 1];
+    const newer = await getMessages(convId, last ? { after: last.msg_id } : {});
+    if (newer.length) {
+      setMessages(prev => {
+        const seen = new Set(prev.map(m => m.msg_id));
+        return [...prev, ...newer.filter(m => !seen.has(m.msg_id))];
+      });
+    }
+  };
+
+  const loadEarlier = async () => {
+    if (!messages.length) return;
+    const older = await getMessages(convId, { before: messages[0].msg_id, limit: PAGE_SIZE });
+    setHasEarlier(older.length === PAGE_SIZE);
+    setMessages(prev => [...older, ...prev]);
+  };
 
   // Auto-scroll to bottom
   useEffect(() => {
@@ -31,8 +62,9 @@ function ChatWindow() {
     (async () => {
       setLoading(true);
       try {
-        const msgs = await getMessages(convId);
+        const msgs = await getMessages(convId, { limit: PAGE_SIZE });
         setMessages(msgs);
+        setHasEarlier(msgs.length === PAGE_SIZE);
 
         // Extract other user ID from conversation
         // Format: user1_user2, so we find which one isn't current user
@@ -47,6 +79,50 @@ function ChatWindow() {
     })();
   }, [convId, currentUser]);
 
+  // Live updates: WebSocket push, with server-sent events as the fallback
+  useEffect(() => {
+    if (!currentUser) return;
+    const query = `user_id=${encodeURIComponent(currentUser.user_id)}`;
+    let ws = null;
+    let es = null;
+    let closed = false;
+
+    const handleEvent = (event) => {
+      if (event.type === 'message') {
+        setMessages(prev => (prev.some(m => m.msg_id === event.message.msg_id) ? prev : [...prev, event.message]));
+      } else if (event.type === 'resync') {
+        fetchNewMessages();
+      }
+    };
+
+    const startSse = () => {
+      es = new EventSource(`${API_BASE}/conversations/${convId}/events?${query}`);
+      es.onopen = () => { liveRef.current = true; };
+      es.onmessage = (e) => handleEvent(JSON.parse(e.data));
+      es.onerror = () => { liveRef.current = false; };
+    };
+
+    try {
+      let opened = false;
+      ws = new WebSocket(`${API_BASE.replace(/^http/, 'ws')}/ws/conversations/${convId}?${query}`);
+      ws.onopen = () => { opened = true; liveRef.current = true; };
+      ws.onmessage = (e) => handleEvent(JSON.parse(e.data));
+      ws.onclose = () => {
+        liveRef.current = false;
+        if (!opened && !closed) startSse();
+      };
+    } catch (err) {
+      startSse();
+    }
+
+    return () => {
+      closed = true;
+      liveRef.current = false;
+      if (ws) ws.close();
+      if (es) es.close();
+    };
+  }, [convId, currentUser]);
+
   const handleSendMessage = async (e) => {
     e.preventDefault();
     if (!messageText.trim() || sending) return;
@@ -55,9 +131,8 @@ function ChatWindow() {
     try {
       await sendMessage(convId, messageText);
       setMessageText('');
-      // Refresh messages
-      const msgs = await getMessages(convId);
-      setMessages(msgs);
+      // With a live connection the new message arrives as a push event
+      if (!liveRef.current) await fetchNewMessages();
     } catch (err) {
       console.error('Error sending message:', err);
     }
@@ -91,6 +166,11 @@ function ChatWindow() {
             </div>
 
             <div className="messages-area">
+              {hasEarlier && (
+                <button type="button" className="load-earlier-btn" onClick={loadEarlier}>
+                  Load earlier messages
+                </button>
+              )}
               {messages.length === 0 ? (
                 <div className="no-messages">
                   <div>👋</div>
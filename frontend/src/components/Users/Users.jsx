@@ -5,17 +5,23 @@ import { Link } from 'react-router-dom';
 import { useUser } from '../../context/Index';
 
 function Users() {
-  const { getAllUsers } = useUser();
+  const { getUsersPage } = useUser();
   const [users, setUsers] = useState([]);
+  const [nextCursor, setNextCursor] = useState(null);
   const [loading, setLoading] = useState(true);
+  const [loadingMore, setLoadingMore] = useState(false);
   const [query, setQuery] = useState('');
 
+  // The list view only needs summary columns
+  const LIST_FIELDS = ['user_id', 'username', 'name', 'skills'];
+
   useEffect(() => {
     (async () => {
       setLoading(true);
       try {
-        const list = await getAllUsers();
-        setUsers(list);
+        const page = await getUsersPage({ fields: LIST_FIELDS });
+        setUsers(page.users);
+        setNextCursor(page.next_cursor);
       } catch (err) {
         console.error(err);
       }
@@ -23,6 +29,19 @@ function Users() {
     })();
   }, []);
 
+  const loadMore = async () => {
+    if (!nextCursor || loadingMore) return;
+    setLoadingMore(true);
+    try {
+      const page = await getUsersPage({ cursor: nextCursor, fields: LIST_FIELDS });
+      setUsers(prev => [...prev, ...page.users]);
+      setNextCursor(page.next_cursor);
+    } catch (err) {
+      console.error(err);
+    }
+    setLoadingMore(false);
+  };
+
   const filtered = users.filter(u =>
     u.username?.toLowerCase().includes(query.toLowerCase()) ||
     u.name?.toLowerCase().includes(query.toLowerCase()) ||
@@ -61,6 +80,14 @@ function Users() {
             ))
           )}
         </section>
+
+        {!loading && nextCursor && (
+          <div className="users-more">
+            <button className="btn-outline small" onClick={loadMore} disabled={loadingMore}>
+              {loadingMore ? 'Loading...' : 'Load more'}
+            </button>
+          </div>
+        )}
       </div>
     </>
   );
@@ -245,14 +245,33 @@ export const UserProvider = ({ children }) => {
     }
   };
 
+  // Get one page of the user directory: { users, next_cursor }
+  const getUsersPage = async ({ cursor, limit = 50, fields, ...filters } = {}) => {
+    const params = new URLSearchParams({ limit: String(limit) });
+    if (cursor) params.set('cursor', cursor);
+    if (fields) params.set('fields', fields.join(','));
+    Object.entries(filters).forEach(([key, val]) => {
+      if (val !== undefined && val !== null && val !== '') params.set(key, String(val));
+    });
+    const page = await fetchJson(`${API_BASE}/users?${params}`);
+    setUsers(prev => {
+      const map = { ...prev };
+      page.users.forEach(u => { map[u.user_id] = { ...map[u.user_id], ...u }; });
+      return map;
+    });
+    return page;
+  };
+
   // Get all users
   const getAllUsers = async () => {
     try {
-      const list = await fetchJson(`${API_BASE}/users`);
-      // normalize map
-      const map = {};
-      list.forEach(u => { map[u.user_id] = u; });
-      setUsers(map);
+      const list = [];
+      let cursor = null;
+      do {
+        const page = await getUsersPage({ cursor, limit: 200 });
+        list.push(...page.users);
+        cursor = page.next_cursor;
+      } while (cursor);
       return list;
     } catch (err) {
       return Object.entries(users).map(([id, user]) => ({ id, ...user }));
@@ -326,7 +345,7 @@ export const UserProvider = ({ children }) => {
   const sendMessage = async (convId, text) => {
     if (!currentUser) throw new Error('Not authenticated');
     try {
-      const result = await fetchJson(`${API_BASE}/messages/${convId}?sender_id=${currentUser.user_id}&text=${encodeURIComponent(text)}`, {
+      const result = await fetchJson(`${API_BASE}/messages/${convId}`, {
         method: 'POST',
         headers: { 'Content-Type': 'application/json' },
         body: JSON.stringify({ sender_id: currentUser.user_id, text })
@@ -338,9 +357,15 @@ export const UserProvider = ({ children }) => {
     }
   };
 
-  const getMessages = async (convId) => {
+  // opts: { after, before, limit } - after/before take a msg_id
+  const getMessages = async (convId, opts = {}) => {
     try {
-      const msgs = await fetchJson(`${API_BASE}/messages/${convId}`);
+      const params = new URLSearchParams();
+      Object.entries(opts).forEach(([key, val]) => {
+        if (val !== undefined && val !== null) params.set(key, String(val));
+      });
+      const query = params.toString() ? `?${params}` : '';
+      const msgs = await fetchJson(`${API_BASE}/messages/${convId}${query}`);
       return msgs;
     } catch (err) {
       console.error('Get messages error:', err);
@@ -365,6 +390,7 @@ export const UserProvider = ({ children }) => {
     verifySkill,
     unverifySkill,
     getUser,
+    getUsersPage,
     getAllUsers,
     getUsersBySkill,
     getUsersByDepartment,